@@ -0,0 +1,184 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gc
+import sys
+import time
+
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+
+
+class TemplateCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with layers of command jobs, where each job depends on all jobs in the previous layer.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, customer, layers=10, width=5):
+        """
+        Object constructor.
+
+        :param str name:     The name of the node.
+        :param str customer: The customer, passed as argument to all jobs.
+        :param int layers:   The number of layers.
+        :param int width:    The number of jobs per layer.
+        """
+        CompoundJobNode.__init__(self, name)
+
+        self.customer = customer
+        """
+        The customer, passed as argument to all jobs.
+
+        :type: str
+        """
+
+        self.layers = layers
+        """
+        The number of layers.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        Creates the jobs.
+        """
+        for layer in range(self.layers):
+            for i in range(self.width):
+                job = CommandJobNode('job_%d_%d' % (layer, i))
+                job.path = '/usr/bin/process'
+                job.args = ['--customer', self.customer, '--step', str(i)]
+                job.consumptions.append(CountingConsumption('cpu', 1))
+                self.add_child_node(job)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        Creates the dependencies between the layers.
+        """
+        for layer in range(1, self.layers):
+            for i in range(self.width):
+                for j in range(self.width):
+                    self.add_dependency('job_%d_%d' % (layer, i), '', 'job_%d_%d' % (layer - 1, j), '')
+
+
+class CloneBenchmark:
+    """
+    Benchmark of building many instances of a compound node by cloning a finalized template versus building each
+    instance with create_node() and finalize().
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, count=1000, layers=10, width=5):
+        """
+        Object constructor.
+
+        :param int count:  The number of instances.
+        :param int layers: The number of layers of jobs of each instance.
+        :param int width:  The number of jobs per layer of each instance.
+        """
+        self.count = count
+        """
+        The number of instances.
+
+        :type: int
+        """
+
+        self.layers = layers
+        """
+        The number of layers of jobs of each instance.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer of each instance.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def build(self):
+        """
+        Builds all instances with create_node() and finalize() and returns the instances.
+
+        :rtype: list[TemplateCompoundJobNode]
+        """
+        nodes = []
+        for i in range(self.count):
+            node = TemplateCompoundJobNode('customer%d' % i, 'customer%d' % i, self.layers, self.width)
+            node.create_node()
+            node.finalize()
+            nodes.append(node)
+
+        return nodes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clone(self):
+        """
+        Builds all instances by cloning a finalized template and returns the instances.
+
+        :rtype: list[TemplateCompoundJobNode]
+        """
+        template = TemplateCompoundJobNode('template', 'template', self.layers, self.width)
+        template.create_node()
+        template.finalize()
+
+        nodes = []
+        for i in range(self.count):
+            customer = 'customer%d' % i
+
+            def hook(node, node_copy):
+                if isinstance(node_copy, CommandJobNode):
+                    node_copy.args[1] = customer
+                elif isinstance(node_copy, TemplateCompoundJobNode):
+                    node_copy.customer = customer
+
+            nodes.append(template.clone(customer, hook))
+
+        return nodes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self):
+        """
+        Runs the benchmark and returns the elapsed times (in seconds) of building and cloning all instances.
+
+        :rtype: dict[str,float]
+        """
+        gc.collect()
+        start = time.perf_counter()
+        self.build()
+        build_time = time.perf_counter() - start
+
+        gc.collect()
+        start = time.perf_counter()
+        self.clone()
+        clone_time = time.perf_counter() - start
+
+        return {'build': build_time, 'clone': clone_time}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    benchmark = CloneBenchmark(*[int(arg) for arg in sys.argv[1:]])
+    times = benchmark.run()
+    print('{0} instances of {1} jobs'.format(benchmark.count, benchmark.layers * benchmark.width))
+    print('build: {0:8.3f}s'.format(times['build']))
+    print('clone: {0:8.3f}s ({1:.1f}x faster)'.format(times['clone'], times['build'] / times['clone']))
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,310 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.consumption.ReadWriteLockConsumption import ReadWriteLockConsumption
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+from enarksh_lib.xml_generator.resource.CountingResource import CountingResource
+from enarksh_lib.xml_generator.resource.ReadWriteLockResource import ReadWriteLockResource
+
+
+class GeneratedCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with child nodes of a given shape, see GeneratedScheduleNode.SHAPES.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, shape, size, width, depth):
+        """
+        Object constructor.
+
+        :param str name:  The name of the node.
+        :param str shape: The shape of the child nodes.
+        :param int size:  The number of jobs (or layers of jobs) of the node.
+        :param int width: The number of jobs per layer, ports, or consumptions (depending on the shape).
+        :param int depth: The number of levels of nested compound nodes below this node.
+        """
+        CompoundJobNode.__init__(self, name)
+
+        self.shape = shape
+        """
+        The shape of the child nodes.
+
+        :type: str
+        """
+
+        self.size = size
+        """
+        The number of jobs (or layers of jobs) of the node.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer, ports, or consumptions (depending on the shape).
+
+        :type: int
+        """
+
+        self.depth = depth
+        """
+        The number of levels of nested compound nodes below this node.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _add_job(self, name):
+        """
+        Adds a command job to this node and returns the command job.
+
+        :param str name: The name of the command job.
+
+        :rtype: enarksh_lib.xml_generator.node.CommandJobNode.CommandJobNode
+        """
+        job = CommandJobNode(name)
+        job.path = '/usr/bin/process'
+        job.args = ['--node', self.name, '--job', name]
+        self.add_child_node(job)
+
+        return job
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        Creates the child nodes.
+        """
+        if self.shape == 'fan_out':
+            self._add_job('start')
+            for i in range(self.size):
+                self._add_job('job%d' % i)
+            self._add_job('end')
+
+        elif self.shape == 'layered':
+            for layer in range(self.size):
+                for i in range(self.width):
+                    self._add_job('job_%d_%d' % (layer, i))
+
+        elif self.shape == 'nested':
+            for i in range(self.size):
+                self._add_job('job%d' % i)
+            if self.depth > 0:
+                node = GeneratedCompoundJobNode('nested', self.shape, self.size, self.width, self.depth - 1)
+                node.create_node()
+                self.add_child_node(node)
+
+        elif self.shape == 'resources':
+            for i in range(self.size):
+                job = self._add_job('job%d' % i)
+                for j in range(self.width):
+                    job.consumptions.append(CountingConsumption('slots%d' % j, j + 1))
+                job.consumptions.append(ReadWriteLockConsumption('lock%d' % (i % self.width), 'read'))
+
+        else:
+            for i in range(self.size):
+                self._add_job('job%d' % i)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        Creates the dependencies between the child nodes, including redundant dependencies that must be purged.
+        """
+        dependencies = []
+
+        if self.shape == 'fan_out':
+            for i in range(self.size):
+                dependencies.append(('job%d' % i, '', 'start', ''))
+                dependencies.append(('end', '', 'job%d' % i, ''))
+            dependencies.append(('end', '', 'start', ''))
+
+        elif self.shape == 'layered':
+            for layer in range(1, self.size):
+                for i in range(self.width):
+                    for j in range(self.width):
+                        dependencies.append(('job_%d_%d' % (layer, i), '', 'job_%d_%d' % (layer - 1, j), ''))
+                    if layer > 1:
+                        dependencies.append(('job_%d_%d' % (layer, i), '', 'job_%d_%d' % (layer - 2, i), ''))
+
+        elif self.shape == 'ports':
+            for i in range(self.size):
+                port = i % self.width
+                dependencies.append(('job%d' % i, '', '.', 'in%d' % port))
+                dependencies.append(('.', 'out%d' % port, 'job%d' % i, ''))
+                if i > 0:
+                    dependencies.append(('job%d' % i, '', 'job%d' % (i - 1), ''))
+
+        else:
+            for i in range(1, self.size):
+                dependencies.append(('job%d' % i, '', 'job%d' % (i - 1), ''))
+                if i > 1:
+                    dependencies.append(('job%d' % i, '', 'job%d' % (i - 2), ''))
+            if self.shape == 'nested' and self.depth > 0:
+                dependencies.append(('nested', '', 'job%d' % (self.size - 1), ''))
+
+        self.add_dependencies(dependencies)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_input_ports(self):
+        """
+        Creates the named input ports.
+        """
+        if self.shape == 'ports':
+            for i in range(self.width):
+                self.make_input_port('in%d' % i)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_output_ports(self):
+        """
+        Creates the named output ports.
+        """
+        if self.shape == 'ports':
+            for i in range(self.width):
+                self.make_output_port('out%d' % i)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_resources(self):
+        """
+        Creates the resources.
+        """
+        if self.shape == 'resources':
+            for i in range(self.width):
+                self.resources.append(CountingResource('slots%d' % i, 10 * (i + 1)))
+                self.resources.append(ReadWriteLockResource('lock%d' % i))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def ensure_dependencies_input_port(self):
+        """
+        Ensures that the input port 'all' of all child nodes depends on input port 'all' of this node.
+        """
+        parent_port = self.get_input_port(self.ALL_PORT_NAME)
+        for node in self.child_nodes:
+            node.get_input_port(self.ALL_PORT_NAME).add_dependency(parent_port)
+
+
+class GeneratedScheduleNode(ScheduleNode):
+    """
+    Schedule with compound nodes of a given shape.
+    """
+
+    SHAPES = {'fan_out':   {'count': 20, 'size': 200, 'width': 1, 'depth': 0},
+              'chain':     {'count': 20, 'size': 200, 'width': 1, 'depth': 0},
+              'layered':   {'count': 20, 'size': 10, 'width': 10, 'depth': 0},
+              'nested':    {'count': 20, 'size': 5, 'width': 1, 'depth': 40},
+              'resources': {'count': 20, 'size': 100, 'width': 8, 'depth': 0},
+              'ports':     {'count': 20, 'size': 100, 'width': 50, 'depth': 0}}
+    """
+    The shapes of schedules and their default parameters:
+    - fan_out:   each compound node has a start job, size jobs depending on the start job, and an end job depending on
+                 all jobs,
+    - chain:     each compound node has a chain of size jobs,
+    - layered:   each compound node has size layers of width jobs, each job depends on all jobs of the previous layer,
+    - nested:    each compound node has a chain of size jobs and a nested compound node, depth levels deep,
+    - resources: each compound node has 2 * width resources and a chain of size jobs with width + 1 consumptions each,
+    - ports:     each compound node has width named input and output ports and a chain of size jobs connected to the
+                 ports.
+    The compound nodes of a schedule form a chain too.
+
+    :type: dict[str,dict[str,int]]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, shape, count, size, width, depth):
+        """
+        Object constructor.
+
+        :param str shape: The shape of the compound nodes.
+        :param int count: The number of compound nodes.
+        :param int size:  The number of jobs (or layers of jobs) per compound node.
+        :param int width: The number of jobs per layer, ports, or consumptions (depending on the shape).
+        :param int depth: The number of levels of nested compound nodes.
+        """
+        ScheduleNode.__init__(self, shape.upper())
+
+        self.shape = shape
+        """
+        The shape of the compound nodes.
+
+        :type: str
+        """
+
+        self.count = count
+        """
+        The number of compound nodes.
+
+        :type: int
+        """
+
+        self.size = size
+        """
+        The number of jobs (or layers of jobs) per compound node.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer, ports, or consumptions (depending on the shape).
+
+        :type: int
+        """
+
+        self.depth = depth
+        """
+        The number of levels of nested compound nodes.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create(shape, scale=1):
+        """
+        Returns a schedule of a shape with the default parameters of the shape. The schedule has not been created yet,
+        i.e. create_node() has not been called.
+
+        :param str shape: The shape, see SHAPES.
+        :param int scale: The factor applied to the number of compound nodes.
+
+        :rtype: GeneratedScheduleNode
+        """
+        if shape not in GeneratedScheduleNode.SHAPES:
+            raise ValueError("Unknown shape '{0}'".format(shape))
+
+        parameters = GeneratedScheduleNode.SHAPES[shape]
+
+        return GeneratedScheduleNode(shape,
+                                     parameters['count'] * scale,
+                                     parameters['size'],
+                                     parameters['width'],
+                                     parameters['depth'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        Creates the compound nodes.
+        """
+        for i in range(self.count):
+            node = GeneratedCompoundJobNode('compound%d' % i, self.shape, self.size, self.width, self.depth)
+            node.create_node()
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        Creates a chain of the compound nodes.
+        """
+        for i in range(1, self.count):
+            if self.shape == 'ports':
+                for j in range(self.width):
+                    self.add_dependency('compound%d' % i, 'in%d' % j, 'compound%d' % (i - 1), 'out%d' % j)
+            else:
+                self.add_dependency('compound%d' % i, '', 'compound%d' % (i - 1), '')
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,191 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmark.CloneBenchmark import TemplateCompoundJobNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+
+
+class NullStream:
+    """
+    Binary stream that discards all data and counts the number of bytes written.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        """
+        Object constructor.
+        """
+        self.size = 0
+        """
+        The number of bytes written.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write(self, data):
+        """
+        Discards data.
+
+        :param bytes data: The data.
+        """
+        self.size += len(data)
+
+
+class TemplateScheduleNode(ScheduleNode):
+    """
+    Schedule with a chain of template compound nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, count, layers, width, lazy):
+        """
+        Object constructor.
+
+        :param int count:  The number of compound nodes.
+        :param int layers: The number of layers of jobs of each compound node.
+        :param int width:  The number of jobs per layer of each compound node.
+        :param bool lazy:  If True, the compound nodes are created in lazy mode.
+        """
+        ScheduleNode.__init__(self, 'TEMPLATES')
+
+        self.count = count
+        """
+        The number of compound nodes.
+
+        :type: int
+        """
+
+        self.layers = layers
+        """
+        The number of layers of jobs of each compound node.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer of each compound node.
+
+        :type: int
+        """
+
+        self.lazy = lazy
+        """
+        If True, the compound nodes are created in lazy mode.
+
+        :type: bool
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        Creates the compound nodes.
+        """
+        for i in range(self.count):
+            node = TemplateCompoundJobNode('compound%d' % i, 'customer%d' % i, self.layers, self.width)
+            node.create_node(self.lazy)
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        Creates a chain of the compound nodes.
+        """
+        for i in range(1, self.count):
+            self.add_dependency('compound%d' % i, '', 'compound%d' % (i - 1), '')
+
+
+class LazyBenchmark:
+    """
+    Benchmark of streaming the XML of a schedule with compound nodes created in lazy mode versus eager mode.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, count=1000, layers=10, width=5):
+        """
+        Object constructor.
+
+        :param int count:  The number of compound nodes.
+        :param int layers: The number of layers of jobs of each compound node.
+        :param int width:  The number of jobs per layer of each compound node.
+        """
+        self.count = count
+        """
+        The number of compound nodes.
+
+        :type: int
+        """
+
+        self.layers = layers
+        """
+        The number of layers of jobs of each compound node.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer of each compound node.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self):
+        """
+        Runs the benchmark and returns the elapsed time (in seconds), the peak number of bytes allocated, and the size
+        of the XML for both modes.
+
+        :rtype: dict[str,dict[str,int|float]]
+        """
+        return {'eager': self.stream(False), 'lazy': self.stream(True)}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stream(self, lazy):
+        """
+        Builds, finalizes, and streams the XML of the schedule and returns the elapsed time (in seconds), the peak
+        number of bytes allocated, and the size of the XML.
+
+        :param bool lazy: If True, the compound nodes are created in lazy mode.
+
+        :rtype: dict[str,int|float]
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            schedule = TemplateScheduleNode(self.count, self.layers, self.width, lazy)
+            schedule.create_node()
+            schedule.finalize()
+            stream = NullStream()
+            schedule.write_xml(stream)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {'time': elapsed, 'peak': peak, 'size': stream.size}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    benchmark = LazyBenchmark(*[int(arg) for arg in sys.argv[1:]])
+    result = benchmark.run()
+    print('{0} compound nodes of {1} jobs'.format(benchmark.count, benchmark.layers * benchmark.width))
+    for mode in ('eager', 'lazy'):
+        print('{0:5}: {1:8.3f}s, peak {2:8.1f} MiB, {3:.1f} MiB XML'.format(mode,
+                                                                           result[mode]['time'],
+                                                                           result[mode]['peak'] / 2 ** 20,
+                                                                           result[mode]['size'] / 2 ** 20))
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,103 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gc
+import sys
+import tracemalloc
+
+from benchmark.CloneBenchmark import TemplateCompoundJobNode
+
+
+class MemoryBenchmark:
+    """
+    Benchmark of the memory used by (finalized) node trees.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, count=1000, layers=10, width=5):
+        """
+        Object constructor.
+
+        :param int count:  The number of compound nodes.
+        :param int layers: The number of layers of jobs of each compound node.
+        :param int width:  The number of jobs per layer of each compound node.
+        """
+        self.count = count
+        """
+        The number of compound nodes.
+
+        :type: int
+        """
+
+        self.layers = layers
+        """
+        The number of layers of jobs of each compound node.
+
+        :type: int
+        """
+
+        self.width = width
+        """
+        The number of jobs per layer of each compound node.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def build(self):
+        """
+        Builds and finalizes all compound nodes and returns the compound nodes.
+
+        :rtype: list[TemplateCompoundJobNode]
+        """
+        nodes = []
+        for i in range(self.count):
+            node = TemplateCompoundJobNode('compound%d' % i, 'customer%d' % i, self.layers, self.width)
+            node.create_node()
+            node.finalize()
+            nodes.append(node)
+
+        return nodes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self):
+        """
+        Runs the benchmark and returns the number of nodes, ports, and dependencies and the number of bytes allocated
+        by the node trees.
+
+        :rtype: dict[str,int]
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            nodes = self.build()
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+
+        result = {'nodes': 0, 'ports': 0, 'dependencies': 0, 'bytes': size}
+        while nodes:
+            node = nodes.pop()
+            result['nodes'] += 1
+            for port in list(node.input_ports) + list(node.output_ports):
+                result['ports'] += 1
+                result['dependencies'] += len(port.predecessors)
+            nodes.extend(node.child_nodes)
+
+        return result
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    benchmark = MemoryBenchmark(*[int(arg) for arg in sys.argv[1:]])
+    result = benchmark.run()
+    print('{0} nodes, {1} ports, {2} dependencies'.format(result['nodes'], result['ports'], result['dependencies']))
+    print('{0:.1f} MiB, {1:.0f} bytes per node'.format(result['bytes'] / 2 ** 20, result['bytes'] / result['nodes']))
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,370 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmark.GeneratedScheduleNode import GeneratedScheduleNode
+from enarksh_lib.xml_generator.diff.NodeDiff import NodeDiff
+from enarksh_lib.xml_generator.instrumentation.MemoryProfile import MemoryProfile
+from enarksh_lib.xml_generator.loader.XmlLoader import XmlLoader
+
+
+class SuiteBenchmark:
+    """
+    Benchmark of creating, finalizing, generating the XML, and diffing schedules of many shapes, see
+    GeneratedScheduleNode.SHAPES.
+
+    Usage:
+      python -m benchmark.SuiteBenchmark run [--output results.json] [--scale N] [--repeat N] [--shape SHAPE ...]
+      python -m benchmark.SuiteBenchmark compare baseline.json results.json [--threshold 0.2]
+      python -m benchmark.SuiteBenchmark profile SHAPE [--scale N] [--top N] [--loaded]
+    """
+
+    PHASES = ('create_node', 'ensure_dependencies', 'purge', 'finalize', 'get_xml', 'diff', 'diff_digests')
+    """
+    The timed phases. ensure_dependencies and purge are timed on one schedule, finalize (i.e. ensure_dependencies,
+    cycle detection, and purge) and get_xml are timed on another schedule. diff is the diff between the latter schedule
+    and a third schedule with one changed job without digests, diff_digests is the same diff after computing the
+    fingerprints of both schedules (the fingerprints are not timed).
+
+    :type: tuple[str]
+    """
+
+    MIN_DIFFERENCE = 0.02
+    """
+    The minimum difference (in seconds) between a time and the time of the baseline to be reported as a regression.
+    Short phases are too noisy for a relative tolerance only.
+
+    :type: float
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, shapes=None, scale=1, repeat=3):
+        """
+        Object constructor.
+
+        :param list[str]|None shapes: The shapes of the schedules. If None, all shapes.
+        :param int scale:             The factor applied to the number of compound nodes of each schedule.
+        :param int repeat:            The number of times each phase is timed, the fastest time is reported.
+        """
+        self.shapes = shapes if shapes else sorted(GeneratedScheduleNode.SHAPES)
+        """
+        The shapes of the schedules.
+
+        :type: list[str]
+        """
+
+        self.scale = scale
+        """
+        The factor applied to the number of compound nodes of each schedule.
+
+        :type: int
+        """
+
+        self.repeat = repeat
+        """
+        The number of times each phase is timed.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def compare(baseline, results, threshold=0.2):
+        """
+        Compares results with a baseline and returns the regressions, i.e. the phases that are more than threshold
+        (and at least MIN_DIFFERENCE seconds) slower and the shapes of which the peak memory is more than threshold
+        larger.
+
+        :param dict baseline:    The results of the baseline.
+        :param dict results:     The results.
+        :param float threshold:  The relative tolerance.
+
+        :rtype: list[str]
+        """
+        regressions = []
+        for shape, result in sorted(results['shapes'].items()):
+            expected = baseline['shapes'].get(shape)
+            if expected is None:
+                continue
+
+            if (expected['nodes'], expected['dependencies']) != (result['nodes'], result['dependencies']):
+                regressions.append('{0}: schedule differs from the baseline ({1} nodes, {2} dependencies versus {3} '
+                                   'nodes, {4} dependencies)'.format(shape,
+                                                                     result['nodes'],
+                                                                     result['dependencies'],
+                                                                     expected['nodes'],
+                                                                     expected['dependencies']))
+                continue
+
+            for key in SuiteBenchmark.PHASES + ('peak',):
+                if key not in expected:
+                    continue
+                if key != 'peak' and result[key] - expected[key] < SuiteBenchmark.MIN_DIFFERENCE:
+                    continue
+                if result[key] > expected[key] * (1.0 + threshold):
+                    regressions.append('{0}: {1} {2} versus {3} ({4:+.0%})'.format(
+                        shape,
+                        key,
+                        SuiteBenchmark._format(key, result[key]),
+                        SuiteBenchmark._format(key, expected[key]),
+                        result[key] / expected[key] - 1.0 if expected[key] else 0.0))
+
+        return regressions
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _count(schedule):
+        """
+        Returns the number of nodes and the number of dependencies of a schedule.
+
+        :param GeneratedScheduleNode schedule: The schedule.
+
+        :rtype: (int,int)
+        """
+        nodes = 0
+        dependencies = 0
+        stack = [schedule]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            for port in node.input_ports:
+                dependencies += len(port.predecessors)
+            for port in node.output_ports:
+                dependencies += len(port.predecessors)
+            stack.extend(node.child_nodes)
+
+        return nodes, dependencies
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _format(key, value):
+        """
+        Returns a result in human readable format.
+
+        :param str key:         The name of the result.
+        :param int|float value: The result.
+
+        :rtype: str
+        """
+        if key == 'peak':
+            return '{0:.1f} MiB'.format(value / 2 ** 20)
+
+        return '{0:.3f}s'.format(value)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self):
+        """
+        Runs the benchmark and returns the results.
+
+        :rtype: dict
+        """
+        results = {'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'scale': self.scale,
+                   'repeat': self.repeat,
+                   'shapes': {}}
+        for shape in self.shapes:
+            results['shapes'][shape] = self.run_shape(shape)
+
+        return results
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run_shape(self, shape):
+        """
+        Runs the benchmark for one shape and returns the fastest time of each phase (in seconds), the peak memory
+        (in bytes) of creating, finalizing and generating the XML of the schedule, and the size of the schedule.
+
+        :param str shape: The shape.
+
+        :rtype: dict[str,int|float]
+        """
+        result = {}
+        for _ in range(self.repeat):
+            times = self._time_phases(shape)
+            for phase, elapsed in times.items():
+                result[phase] = min(result.get(phase, elapsed), elapsed)
+
+        # Tracing memory allocations slows down everything, hence the peak memory is measured in a separate run.
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            schedule = GeneratedScheduleNode.create(shape, self.scale)
+            schedule.create_node()
+            schedule.finalize()
+            schedule.get_xml()
+            result['peak'] = tracemalloc.get_traced_memory()[1] - start
+        finally:
+            tracemalloc.stop()
+
+        result['nodes'], result['dependencies'] = self._count(schedule)
+
+        return result
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _time_phases(self, shape):
+        """
+        Creates, finalizes, generates the XML, and diffs schedules of a shape and returns the elapsed time of each phase
+        (in seconds).
+
+        :param str shape: The shape.
+
+        :rtype: dict[str,float]
+        """
+        times = {}
+
+        gc.collect()
+        schedule = GeneratedScheduleNode.create(shape, self.scale)
+        start = time.perf_counter()
+        schedule.create_node()
+        times['create_node'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schedule.ensure_dependencies()
+        times['ensure_dependencies'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schedule.purge()
+        times['purge'] = time.perf_counter() - start
+
+        del schedule
+        gc.collect()
+        schedule = GeneratedScheduleNode.create(shape, self.scale)
+        schedule.create_node()
+        start = time.perf_counter()
+        schedule.finalize()
+        times['finalize'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schedule.get_xml()
+        times['get_xml'] = time.perf_counter() - start
+
+        other = GeneratedScheduleNode.create(shape, self.scale)
+        other.create_node()
+        other.finalize()
+        node = other
+        while node.child_nodes:
+            node = node.child_nodes[-1]
+        node.username = 'changed'
+
+        gc.collect()
+        start = time.perf_counter()
+        NodeDiff(schedule, other)
+        times['diff'] = time.perf_counter() - start
+
+        schedule.fingerprint()
+        other.fingerprint()
+        start = time.perf_counter()
+        NodeDiff(schedule, other)
+        times['diff_digests'] = time.perf_counter() - start
+
+        return times
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def main(args=None):
+        """
+        The main function of the benchmark suite. Returns the exit status.
+
+        :param list[str]|None args: The command line arguments.
+
+        :rtype: int
+        """
+        parser = argparse.ArgumentParser(prog='python -m benchmark.SuiteBenchmark')
+        commands = parser.add_subparsers(dest='command')
+
+        run = commands.add_parser('run', help='run the benchmark suite')
+        run.add_argument('--output', help='the JSON file for the results (default: standard output)')
+        run.add_argument('--scale', type=int, default=1, help='the factor applied to the size of the schedules')
+        run.add_argument('--repeat', type=int, default=3, help='the number of times each phase is timed')
+        run.add_argument('--shape', action='append', choices=sorted(GeneratedScheduleNode.SHAPES),
+                         help='a shape to run (default: all shapes)')
+
+        compare = commands.add_parser('compare', help='compare results with a baseline')
+        compare.add_argument('baseline', help='the JSON file with the results of the baseline')
+        compare.add_argument('results', help='the JSON file with the results')
+        compare.add_argument('--threshold', type=float, default=0.2, help='the relative tolerance (default: 0.2)')
+
+        profile = commands.add_parser('profile', help='report the memory used by a schedule per class and subtree')
+        profile.add_argument('shape', choices=sorted(GeneratedScheduleNode.SHAPES), help='the shape of the schedule')
+        profile.add_argument('--scale', type=int, default=1, help='the factor applied to the size of the schedule')
+        profile.add_argument('--top', type=int, default=10, help='the number of subtrees and source lines reported')
+        profile.add_argument('--loaded', action='store_true',
+                             help='profile the schedule loaded from its XML instead of the created schedule')
+
+        options = parser.parse_args(args)
+
+        if options.command == 'run':
+            results = SuiteBenchmark(options.shape, options.scale, options.repeat).run()
+            for shape, result in sorted(results['shapes'].items()):
+                summary = ['{0} {1}'.format(key, SuiteBenchmark._format(key, result[key]))
+                           for key in SuiteBenchmark.PHASES + ('peak',)]
+                print('{0:10} {1}'.format(shape, ', '.join(summary)), file=sys.stderr)
+
+            if options.output:
+                with open(options.output, 'w') as file:
+                    json.dump(results, file, indent=2, sort_keys=True)
+            else:
+                json.dump(results, sys.stdout, indent=2, sort_keys=True)
+
+            return 0
+
+        if options.command == 'compare':
+            with open(options.baseline) as file:
+                baseline = json.load(file)
+            with open(options.results) as file:
+                results = json.load(file)
+
+            if (baseline['scale'], baseline['python']) != (results['scale'], results['python']):
+                print('Warning: the results have been obtained with different parameters or Python versions')
+
+            regressions = SuiteBenchmark.compare(baseline, results, options.threshold)
+            for regression in regressions:
+                print(regression)
+            if not regressions:
+                print('No regressions')
+
+            return 1 if regressions else 0
+
+        if options.command == 'profile':
+            schedule = GeneratedScheduleNode.create(options.shape, options.scale)
+            if options.loaded:
+                schedule.create_node()
+                schedule.finalize()
+                xml = schedule.get_xml()
+                del schedule
+
+                def build():
+                    return XmlLoader().load(io.BytesIO(xml))
+            else:
+                def build():
+                    schedule.create_node()
+
+                    return schedule
+
+            print(MemoryProfile.format(MemoryProfile(options.top).profile(build)))
+
+            return 0
+
+        parser.print_help()
+
+        return 2
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.exit(SuiteBenchmark.main())
+
+# ----------------------------------------------------------------------------------------------------------------------
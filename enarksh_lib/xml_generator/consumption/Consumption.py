@@ -6,7 +6,9 @@ Copyright 2015-2016 Set Based IT Consultancy
 Licence MIT
 """
 import abc
-from xml.etree.ElementTree import SubElement
+import sys
+
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class Consumption(metaclass=abc.ABCMeta):
@@ -14,12 +16,14 @@ class Consumption(metaclass=abc.ABCMeta):
     Class for generating XML messages for elements of type 'ConsumptionType'.
     """
 
+    __slots__ = ('name',)
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name):
         """
         Object constructor.
         """
-        self.name = name
+        self.name = sys.intern(name) if type(name) is str else name
         """
         The name of this consumption.
 
@@ -48,4 +52,13 @@ class Consumption(metaclass=abc.ABCMeta):
         resource_name = SubElement(parent, 'ResourceName')
         resource_name.text = self.name
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this consumption that are part of its XML.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        hasher.update(repr((self.__class__.__module__, self.__class__.__qualname__, self.name)).encode())
+
 # ----------------------------------------------------------------------------------------------------------------------
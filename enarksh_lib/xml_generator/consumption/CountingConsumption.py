@@ -5,9 +5,8 @@ Copyright 2015-2016 Set Based IT Consultancy
 
 Licence MIT
 """
-from xml.etree.ElementTree import SubElement
-
 from enarksh_lib.xml_generator.consumption.Consumption import Consumption
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class CountingConsumption(Consumption):
@@ -15,6 +14,8 @@ class CountingConsumption(Consumption):
     Class for generating XML messages for elements of type 'CountingConsumptionType'.
     """
 
+    __slots__ = ('amount',)
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name, amount):
         """
@@ -43,4 +44,15 @@ class CountingConsumption(Consumption):
         amount = SubElement(consumption, 'Amount')
         amount.text = str(self.amount)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this consumption that are part of its XML.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        Consumption.update_hash(self, hasher)
+
+        hasher.update(repr(str(self.amount)).encode())
+
 # ----------------------------------------------------------------------------------------------------------------------
@@ -5,9 +5,8 @@ Copyright 2015-2016 Set Based IT Consultancy
 
 Licence MIT
 """
-from xml.etree.ElementTree import SubElement
-
 from enarksh_lib.xml_generator.consumption.Consumption import Consumption
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class ReadWriteLockConsumption(Consumption):
@@ -15,6 +14,8 @@ class ReadWriteLockConsumption(Consumption):
     Class for generating XML messages for elements of type 'ReadWriteLockConsumptionType'.
     """
 
+    __slots__ = ('mode',)
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name, mode):
         """
@@ -46,4 +47,15 @@ class ReadWriteLockConsumption(Consumption):
         mode = SubElement(consumption, 'Mode')
         mode.text = self.mode
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this consumption that are part of its XML.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        Consumption.update_hash(self, hasher)
+
+        hasher.update(repr(self.mode).encode())
+
 # ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,192 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+
+
+class Change:
+    """
+    A change between two node trees, e.g. an added node or a removed dependency.
+    """
+
+    ADDED = 'added'
+    """
+    The subject has been added.
+
+    :type: str
+    """
+
+    REMOVED = 'removed'
+    """
+    The subject has been removed.
+
+    :type: str
+    """
+
+    MODIFIED = 'modified'
+    """
+    The subject has been modified.
+
+    :type: str
+    """
+
+    NODE = 'node'
+    """
+    A change of a (child) node.
+
+    :type: str
+    """
+
+    PROPERTY = 'property'
+    """
+    A change of a property of a node, e.g. the username or the path of a command job.
+
+    :type: str
+    """
+
+    INPUT_PORT = 'input port'
+    """
+    A change of an input port.
+
+    :type: str
+    """
+
+    OUTPUT_PORT = 'output port'
+    """
+    A change of an output port.
+
+    :type: str
+    """
+
+    DEPENDENCY = 'dependency'
+    """
+    A change of a dependency of a port.
+
+    :type: str
+    """
+
+    CONSUMPTION = 'consumption'
+    """
+    A change of a consumption.
+
+    :type: str
+    """
+
+    RESOURCE = 'resource'
+    """
+    A change of a resource.
+
+    :type: str
+    """
+
+    _SYMBOLS = {ADDED: '+', REMOVED: '-', MODIFIED: '~'}
+    """
+    The symbols of the kinds of changes in reports.
+
+    :type: dict[str,str]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kind, path, subject, name, old=None, new=None):
+        """
+        Object constructor.
+
+        :param str kind:    The kind of the change: ADDED, REMOVED, or MODIFIED.
+        :param str path:    The path of the node of the change.
+        :param str subject: The subject of the change: NODE, PROPERTY, INPUT_PORT, OUTPUT_PORT, DEPENDENCY,
+                            CONSUMPTION, or RESOURCE.
+        :param str name:    The name of the subject.
+        :param * old:       The old value of the subject (if any).
+        :param * new:       The new value of the subject (if any).
+        """
+        self.kind = kind
+        """
+        The kind of the change: ADDED, REMOVED, or MODIFIED.
+
+        :type: str
+        """
+
+        self.path = path
+        """
+        The path of the node of the change. For added and removed nodes the path of the node itself.
+
+        :type: str
+        """
+
+        self.subject = subject
+        """
+        The subject of the change.
+
+        :type: str
+        """
+
+        self.name = name
+        """
+        The name of the subject, e.g. the name of a port or the name of a property.
+
+        :type: str
+        """
+
+        self.old = old
+        """
+        The old value of the subject (if any).
+
+        :type: *
+        """
+
+        self.new = new
+        """
+        The new value of the subject (if any).
+
+        :type: *
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __eq__(self, other):
+        """
+        Returns True if and only if this change and another change are equal.
+
+        :param * other: The other change.
+
+        :rtype: bool
+        """
+        if not isinstance(other, Change):
+            return NotImplemented
+
+        return self.get_key() == other.get_key()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __repr__(self):
+        """
+        Returns the representation of this change.
+
+        :rtype: str
+        """
+        return 'Change{0!r}'.format(self.get_key())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        """
+        Returns this change as a line of a readable report.
+
+        :rtype: str
+        """
+        text = '{0} {1} {2} {3}'.format(self._SYMBOLS[self.kind], self.path, self.subject, self.name)
+        if self.kind == self.MODIFIED:
+            text += ': {0!r} -> {1!r}'.format(self.old, self.new)
+
+        return text
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_key(self):
+        """
+        Returns all properties of this change as a tuple.
+
+        :rtype: tuple
+        """
+        return self.kind, self.path, self.subject, self.name, self.old, self.new
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,398 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from enarksh_lib.xml_generator.diff.Change import Change
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+
+
+class NodeDiff:
+    """
+    Class for computing the structural differences between two node trees, e.g. two versions of a schedule.
+
+    Child nodes are matched by name, hence reordering child nodes is not a change. The name of the root nodes is
+    compared as a property.
+
+    Subtrees of which both roots have a digest (see Node.get_digest()) and the digests are equal are skipped, all other
+    nodes are compared directly. The nodes keep their digests until they are changed, hence when the digests of both
+    trees have been computed before (e.g. by ScheduleNode.fingerprint()) the cost of the diff is proportional to the
+    size of the changes since. Otherwise, the cost is proportional to the size of the node trees, but a diff does not
+    compute digests, because comparing two nodes directly is much cheaper than computing their digests. See the diff
+    and diff_digests phases of benchmark.SuiteBenchmark.
+    """
+
+    _slot_names = {}
+    """
+    The names of the slots of the classes of consumptions and resources found so far, see _get_slot_names().
+
+    :type: dict[type,tuple[str]]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, old_node, new_node):
+        """
+        Object constructor. Computes the differences between two node trees.
+
+        :param enarksh_lib.xml_generator.node.Node.Node old_node: The root of the old node tree.
+        :param enarksh_lib.xml_generator.node.Node.Node new_node: The root of the new node tree.
+        """
+        self.changes = []
+        """
+        The changes between the old and the new node tree, in document order of the new node tree.
+
+        :type: list[enarksh_lib.xml_generator.diff.Change.Change]
+        """
+
+        self._diff(old_node, new_node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __bool__(self):
+        """
+        Returns True if and only if the node trees are different.
+
+        :rtype: bool
+        """
+        return bool(self.changes)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_report(self):
+        """
+        Returns a readable report of the changes with one change per line.
+
+        :rtype: str
+        """
+        if not self.changes:
+            return 'No changes\n'
+
+        return ''.join(str(change) + '\n' for change in self.changes)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _diff(self, old_node, new_node):
+        """
+        Computes the differences between two node trees.
+
+        :param enarksh_lib.xml_generator.node.Node.Node old_node: The root of the old node tree.
+        :param enarksh_lib.xml_generator.node.Node.Node new_node: The root of the new node tree.
+        """
+        if old_node.name != new_node.name:
+            self.changes.append(Change(Change.MODIFIED,
+                                       new_node.get_path(),
+                                       Change.PROPERTY,
+                                       'name',
+                                       old_node.name,
+                                       new_node.name))
+
+        stack = [(old_node, new_node)]
+        while stack:
+            old, new = stack.pop()
+            if new is None:
+                # The child nodes of a deferred node have been compared.
+                old._release_child_nodes()
+                continue
+
+            if old.digest is not None and old.digest == new.digest:
+                continue
+
+            # Deferred child nodes (and the dependencies of the output ports on the child nodes) are created for the
+            # comparison only.
+            for node in (old, new):
+                if getattr(node, '_deferred', False):
+                    stack.append((node, None))
+            old_child_nodes = old._get_child_nodes()
+            new_child_nodes = new._get_child_nodes()
+
+            if not self._is_equal(old, new):
+                path = new.get_path()
+                self._diff_properties(path, old, new)
+                self._diff_ports(path, Change.INPUT_PORT, old.input_ports, new.input_ports)
+                self._diff_ports(path, Change.OUTPUT_PORT, old.output_ports, new.output_ports)
+                self._diff_items(path, Change.CONSUMPTION, old._consumptions or (), new._consumptions or ())
+                self._diff_items(path, Change.RESOURCE, old._resources or (), new._resources or ())
+
+            pairs = []
+            for child_node in new_child_nodes:
+                old_child_node = old_child_nodes.get(child_node.name) if old_child_nodes else None
+                if old_child_node is None:
+                    self.changes.append(Change(Change.ADDED,
+                                               child_node.get_path(),
+                                               Change.NODE,
+                                               child_node.name,
+                                               new=self._get_type(child_node)))
+                else:
+                    pairs.append((old_child_node, child_node))
+
+            if len(pairs) < len(old_child_nodes):
+                path = new.get_path()
+                for child_node in old_child_nodes:
+                    if not new_child_nodes or new_child_nodes.get(child_node.name) is None:
+                        self.changes.append(Change(Change.REMOVED,
+                                                   path + '/' + child_node.name,
+                                                   Change.NODE,
+                                                   child_node.name,
+                                                   old=self._get_type(child_node)))
+
+            stack.extend(reversed(pairs))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _diff_items(self, path, subject, old_items, new_items):
+        """
+        Computes the differences between the consumptions or resources of two nodes. Consumptions and resources are
+        matched by type and name.
+
+        :param str path:    The path of the node.
+        :param str subject: Change.CONSUMPTION or Change.RESOURCE.
+        :param list old_items: The old consumptions or resources.
+        :param list new_items: The new consumptions or resources.
+        """
+        old_values = {self._get_item_name(item): self._get_item_value(item) for item in old_items}
+        new_values = {self._get_item_name(item): self._get_item_value(item) for item in new_items}
+
+        for name, new_value in new_values.items():
+            if name not in old_values:
+                self.changes.append(Change(Change.ADDED, path, subject, name, new=new_value))
+            elif old_values[name] != new_value:
+                self.changes.append(Change(Change.MODIFIED, path, subject, name, old_values[name], new_value))
+
+        for name, old_value in old_values.items():
+            if name not in new_values:
+                self.changes.append(Change(Change.REMOVED, path, subject, name, old=old_value))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _diff_ports(self, path, subject, old_ports, new_ports):
+        """
+        Computes the differences between the input ports or output ports of two nodes, including their dependencies.
+
+        :param str path:    The path of the node.
+        :param str subject: Change.INPUT_PORT or Change.OUTPUT_PORT.
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList old_ports: The old ports.
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList new_ports: The new ports.
+        """
+        for port in new_ports:
+            old_port = old_ports.get(port.port_name)
+            if old_port is None:
+                self.changes.append(Change(Change.ADDED, path, subject, port.port_name))
+                old_dependencies = []
+            else:
+                old_dependencies = old_port.get_dependency_names()
+
+            self._diff_dependencies(path, subject, port.port_name, old_dependencies, port.get_dependency_names())
+
+        for port in old_ports:
+            if new_ports.get(port.port_name) is None:
+                self.changes.append(Change(Change.REMOVED, path, subject, port.port_name))
+                self._diff_dependencies(path, subject, port.port_name, port.get_dependency_names(), [])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _diff_dependencies(self, path, subject, port_name, old_dependencies, new_dependencies):
+        """
+        Computes the differences between the dependencies of two ports.
+
+        :param str path:      The path of the node.
+        :param str subject:   Change.INPUT_PORT or Change.OUTPUT_PORT.
+        :param str port_name: The name of the port.
+        :param list[(str,str)] old_dependencies: The old dependencies.
+        :param list[(str,str)] new_dependencies: The new dependencies.
+        """
+        if old_dependencies == new_dependencies:
+            return
+
+        old_set = set(old_dependencies)
+        new_set = set(new_dependencies)
+        for kind, dependencies, others in ((Change.ADDED, new_dependencies, old_set),
+                                           (Change.REMOVED, old_dependencies, new_set)):
+            for node_name, predecessor_port_name in dependencies:
+                if (node_name, predecessor_port_name) not in others:
+                    name = '{0} {1} <- {2}:{3}'.format(subject, port_name, node_name, predecessor_port_name)
+                    self.changes.append(Change(kind, path, Change.DEPENDENCY, name))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _diff_properties(self, path, old_node, new_node):
+        """
+        Computes the differences between the properties of two nodes.
+
+        :param str path: The path of the node.
+        :param enarksh_lib.xml_generator.node.Node.Node old_node: The old node.
+        :param enarksh_lib.xml_generator.node.Node.Node new_node: The new node.
+        """
+        old_properties = self._get_properties(old_node)
+        new_properties = self._get_properties(new_node)
+        for name, new_value in new_properties.items():
+            old_value = old_properties.get(name)
+            if old_value != new_value:
+                self.changes.append(Change(Change.MODIFIED, path, Change.PROPERTY, name, old_value, new_value))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_item_name(item):
+        """
+        Returns the name of a consumption or resource in a change, i.e. the type and the name.
+
+        :param enarksh_lib.xml_generator.consumption.Consumption.Consumption|* item: The consumption or resource.
+
+        :rtype: str
+        """
+        return '{0} {1}'.format(item.__class__.__name__, item.name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_item_value(item):
+        """
+        Returns the value of a consumption or resource in a change, i.e. all its properties except the name.
+
+        :param enarksh_lib.xml_generator.consumption.Consumption.Consumption|* item: The consumption or resource.
+
+        :rtype: dict[str,*]
+        """
+        # Consumptions and resources have __slots__, subclasses might have a __dict__ too.
+        names = set(NodeDiff._get_slot_names(item.__class__))
+        names.update(getattr(item, '__dict__', ()))
+
+        return {name: getattr(item, name) for name in sorted(names) if name != 'name' and hasattr(item, name)}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_slot_names(item_class):
+        """
+        Returns the names of the slots of a class of consumptions or resources, including the slots of its base classes.
+
+        :param type item_class: The class.
+
+        :rtype: tuple[str]
+        """
+        names = NodeDiff._slot_names.get(item_class)
+        if names is None:
+            names = []
+            for cls in item_class.__mro__:
+                slots = getattr(cls, '__slots__', ())
+                for name in ((slots,) if isinstance(slots, str) else slots):
+                    if not name.startswith('__') and name not in names:
+                        names.append(name)
+            names = tuple(names)
+            NodeDiff._slot_names[item_class] = names
+
+        return names
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _is_equal_item(old_item, new_item):
+        """
+        Returns True if two consumptions or resources have the same type and properties.
+
+        :param enarksh_lib.xml_generator.consumption.Consumption.Consumption|* old_item: The old item.
+        :param enarksh_lib.xml_generator.consumption.Consumption.Consumption|* new_item: The new item.
+
+        :rtype: bool
+        """
+        if old_item.__class__ is not new_item.__class__ or \
+                getattr(old_item, '__dict__', None) != getattr(new_item, '__dict__', None):
+            return False
+
+        for name in NodeDiff._get_slot_names(old_item.__class__):
+            if getattr(old_item, name, None) != getattr(new_item, name, None):
+                return False
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _is_equal(old_node, new_node):
+        """
+        Returns True if two nodes have the same properties, ports and dependencies, consumptions, and resources (but
+        not necessarily the same child nodes). Much cheaper than computing the differences between the nodes.
+
+        :param enarksh_lib.xml_generator.node.Node.Node old_node: The old node.
+        :param enarksh_lib.xml_generator.node.Node.Node new_node: The new node.
+
+        :rtype: bool
+        """
+        if old_node.__class__.generate_xml is not new_node.__class__.generate_xml or \
+                old_node.username != new_node.username:
+            return False
+
+        if isinstance(new_node, CommandJobNode) and (old_node.path != new_node.path or old_node.args != new_node.args):
+            return False
+
+        if not (NodeDiff._is_equal_ports(old_node.input_ports, new_node.input_ports) and
+                NodeDiff._is_equal_ports(old_node.output_ports, new_node.output_ports)):
+            return False
+
+        for old_items, new_items in ((old_node._consumptions, new_node._consumptions),
+                                     (old_node._resources, new_node._resources)):
+            if old_items or new_items:
+                old_items = old_items or ()
+                new_items = new_items or ()
+                if len(old_items) != len(new_items):
+                    return False
+                for old_item, new_item in zip(old_items, new_items):
+                    if not NodeDiff._is_equal_item(old_item, new_item):
+                        return False
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _is_equal_ports(old_ports, new_ports):
+        """
+        Returns True if two lists of ports have the same ports and dependencies in the same order.
+
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList old_ports: The old ports.
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList new_ports: The new ports.
+
+        :rtype: bool
+        """
+        if len(old_ports) != len(new_ports):
+            return False
+
+        for old_port, new_port in zip(old_ports, new_ports):
+            if old_port.port_name != new_port.port_name or len(old_port.predecessors) != len(new_port.predecessors):
+                return False
+
+            old_parent = old_port.node.parent
+            new_parent = new_port.node.parent
+            for old_predecessor, new_predecessor in zip(old_port.predecessors, new_port.predecessors):
+                if old_predecessor.port_name != new_predecessor.port_name:
+                    return False
+                if old_predecessor.node is old_parent or new_predecessor.node is new_parent:
+                    if old_predecessor.node is not old_parent or new_predecessor.node is not new_parent:
+                        return False
+                elif old_predecessor.node.name != new_predecessor.node.name:
+                    return False
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_properties(node):
+        """
+        Returns the properties of a node that are part of its XML, except ports, consumptions, resources, and child
+        nodes.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+
+        :rtype: dict[str,*]
+        """
+        properties = {'type':     NodeDiff._get_type(node),
+                      'username': node.username}
+
+        if isinstance(node, CommandJobNode):
+            properties['path'] = node.path
+            properties['args'] = [str(arg) for arg in node.args]
+
+        return properties
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_type(node):
+        """
+        Returns the type of a node, i.e. the name of the class that implements generate_xml() of the node.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+
+        :rtype: str
+        """
+        return node.__class__.generate_xml.__qualname__.rsplit('.', 1)[0]
+
+# ----------------------------------------------------------------------------------------------------------------------
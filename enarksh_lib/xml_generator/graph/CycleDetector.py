@@ -0,0 +1,177 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from enarksh_lib.xml_generator.port.InputPort import InputPort
+
+
+class CycleDetector:
+    """
+    Class for finding cycles in the dependencies between ports of (a part of) a node tree.
+
+    The graph has an edge from each port to each of its predecessors and, for nodes without child nodes, from each
+    output port to each input port of the node. The strongly connected components of this graph are found with an
+    iterative version of Tarjan's algorithm in O(V+E).
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        """
+        Object constructor.
+        """
+        self._ports = []
+        """
+        The ports of the graph.
+
+        :type: list[enarksh_lib.xml_generator.port.Port.Port]
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_node(self, node):
+        """
+        Adds all ports of a node and its descendants to this graph.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self._ports.extend(node.input_ports)
+            self._ports.extend(node.output_ports)
+            stack.extend(reversed(node._child_nodes or ()))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_scope(self, node):
+        """
+        Adds all ports of which the dependencies are defined within a node to this graph, i.e. the input ports of the
+        child nodes and the output ports of the node. Ports outside the scope are visited only when reachable from these
+        ports.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+        """
+        for child_node in node._child_nodes or ():
+            self._ports.extend(child_node.input_ports)
+        self._ports.extend(node.output_ports)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_dependencies(port):
+        """
+        Returns the ports on which a port depends directly.
+
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+
+        :rtype: list[enarksh_lib.xml_generator.port.Port.Port]
+        """
+        if isinstance(port, InputPort) or port.node._child_nodes:
+            return list(port.predecessors)
+
+        return list(port.predecessors) + list(port.node.input_ports)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_port_label(port):
+        """
+        Returns a readable label of a port.
+
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+
+        :rtype: str
+        """
+        direction = 'input' if isinstance(port, InputPort) else 'output'
+
+        return "{0} {1} port '{2}'".format(port.node.get_path(), direction, port.port_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def find_components(self):
+        """
+        Returns the strongly connected components that contain a cycle, i.e. all components with more than one port and
+        all ports that depend on themselves.
+
+        :rtype: list[list[enarksh_lib.xml_generator.port.Port.Port]]
+        """
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+
+        for root in self._ports:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._get_dependencies(root)))]
+            while work:
+                port, dependencies = work[-1]
+                for dependency in dependencies:
+                    if dependency not in index:
+                        index[dependency] = lowlink[dependency] = len(index)
+                        stack.append(dependency)
+                        on_stack.add(dependency)
+                        work.append((dependency, iter(self._get_dependencies(dependency))))
+                        break
+                    if dependency in on_stack and index[dependency] < lowlink[port]:
+                        lowlink[port] = index[dependency]
+                else:
+                    work.pop()
+                    if work and lowlink[port] < lowlink[work[-1][0]]:
+                        lowlink[work[-1][0]] = lowlink[port]
+
+                    if lowlink[port] == index[port]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member is port:
+                                break
+
+                        if len(component) > 1 or port in self._get_dependencies(port):
+                            components.append(component)
+
+        return components
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def find_cycles(self):
+        """
+        Returns a cycle for each strongly connected component with a cycle. Each cycle is a list of port labels where
+        each port depends on the next port and the last port depends on the first port.
+
+        :rtype: list[list[str]]
+        """
+        cycles = []
+        for component in self.find_components():
+            members = set(component)
+            start = component[-1]
+
+            # Breadth first search within the component for the shortest path back to the start port.
+            parents = {}
+            queue = [start]
+            i = 0
+            while i < len(queue) and start not in parents:
+                port = queue[i]
+                i += 1
+                for dependency in self._get_dependencies(port):
+                    if dependency in members and dependency not in parents:
+                        parents[dependency] = port
+                        queue.append(dependency)
+
+            path = [start]
+            port = parents[start]
+            while port is not start:
+                path.append(port)
+                port = parents[port]
+            path.reverse()
+            path.insert(0, path.pop())
+
+            cycles.append([self.get_port_label(port) for port in path])
+
+        return cycles
+
+# ----------------------------------------------------------------------------------------------------------------------
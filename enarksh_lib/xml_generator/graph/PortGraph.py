@@ -0,0 +1,431 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from collections import OrderedDict
+
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
+from enarksh_lib.xml_generator.port.InputPort import InputPort
+
+
+class PortGraph:
+    """
+    Class for removing redundant dependencies between ports of (a part of) a node tree in a single pass.
+
+    A dependency of a port is redundant if it is an implicit dependency via another dependency of the same port. Port
+    A depends implicitly on port B if there is a path from A to B where each step goes:
+    - from an output port of a command job to the input port 'all' of the command job, or
+    - from the input port 'all' of a command job to one of its predecessors.
+    This is exactly the relation the reference implementation (Port.purge()) uses, unless a node class overrides
+    Node.get_implicit_dependencies_input_ports() or Node.get_implicit_dependencies_output_ports(). The scopes that
+    contain nodes of such a class are purged port by port with the reference implementation.
+
+    Since all steps stay within the child nodes of a single compound node (the scope), the ports are grouped by scope
+    and each scope is reduced independently: its ports are numbered, put in topological order and the implicit
+    dependencies are computed once with Python ints as bitsets.
+    """
+
+    BATCH_SIZE = 10000
+    """
+    The minimum number of vertices of the scopes sent to an executor at once.
+
+    :type: int
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        """
+        Object constructor.
+        """
+        self._scopes = OrderedDict()
+        """
+        The ports that must be purged grouped by scope.
+
+        :type: collections.OrderedDict[enarksh_lib.xml_generator.node.Node.Node,list[enarksh_lib.xml_generator.port.Port.Port]]
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_node(self, node):
+        """
+        Adds all ports of a node and its descendants to this graph, in the same order as Node.purge() visits them.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+        """
+        stack = [(node, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                for port in node.output_ports:
+                    self.add_port(port)
+            else:
+                for port in node.input_ports:
+                    self.add_port(port)
+
+                stack.append((node, True))
+                for child_node in reversed(node._child_nodes or ()):
+                    stack.append((child_node, False))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_port(self, port):
+        """
+        Adds a port that must be purged to this graph.
+
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+        """
+        if not port.predecessors:
+            # Nothing to purge.
+            return
+
+        scope = port.get_scope()
+        ports = self._scopes.get(scope)
+        if ports is None:
+            ports = []
+            self._scopes[scope] = ports
+        ports.append(port)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_scope(self, node):
+        """
+        Adds all ports of which the dependencies are defined within a node to this graph, i.e. the input ports of the
+        child nodes and the output ports of the node.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+        """
+        for child_node in node._child_nodes or ():
+            for port in child_node.input_ports:
+                self.add_port(port)
+
+        for port in node.output_ports:
+            self.add_port(port)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_implicit_dependencies(port):
+        """
+        Returns the ports on which a port depends implicitly (in one step).
+
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+
+        :rtype: list[enarksh_lib.xml_generator.port.Port.Port]
+        """
+        name = port.node.get_implicit_input_port_name()
+        if name is None:
+            return []
+
+        if isinstance(port, InputPort):
+            if port.port_name == name:
+                return list(port.predecessors)
+
+            return []
+
+        return [port.node.get_input_port(name)]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _has_implicit_dependencies_hooks(scope, ports):
+        """
+        Returns True if a node in a scope overrides the methods for finding implicit dependencies, see
+        Node._get_implicit_dependencies_hooks().
+
+        :param enarksh_lib.xml_generator.node.Node.Node|None scope: The scope.
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The ports of the scope that must be purged.
+
+        :rtype: bool
+        """
+        if scope is None:
+            nodes = [port.node for port in ports]
+            nodes.extend(predecessor.node for port in ports for predecessor in port.predecessors)
+        else:
+            nodes = [scope]
+            nodes.extend(scope._child_nodes or ())
+
+        return any(any(cls._get_implicit_dependencies_hooks()) for cls in set(map(type, nodes)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def build_scope(ports):
+        """
+        Builds the integer form of the graph of a scope.
+
+        Returns a tuple with:
+        - the vertices, i.e. the ports of the scope,
+        - for each vertex the indexes of the vertices on which the vertex depends implicitly (in one step),
+        - the targets, i.e. the ports that must be purged,
+        - for each target the indexes of its predecessors.
+        Targets that can not have redundant dependencies are omitted.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The ports of the scope that must be purged.
+
+        :rtype: (list[enarksh_lib.xml_generator.port.Port.Port],list[list[int]],list[enarksh_lib.xml_generator.port.Port.Port],list[list[int]])
+        """
+        vertices = []
+        successors = []
+        index = {}
+        targets = []
+        predecessors = []
+        implicit = {}
+
+        for port in ports:
+            candidate = False
+            for predecessor in port.predecessors:
+                if isinstance(predecessor, InputPort):
+                    continue
+
+                # The predecessors of many ports are output ports of the same nodes.
+                node = predecessor.node
+                has_implicit = implicit.get(node)
+                if has_implicit is None:
+                    name = node.get_implicit_input_port_name()
+                    if name is not None:
+                        # Like the reference implementation we ensure the implicit input port exists.
+                        node.get_input_port(name)
+                    has_implicit = name is not None
+                    implicit[node] = has_implicit
+                if has_implicit:
+                    candidate = True
+
+            if candidate and len(port.predecessors) > 1:
+                numbers = []
+                for predecessor in port.predecessors:
+                    number = index.get(predecessor)
+                    if number is None:
+                        number = len(vertices)
+                        index[predecessor] = number
+                        vertices.append(predecessor)
+                    numbers.append(number)
+                targets.append(port)
+                predecessors.append(numbers)
+
+        # Number all ports reachable from the predecessors of the targets.
+        i = 0
+        while i < len(vertices):
+            numbers = []
+            for dependency in PortGraph._get_implicit_dependencies(vertices[i]):
+                number = index.get(dependency)
+                if number is None:
+                    number = len(vertices)
+                    index[dependency] = number
+                    vertices.append(dependency)
+                numbers.append(number)
+            successors.append(numbers)
+            i += 1
+
+        return vertices, successors, targets, predecessors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def reduce(successors, predecessors):
+        """
+        Computes the direct (i.e. not redundant) predecessors of the targets of a scope.
+
+        Returns for each target the indexes of the predecessors that must be kept in their original order.
+
+        :param list[list[int]] successors:   For each vertex the indexes of the vertices on which the vertex depends
+                                             implicitly (in one step).
+        :param list[list[int]] predecessors: For each target the indexes of its predecessors.
+
+        :rtype: list[list[int]]
+        """
+        size = len(successors)
+
+        # Only predecessors of targets get a bit position.
+        position = [-1] * size
+        consumers = {}
+        pending = []
+        count = 0
+        for target, numbers in enumerate(predecessors):
+            for number in numbers:
+                if position[number] == -1:
+                    position[number] = count
+                    count += 1
+                consumers.setdefault(number, []).append(target)
+            pending.append(len(numbers))
+
+        # The number of vertices that still need the reach of a vertex.
+        remaining = [0] * size
+        for numbers in successors:
+            for number in numbers:
+                remaining[number] += 1
+
+        reach = [0] * size
+        state = [0] * size  # 0: not visited, 1: on stack, 2: done.
+        accumulators = {}
+        kept = [None] * len(predecessors)
+
+        for root in range(size):
+            if state[root]:
+                continue
+
+            state[root] = 1
+            stack = [(root, iter(successors[root]))]
+            while stack:
+                vertex, it = stack[-1]
+                for number in it:
+                    if state[number] == 0:
+                        state[number] = 1
+                        stack.append((number, iter(successors[number])))
+                        break
+                else:
+                    # All dependencies of the vertex are done, i.e. we visit the vertices in topological order.
+                    stack.pop()
+                    state[vertex] = 2
+
+                    bits = 0
+                    for number in successors[vertex]:
+                        if state[number] == 2:
+                            bits |= reach[number]
+                            if position[number] != -1:
+                                bits |= 1 << position[number]
+                        remaining[number] -= 1
+                        if remaining[number] == 0:
+                            reach[number] = 0
+
+                    for target in consumers.get(vertex, ()):
+                        accumulator = accumulators.get(target, 0) | bits
+                        pending[target] -= 1
+                        if pending[target]:
+                            accumulators[target] = accumulator
+                        else:
+                            accumulators.pop(target, None)
+                            kept[target] = PortGraph._filter(predecessors[target], position, accumulator)
+
+                    if remaining[vertex]:
+                        reach[vertex] = bits
+
+        return kept
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def reduce_scopes(scopes):
+        """
+        Computes the direct predecessors of the targets of scopes, see reduce(). Runs in a worker of the executor of
+        purge().
+
+        :param list[(list[list[int]],list[list[int]])] scopes: The successors and predecessors of each scope.
+
+        :rtype: list[list[list[int]]]
+        """
+        return [PortGraph.reduce(successors, predecessors) for successors, predecessors in scopes]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _filter(numbers, position, bits):
+        """
+        Returns the vertices of which the bit is not set in a bitset.
+
+        :param list[int] numbers:  The vertices.
+        :param list[int] position: The bit position of each vertex.
+        :param int       bits:     The bitset.
+
+        :rtype: list[int]
+        """
+        if not bits:
+            return numbers
+
+        if len(numbers) < 32:
+            # Shifting costs O(size of the bitset) per vertex.
+            return [number for number in numbers if not (bits >> position[number]) & 1]
+
+        # Converting to a string costs O(size of the bitset) once.
+        bits = bin(bits)
+        length = len(bits) - 2
+
+        return [number for number in numbers if position[number] >= length or bits[-1 - position[number]] == '0']
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def purge(self, executor=None):
+        """
+        Removes all redundant dependencies of the ports added to this graph.
+
+        With an executor (e.g. a concurrent.futures.ProcessPoolExecutor) the scopes are reduced in parallel. All scopes
+        are built first and sent to the executor in their integer form in batches of about BATCH_SIZE vertices. Since
+        the reduction of a scope depends only on the ports of the scope, the result is the same as without an
+        executor.
+
+        :param concurrent.futures.Executor|None executor: The executor for reducing the scopes.
+        """
+        if executor is None:
+            for scope, ports in self._scopes.items():
+                if self._has_implicit_dependencies_hooks(scope, ports):
+                    self._purge_reference(ports)
+                    continue
+
+                vertices, successors, targets, predecessors = self.build_scope(ports)
+                kept = self.reduce(successors, predecessors)
+                for port, numbers in zip(targets, kept):
+                    self._apply(port, [vertices[number] for number in numbers])
+        else:
+            self._purge_parallel(executor)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _purge_parallel(self, executor):
+        """
+        Removes all redundant dependencies of the ports added to this graph using an executor, see purge().
+
+        :param concurrent.futures.Executor executor: The executor for reducing the scopes.
+        """
+        scopes = []
+        batches = []
+        batch = []
+        size = 0
+        for scope, ports in self._scopes.items():
+            if self._has_implicit_dependencies_hooks(scope, ports):
+                self._purge_reference(ports)
+                continue
+
+            vertices, successors, targets, predecessors = self.build_scope(ports)
+            if not targets:
+                continue
+
+            scopes.append((vertices, targets))
+            batch.append((successors, predecessors))
+            size += len(vertices)
+            if size >= self.BATCH_SIZE:
+                batches.append(batch)
+                batch = []
+                size = 0
+        if batch:
+            batches.append(batch)
+
+        futures = [executor.submit(PortGraph.reduce_scopes, batch) for batch in batches]
+
+        scopes = iter(scopes)
+        for future in futures:
+            for kept, (vertices, targets) in zip(future.result(), scopes):
+                for port, numbers in zip(targets, kept):
+                    self._apply(port, [vertices[number] for number in numbers])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _purge_reference(ports):
+        """
+        Removes the redundant dependencies of the ports of a scope port by port with the reference implementation.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The ports of the scope that must be purged.
+        """
+        for port in ports:
+            port.purge()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _apply(port, kept):
+        """
+        Removes all predecessors of a port that are not kept.
+
+        :param enarksh_lib.xml_generator.port.Port.Port       port: The port.
+        :param list[enarksh_lib.xml_generator.port.Port.Port] kept: The predecessors that must be kept.
+        """
+        if len(kept) < len(port.predecessors):
+            instrumentation = Instrumentation.active
+            if instrumentation is not None:
+                instrumentation.count('purged_dependency', len(port.predecessors) - len(kept))
+
+            keep = set(kept)
+            for predecessor in list(port.predecessors):
+                if predecessor not in keep:
+                    port.remove_dependency(predecessor)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,191 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import time
+from collections import OrderedDict
+
+
+class Instrumentation:
+    """
+    Collects timings of the steps of building, finalizing, and generating the XML of node trees and counters of
+    dependencies.
+
+    Instrumentation is off by default. While an instrumentation is active (see start() and stop(), or use the
+    instrumentation as a context manager) the following is recorded:
+    - the time of each step of CompoundJobNode.create_node() per node: create_start, create_resources,
+      create_child_nodes, create_input_ports, create_output_ports, create_dependencies, and create_finish,
+    - the time of the phases of Node.finalize() per node: ensure_dependencies, find_cycles, and purge,
+    - the time of generating the XML of a schedule: generate_xml (building the XML tree, or writing the XML with the
+      string backend or write_xml()) and serialize (converting the XML tree to text, ElementTree backend only),
+    - the counters add_dependency (calls of Port.add_dependency()), duplicate_dependency (dependencies that were
+      present already and are ignored), and purged_dependency (dependencies removed by purging).
+
+    Times are inclusive, e.g. the time of create_child_nodes of a node includes the time of create_node() of its child
+    nodes.
+    """
+
+    active = None
+    """
+    The active instrumentation, or None if instrumentation is off.
+
+    :type: Instrumentation|None
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, callback=None):
+        """
+        Object constructor.
+
+        :param callable|None callback: If not None, a function that is called with the name of a step, the node (or
+                                       None), and the elapsed time in seconds each time a step has been timed, and with
+                                       the name of a counter, None, and the value of the counter for each counter when
+                                       this instrumentation is stopped.
+        """
+        self.callback = callback
+        """
+        The function that is called for each timing and each counter.
+
+        :type: callable|None
+        """
+
+        self._timings = OrderedDict()
+        """
+        The number of times and the total elapsed time of each step per node.
+
+        :type: collections.OrderedDict[(str,enarksh_lib.xml_generator.node.Node.Node|None),list[int|float]]
+        """
+
+        self.counters = OrderedDict((('add_dependency', 0), ('duplicate_dependency', 0), ('purged_dependency', 0)))
+        """
+        The counters.
+
+        :type: collections.OrderedDict[str,int]
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __enter__(self):
+        """
+        Starts this instrumentation.
+
+        :rtype: Instrumentation
+        """
+        self.start()
+
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Stops this instrumentation.
+        """
+        self.stop()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_time(self, step, node, start):
+        """
+        Records the elapsed time of a step and returns the current time.
+
+        :param str step:                                         The name of the step.
+        :param enarksh_lib.xml_generator.node.Node.Node|None node: The node.
+        :param float start:                                      The start time of the step, see time.perf_counter().
+
+        :rtype: float
+        """
+        now = time.perf_counter()
+        elapsed = now - start
+
+        key = (step, node)
+        timing = self._timings.get(key)
+        if timing is None:
+            self._timings[key] = [1, elapsed]
+        else:
+            timing[0] += 1
+            timing[1] += elapsed
+
+        if self.callback is not None:
+            self.callback(step, node, elapsed)
+
+        return now
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def call(self, step, node, function):
+        """
+        Calls a function and records its elapsed time as a step.
+
+        :param str step:                                         The name of the step.
+        :param enarksh_lib.xml_generator.node.Node.Node|None node: The node.
+        :param callable function:                                The function.
+        """
+        start = time.perf_counter()
+        try:
+            function()
+        finally:
+            self.add_time(step, node, start)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def count(self, counter, value=1):
+        """
+        Increments a counter.
+
+        :param str counter: The name of the counter.
+        :param int value:   The increment.
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_report(self):
+        """
+        Returns the timings and counters recorded by this instrumentation. The timings are a list of dictionaries with
+        the step, the path of the node (at the time of the report), the number of times, and the total elapsed time.
+
+        :rtype: dict
+        """
+        timings = []
+        for (step, node), (count, elapsed) in self._timings.items():
+            timings.append({'step': step,
+                            'path': node.get_path() if node is not None else None,
+                            'count': count,
+                            'seconds': elapsed})
+
+        return {'timings': timings, 'counters': dict(self.counters)}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_totals(self):
+        """
+        Returns the total elapsed time of each step over all nodes.
+
+        :rtype: dict[str,float]
+        """
+        totals = OrderedDict()
+        for (step, _), (_, elapsed) in self._timings.items():
+            totals[step] = totals.get(step, 0.0) + elapsed
+
+        return totals
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Starts this instrumentation. At most one instrumentation is active at the same time.
+        """
+        if Instrumentation.active is not None and Instrumentation.active is not self:
+            raise ValueError('Another instrumentation is active')
+
+        Instrumentation.active = self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Stops this instrumentation and calls the callback for each counter.
+        """
+        if Instrumentation.active is self:
+            Instrumentation.active = None
+
+            if self.callback is not None:
+                for counter, value in self.counters.items():
+                    self.callback(counter, None, value)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,292 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gc
+import heapq
+import sys
+import tracemalloc
+from collections import OrderedDict
+
+
+class MemoryProfile:
+    """
+    Profiles the memory used by building, finalizing, and generating the XML of a schedule.
+
+    The memory is measured with tracemalloc:
+    - per phase (build, finalize, and get_xml) the memory retained after the phase and the peak during the phase,
+    - the steady-state size of the node tree, i.e. the memory retained after finalize(),
+    - the peak during serialization above the steady-state size of the node tree,
+    - the source lines that allocated the most memory retained by the node tree.
+
+    The attribution to classes (node classes, port classes, consumption classes, and resource classes) and to the
+    heaviest subtrees is a shallow estimate with sys.getsizeof() obtained by walking the node tree, not a measurement
+    with tracemalloc. The size of an object includes the size of the containers it owns (e.g. the predecessors of a
+    port), but not the size of strings (names are shared by many objects), of the values of attributes, and of
+    allocator overhead. Hence, the estimate does not add up to the steady-state size of the node tree.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, top=10, frames=1):
+        """
+        Object constructor.
+
+        :param int top:    The number of subtrees and source lines reported.
+        :param int frames: The number of frames stored by tracemalloc per allocation.
+        """
+        self.top = top
+        """
+        The number of subtrees and source lines reported.
+
+        :type: int
+        """
+
+        self.frames = frames
+        """
+        The number of frames stored by tracemalloc per allocation.
+
+        :type: int
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _add(sizes, key, size):
+        """
+        Adds an object to the number of objects and size per key.
+
+        :param dict[str,list[int]] sizes: The number of objects and size per key.
+        :param str                 key:   The key.
+        :param int                 size:  The size of the object.
+        """
+        entry = sizes.get(key)
+        if entry is None:
+            sizes[key] = [1, size]
+        else:
+            entry[0] += 1
+            entry[1] += size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_list_size(named_list):
+        """
+        Returns the size of a named list including its index.
+
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList|list|None named_list: The list.
+
+        :rtype: int
+        """
+        if named_list is None:
+            return 0
+
+        size = sys.getsizeof(named_list)
+        index = getattr(named_list, '_index', None)
+        if index is not None:
+            size += sys.getsizeof(index)
+
+        return size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_attribution(root, top=10):
+        """
+        Returns a shallow estimate (with sys.getsizeof()) of the memory retained by a node tree per class and the
+        heaviest subtrees.
+
+        The classes are a dictionary from class name to the number of objects and their total size. The subtrees are a
+        list of dictionaries with the path of the root of the subtree, the number of nodes, and the total size of the
+        subtree, in descending order of size. Only nodes with child nodes are reported as subtrees. The child nodes of
+        deferred compound nodes are not created.
+
+        :param enarksh_lib.xml_generator.node.Node.Node root: The root of the node tree.
+        :param int                                     top:  The number of subtrees.
+
+        :rtype: (dict[str,dict[str,int]],list[dict])
+        """
+        classes = {}
+        subtrees = {}
+
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            child_nodes = node._child_nodes or ()
+            if visited:
+                nodes = 1
+                total = subtrees[node][1]
+                for child_node in child_nodes:
+                    nodes += subtrees[child_node][0]
+                    total += subtrees[child_node][1]
+                subtrees[node] = (nodes, total)
+                continue
+
+            size = sys.getsizeof(node)
+            if hasattr(node, '__dict__'):
+                size += sys.getsizeof(node.__dict__)
+            size += MemoryProfile._get_list_size(node._child_nodes)
+            size += MemoryProfile._get_list_size(node.input_ports)
+            size += MemoryProfile._get_list_size(node.output_ports)
+            size += MemoryProfile._get_list_size(node._consumptions)
+            size += MemoryProfile._get_list_size(node._resources)
+            size += MemoryProfile._get_list_size(getattr(node, 'args', None))
+            MemoryProfile._add(classes, node.__class__.__name__, size)
+            total = size
+
+            for port in node.input_ports + node.output_ports:
+                size = sys.getsizeof(port) + sys.getsizeof(port.predecessors) + sys.getsizeof(port.successors)
+                MemoryProfile._add(classes, port.__class__.__name__, size)
+                total += size
+
+            for item in (node._consumptions or []) + (node._resources or []):
+                size = sys.getsizeof(item)
+                MemoryProfile._add(classes, item.__class__.__name__, size)
+                total += size
+
+            subtrees[node] = (1, total)
+            stack.append((node, True))
+            for child_node in child_nodes:
+                stack.append((child_node, False))
+
+        heaviest = heapq.nlargest(top,
+                                  (node for node in subtrees if node._child_nodes),
+                                  key=lambda node: subtrees[node][1])
+
+        classes = OrderedDict((name, {'count': count, 'bytes': size})
+                              for name, (count, size) in sorted(classes.items(), key=lambda item: -item[1][1]))
+        subtrees = [{'path': node.get_path(), 'nodes': subtrees[node][0], 'bytes': subtrees[node][1]}
+                    for node in heaviest]
+
+        return classes, subtrees
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _measure(phase, function, phases):
+        """
+        Runs a phase and records the memory retained after the phase and the peak during the phase (both relative to
+        the memory in use before the phase). Returns the result of the phase.
+
+        Before Python 3.9 the peak cannot be reset, hence the peak of a phase is the peak since tracing started.
+
+        :param str                      phase:    The name of the phase.
+        :param callable                 function: The phase.
+        :param dict[str,dict[str,int]] phases:   The measurements per phase.
+
+        :rtype: *
+        """
+        before = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+        phases[phase] = {'retained': current - before, 'peak': peak - before}
+
+        return result
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def profile(self, schedule, encoding='utf-8', pretty=True, backend='etree'):
+        """
+        Builds (if required), finalizes, and generates the XML of a schedule and returns the memory profile.
+
+        The schedule is either a callable that builds and returns the schedule (e.g. creates a schedule and calls its
+        create_node(), or loads a schedule with XmlLoader) or a schedule that has been built already. The memory of a
+        schedule that has been built already has been allocated before profiling, hence the build phase is omitted, the
+        steady-state size of the node tree is None, and the source lines cover finalize() only.
+
+        The profile is a dictionary with:
+        - phases:    per phase the memory retained after the phase and the peak during the phase,
+        - tree:      the memory retained by the node tree after finalize(),
+        - xml_peak:  the peak during get_xml() above the memory retained by the node tree,
+        - xml_size:  the size of the generated XML,
+        - lines:     the source lines that allocated the most memory retained by the node tree,
+        - classes:   the estimated memory retained by the node tree per class, see get_attribution(),
+        - subtrees:  the estimated memory of the heaviest subtrees, see get_attribution().
+
+        :param enarksh_lib.xml_generator.node.ScheduleNode.ScheduleNode|callable schedule: The schedule or a callable
+                                                                                           that returns the schedule.
+        :param str encoding: The encoding of the XML.
+        :param bool pretty:  If True, the XML is pretty printed.
+        :param str backend:  The serialization backend, see ScheduleNode.get_xml().
+
+        :rtype: dict
+        """
+        phases = OrderedDict()
+
+        gc.collect()
+        started = tracemalloc.is_tracing()
+        if not started:
+            tracemalloc.start(self.frames)
+        try:
+            start = tracemalloc.take_snapshot()
+            if callable(schedule):
+                schedule = self._measure('build', schedule, phases)
+            self._measure('finalize', schedule.finalize, phases)
+            gc.collect()
+            snapshot = tracemalloc.take_snapshot()
+            xml = self._measure('get_xml', lambda: schedule.get_xml(encoding, pretty, backend), phases)
+        finally:
+            if not started:
+                tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        statistics = snapshot.filter_traces(filters).compare_to(start.filter_traces(filters), 'lineno')
+        lines = [{'line': str(statistic.traceback[0]), 'bytes': statistic.size_diff, 'count': statistic.count_diff}
+                 for statistic in statistics[:self.top]]
+
+        classes, subtrees = self.get_attribution(schedule, self.top)
+
+        if 'build' in phases:
+            tree = phases['build']['retained'] + phases['finalize']['retained']
+        else:
+            tree = None
+
+        return {'phases': phases,
+                'tree': tree,
+                'xml_peak': phases['get_xml']['peak'],
+                'xml_size': len(xml),
+                'lines': lines,
+                'classes': classes,
+                'subtrees': subtrees}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def format(profile):
+        """
+        Returns a memory profile in human readable format.
+
+        :param dict profile: The memory profile, see profile().
+
+        :rtype: str
+        """
+        lines = []
+
+        def mib(size):
+            return '{0:10.2f} MiB'.format(size / 2 ** 20)
+
+        lines.append('Phases:')
+        for phase, measurement in profile['phases'].items():
+            lines.append('  {0:20} retained {1}  peak {2}'.format(phase,
+                                                                  mib(measurement['retained']),
+                                                                  mib(measurement['peak'])))
+        if profile['tree'] is None:
+            lines.append('Node tree (steady state):     n/a (built before profiling)')
+        else:
+            lines.append('Node tree (steady state): {0}'.format(mib(profile['tree'])))
+        lines.append('Serialization peak:       {0} (XML {1})'.format(mib(profile['xml_peak']),
+                                                                       mib(profile['xml_size'])))
+
+        lines.append('Classes (shallow estimate with sys.getsizeof()):')
+        for name, entry in profile['classes'].items():
+            lines.append('  {0:30} {1:10d} objects {2}'.format(name, entry['count'], mib(entry['bytes'])))
+
+        lines.append('Subtrees (shallow estimate with sys.getsizeof()):')
+        for subtree in profile['subtrees']:
+            lines.append('  {0:50} {1:10d} nodes {2}'.format(subtree['path'], subtree['nodes'], mib(subtree['bytes'])))
+
+        lines.append('Source lines:')
+        for line in profile['lines']:
+            lines.append('  {0:70} {1}'.format(line['line'], mib(line['bytes'])))
+
+        return '\n'.join(lines)
+
+# ----------------------------------------------------------------------------------------------------------------------
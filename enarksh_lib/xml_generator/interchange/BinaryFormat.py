@@ -0,0 +1,152 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import array
+import struct
+import sys
+
+from enarksh_lib.xml_generator.interchange.ScheduleTable import ScheduleTable
+
+
+class BinaryFormat:
+    """
+    Reader and writer of node trees in a packed binary format.
+
+    The format consists of the magic number, the number of symbols, the lengths of the UTF-8 encoded symbols, the
+    symbols, and the tables of integers of a ScheduleTable (nodes, args, ports, dependencies, and items). Each table is
+    stored as the number of integers followed by the integers. All integers are 32 bit little endian integers.
+    """
+
+    MAGIC = b'ENKS\x00\x01'
+    """
+    The magic number (including the version) at the start of the binary format.
+
+    :type: bytes
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def dumps(node):
+        """
+        Returns a (finalized) node tree in the binary format.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The root of the node tree.
+
+        :rtype: bytes
+        """
+        table = ScheduleTable.from_node(node)
+        symbols = [symbol.encode('utf-8') for symbol in table.symbols]
+
+        parts = [BinaryFormat.MAGIC,
+                 BinaryFormat._pack_integers([len(symbol) for symbol in symbols], 'I'),
+                 b''.join(symbols)]
+        for integers in (table.nodes, table.args, table.ports, table.dependencies, table.items):
+            parts.append(BinaryFormat._pack_integers(integers, 'i'))
+
+        return b''.join(parts)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def loads(data):
+        """
+        Returns the node tree in the binary format.
+
+        :param bytes data: The data in the binary format.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        if not data.startswith(BinaryFormat.MAGIC):
+            raise ValueError('The data does not contain a node tree in the binary format')
+
+        data = memoryview(data)
+        offset = len(BinaryFormat.MAGIC)
+
+        lengths, offset = BinaryFormat._unpack_integers(data, offset, 'I')
+        symbols = []
+        for length in lengths:
+            symbols.append(str(data[offset:offset + length], 'utf-8'))
+            offset += length
+
+        tables = []
+        for _ in range(5):
+            integers, offset = BinaryFormat._unpack_integers(data, offset, 'i')
+            tables.append(integers)
+
+        if offset != len(data):
+            raise ValueError('Unexpected data at the end of the binary format')
+
+        return ScheduleTable(symbols, *tables).to_node()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _pack_integers(integers, type_code):
+        """
+        Returns a list of integers packed as the number of integers followed by the integers.
+
+        :param list[int] integers: The integers.
+        :param str type_code:      The type code of the array: 'i' or 'I'.
+
+        :rtype: bytes
+        """
+        values = array.array(type_code, integers)
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        return struct.pack('<I', len(values)) + values.tobytes()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def read(file_obj):
+        """
+        Reads a node tree from a binary stream.
+
+        :param file_obj: The binary stream.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        return BinaryFormat.loads(file_obj.read())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _unpack_integers(data, offset, type_code):
+        """
+        Returns a list of integers packed by _pack_integers() and the offset after the integers.
+
+        :param memoryview data: The packed data.
+        :param int offset:      The offset of the packed integers.
+        :param str type_code:   The type code of the array: 'i' or 'I'.
+
+        :rtype: (array.array,int)
+        """
+        if offset + 4 > len(data):
+            raise ValueError('Unexpected end of the binary format')
+        count = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+
+        values = array.array(type_code)
+        size = count * values.itemsize
+        if offset + size > len(data):
+            raise ValueError('Unexpected end of the binary format')
+
+        values.frombytes(data[offset:offset + size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        return values, offset + size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def write(node, file_obj):
+        """
+        Writes a (finalized) node tree to a binary stream.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The root of the node tree.
+        :param file_obj:                                      The binary stream.
+        """
+        file_obj.write(BinaryFormat.dumps(node))
+
+# ----------------------------------------------------------------------------------------------------------------------
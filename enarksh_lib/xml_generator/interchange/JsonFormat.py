@@ -0,0 +1,103 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import json
+
+from enarksh_lib.xml_generator.interchange.ScheduleTable import ScheduleTable
+
+
+class JsonFormat:
+    """
+    Reader and writer of node trees in JSON, i.e. the tables of a ScheduleTable in a JSON object.
+    """
+
+    FORMAT = 'enarksh-schedule'
+    """
+    The name of the format in the JSON object.
+
+    :type: str
+    """
+
+    VERSION = 1
+    """
+    The version of the format.
+
+    :type: int
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def dumps(node):
+        """
+        Returns a (finalized) node tree in JSON.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The root of the node tree.
+
+        :rtype: bytes
+        """
+        table = ScheduleTable.from_node(node)
+        document = {'format':       JsonFormat.FORMAT,
+                    'version':      JsonFormat.VERSION,
+                    'symbols':      table.symbols,
+                    'nodes':        table.nodes,
+                    'args':         table.args,
+                    'ports':        table.ports,
+                    'dependencies': table.dependencies,
+                    'items':        table.items}
+
+        return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def loads(data):
+        """
+        Returns the node tree in JSON.
+
+        :param bytes|str data: The JSON.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+
+        document = json.loads(data)
+        if document.get('format') != JsonFormat.FORMAT or document.get('version') != JsonFormat.VERSION:
+            raise ValueError('The JSON does not contain a node tree of version {0}'.format(JsonFormat.VERSION))
+
+        table = ScheduleTable(document['symbols'],
+                              document['nodes'],
+                              document['args'],
+                              document['ports'],
+                              document['dependencies'],
+                              document['items'])
+
+        return table.to_node()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def read(file_obj):
+        """
+        Reads a node tree from a binary stream.
+
+        :param file_obj: The binary stream.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        return JsonFormat.loads(file_obj.read())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def write(node, file_obj):
+        """
+        Writes a (finalized) node tree to a binary stream.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The root of the node tree.
+        :param file_obj:                                      The binary stream.
+        """
+        file_obj.write(JsonFormat.dumps(node))
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,402 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gc
+from xml.etree import ElementTree
+
+from enarksh_lib.xml_generator.consumption.Consumption import Consumption
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.consumption.ReadWriteLockConsumption import ReadWriteLockConsumption
+from enarksh_lib.xml_generator.loader.LoadedCompoundJobNode import LoadedCompoundJobNode
+from enarksh_lib.xml_generator.loader.LoadedScheduleNode import LoadedScheduleNode
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.node.ManualTriggerNode import ManualTriggerNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+from enarksh_lib.xml_generator.node.TerminatorNode import TerminatorNode
+from enarksh_lib.xml_generator.port.InputPort import InputPort
+from enarksh_lib.xml_generator.port.OutputPort import OutputPort
+from enarksh_lib.xml_generator.resource.CountingResource import CountingResource
+from enarksh_lib.xml_generator.resource.ReadWriteLockResource import ReadWriteLockResource
+
+
+class ScheduleTable:
+    """
+    A (finalized) node tree in tables of integers, the basis of the interchange formats of node trees.
+
+    All strings are stored once in a symbol table and referred to by index. Nodes are stored in preorder and refer to
+    their parent node by index. Ports are stored in the order of the nodes (first the input ports then the output ports
+    of each node) and dependencies refer to ports by index.
+    """
+
+    NODE_TYPES = (ScheduleNode, CompoundJobNode, CommandJobNode, ManualTriggerNode, TerminatorNode)
+    """
+    The types of nodes, the index is the type code of a node.
+
+    :type: tuple[type]
+    """
+
+    NODE_CLASSES = (LoadedScheduleNode, LoadedCompoundJobNode, CommandJobNode, ManualTriggerNode, TerminatorNode)
+    """
+    The classes of the loaded nodes per type code.
+
+    :type: tuple[type]
+    """
+
+    NODE_TAGS = ('Schedule', 'CompoundJob', 'CommandJob', 'ManualTrigger', 'Terminator')
+    """
+    The tags of the XML elements of the nodes per type code.
+
+    :type: tuple[str]
+    """
+
+    NODE_FIELDS = 8
+    """
+    The number of integers per node: type code, index of the parent node (-1 for the root), name, username, number of
+    input ports, number of output ports, path (-1 for nodes without path), and number of arguments.
+
+    :type: int
+    """
+
+    ITEM_TYPES = (CountingConsumption, ReadWriteLockConsumption, CountingResource, ReadWriteLockResource)
+    """
+    The types of consumptions and resources, the index is the type code of a consumption or resource.
+
+    :type: tuple[type]
+    """
+
+    ITEM_FIELDS = 5
+    """
+    The number of integers per consumption or resource: index of the node, type code, name, amount or mode (-1 for
+    read write lock resources), and the type code of the amount (see AMOUNT_TYPES, 0 for modes).
+
+    :type: int
+    """
+
+    AMOUNT_TYPES = (str, int, bool, float)
+    """
+    The types of the amounts of counting consumptions and resources, the index is the type code of an amount.
+
+    :type: tuple[type]
+    """
+
+    _node_type_codes = {}
+    """
+    The type codes of the classes of nodes found so far, see _get_node_type_code().
+
+    :type: dict[type,int]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, symbols=None, nodes=None, args=None, ports=None, dependencies=None, items=None):
+        """
+        Object constructor.
+
+        :param list[str]|None symbols:      The symbol table.
+        :param list[int]|None nodes:        The nodes, NODE_FIELDS integers per node.
+        :param list[int]|None args:         The arguments of all command jobs.
+        :param list[int]|None ports:        The names of the ports.
+        :param list[int]|None dependencies: The dependencies, pairs of the successor port and the predecessor port.
+        :param list[int]|None items:        The consumptions and resources, ITEM_FIELDS integers per item.
+        """
+        self.symbols = symbols if symbols is not None else []
+        """
+        The symbol table, i.e. all node names, port names, and other strings.
+
+        :type: list[str]
+        """
+
+        self.nodes = nodes if nodes is not None else []
+        """
+        The nodes in preorder, NODE_FIELDS integers per node.
+
+        :type: list[int]
+        """
+
+        self.args = args if args is not None else []
+        """
+        The arguments of all command jobs in the order of the nodes (as symbols).
+
+        :type: list[int]
+        """
+
+        self.ports = ports if ports is not None else []
+        """
+        The names of the ports (as symbols) in the order of the nodes, first the input ports then the output ports of
+        each node.
+
+        :type: list[int]
+        """
+
+        self.dependencies = dependencies if dependencies is not None else []
+        """
+        The dependencies, pairs of the index of the successor port and the index of the predecessor port, in the order
+        of the successor ports and the order of the predecessors of each successor port.
+
+        :type: list[int]
+        """
+
+        self.items = items if items is not None else []
+        """
+        The consumptions and resources in the order of the nodes, ITEM_FIELDS integers per item.
+
+        :type: list[int]
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def from_node(root):
+        """
+        Returns the tables of a node tree.
+
+        :param enarksh_lib.xml_generator.node.Node.Node root: The root of the node tree.
+
+        :rtype: ScheduleTable
+        """
+        table = ScheduleTable()
+        symbol_indexes = {}
+
+        def symbol(text):
+            index = symbol_indexes.get(text)
+            if index is None:
+                index = len(table.symbols)
+                symbol_indexes[text] = index
+                table.symbols.append(text)
+
+            return index
+
+        node_indexes = {}
+        port_indexes = {}
+        all_ports = []
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node_indexes[node] = len(node_indexes)
+
+            parent = -1 if node is root else node_indexes[node.parent]
+
+            type_code = ScheduleTable._get_node_type_code(node)
+            if ScheduleTable.NODE_TYPES[type_code] is CommandJobNode:
+                path = symbol(node.path)
+                for arg in node.args:
+                    table.args.append(symbol(str(arg)))
+                arg_count = len(node.args)
+            else:
+                path = -1
+                arg_count = 0
+
+            table.nodes.extend((type_code,
+                                parent,
+                                symbol(node.name),
+                                symbol(node.username),
+                                len(node.input_ports),
+                                len(node.output_ports),
+                                path,
+                                arg_count))
+
+            for port in node.input_ports + node.output_ports:
+                port_indexes[port] = len(port_indexes)
+                all_ports.append(port)
+                table.ports.append(symbol(port.port_name))
+
+            for item in (node._consumptions or []) + (node._resources or []):
+                type_code = ScheduleTable._get_type_code(item, ScheduleTable.ITEM_TYPES)
+                if isinstance(item, (CountingConsumption, CountingResource)):
+                    value = symbol(str(item.amount))
+                    amount_type = ScheduleTable._get_amount_type_code(item.amount)
+                elif isinstance(item, ReadWriteLockConsumption):
+                    value = symbol(item.mode)
+                    amount_type = 0
+                else:
+                    value = -1
+                    amount_type = 0
+                table.items.extend((node_indexes[node], type_code, symbol(item.name), value, amount_type))
+
+            stack.extend(reversed(node._get_child_nodes()))
+
+        for port in all_ports:
+            index = port_indexes[port]
+            for predecessor in port.predecessors:
+                if predecessor not in port_indexes:
+                    raise ValueError("Port '{0}' of node '{1}' depends on a port outside the node tree".format(
+                        port.port_name, port.node.get_path()))
+                table.dependencies.append(index)
+                table.dependencies.append(port_indexes[predecessor])
+
+        return table
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _create_nodes(self):
+        """
+        Creates the node tree of this table and returns the root of the node tree.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        symbols = self.symbols
+        nodes = []
+        ports = []
+        child_nodes = [None] * (len(self.nodes) // self.NODE_FIELDS)
+
+        args = iter(self.args)
+        port_names = iter(self.ports)
+        classes = self.NODE_CLASSES
+        columns = [self.nodes[field::self.NODE_FIELDS] for field in range(self.NODE_FIELDS)]
+        for type_code, parent, name, username, input_count, output_count, path, arg_count in zip(*columns):
+            node = classes[type_code](symbols[name])
+            node.username = symbols[username]
+            if path >= 0:
+                node.path = symbols[path]
+                if arg_count:
+                    node.args = [symbols[next(args)] for _ in range(arg_count)]
+
+            for _ in range(input_count):
+                port = InputPort(node, symbols[next(port_names)])
+                node.input_ports.append(port)
+                ports.append(port)
+            for _ in range(output_count):
+                port = OutputPort(node, symbols[next(port_names)])
+                node.output_ports.append(port)
+                ports.append(port)
+
+            if parent >= 0:
+                # The node tree is marked as finalized below, hence we don't need add_child_node().
+                node.parent = nodes[parent]
+                siblings = child_nodes[parent]
+                if siblings is None:
+                    child_nodes[parent] = [node]
+                else:
+                    siblings.append(node)
+            nodes.append(node)
+
+        if not nodes:
+            raise ValueError('The table does not contain nodes')
+
+        # Adding the child nodes of a node at once is much faster than adding the child nodes one by one.
+        for node, siblings in zip(nodes, child_nodes):
+            if siblings is not None:
+                node.child_nodes.extend(siblings)
+
+        item_types = self.ITEM_TYPES
+        consumption_types = [issubclass(item_type, Consumption) for item_type in item_types]
+        amount_types = self.AMOUNT_TYPES
+        columns = [self.items[field::self.ITEM_FIELDS] for field in range(self.ITEM_FIELDS)]
+        for node, type_code, name, value, amount_type in zip(*columns):
+            item_type = item_types[type_code]
+            if item_type is ReadWriteLockResource:
+                item = item_type(symbols[name])
+            elif amount_types[amount_type] is bool:
+                item = item_type(symbols[name], symbols[value] == 'True')
+            else:
+                item = item_type(symbols[name], amount_types[amount_type](symbols[value]))
+
+            node = nodes[node]
+            if consumption_types[type_code]:
+                if node._consumptions is None:
+                    node._consumptions = [item]
+                else:
+                    node._consumptions.append(item)
+            elif node._resources is None:
+                node._resources = [item]
+            else:
+                node._resources.append(item)
+
+        # The dependencies are unique, hence we don't need add_dependency().
+        dependencies = self.dependencies
+        for successor, predecessor in zip(dependencies[0::2], dependencies[1::2]):
+            ports[successor].predecessors[ports[predecessor]] = None
+            ports[predecessor].successors[ports[successor]] = None
+
+        # The node tree has been finalized already.
+        nodes[0]._mark_clean()
+
+        return nodes[0]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_amount_type_code(amount):
+        """
+        Returns the type code of the amount of a counting consumption or resource.
+
+        :param * amount: The amount.
+
+        :rtype: int
+        """
+        # Note that bool is a subclass of int, hence the type must match exactly.
+        for type_code, type_ in enumerate(ScheduleTable.AMOUNT_TYPES):
+            if type(amount) is type_:
+                return type_code
+
+        raise ValueError("Unsupported type of amount '{0}'".format(amount.__class__.__name__))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_node_type_code(node):
+        """
+        Returns the type code of a node.
+
+        The type code of a node of which the class has another generate_xml() method than the classes in NODE_TYPES
+        (e.g. a subclass of Node defined by the user) is determined by the tag of its XML element. The XML of such a
+        node must depend only on the properties stored in the tables.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+
+        :rtype: int
+        """
+        node_class = node.__class__
+        type_code = ScheduleTable._node_type_codes.get(node_class)
+        if type_code is None:
+            for index, type_ in enumerate(ScheduleTable.NODE_TYPES):
+                if node_class.generate_xml is type_.generate_xml:
+                    type_code = index
+                    break
+            else:
+                parent = ElementTree.Element('Nodes')
+                node.generate_xml(parent)
+                tag = parent[0].tag if len(parent) else None
+                if tag not in ScheduleTable.NODE_TAGS:
+                    raise ValueError("Unsupported type '{0}'".format(node_class.__name__))
+                type_code = ScheduleTable.NODE_TAGS.index(tag)
+
+            ScheduleTable._node_type_codes[node_class] = type_code
+
+        return type_code
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_type_code(obj, types):
+        """
+        Returns the type code of a consumption or resource.
+
+        :param * obj:             The consumption or resource.
+        :param tuple[type] types: The types.
+
+        :rtype: int
+        """
+        for type_code, type_ in enumerate(types):
+            if isinstance(obj, type_):
+                return type_code
+
+        raise ValueError("Unsupported type '{0}'".format(obj.__class__.__name__))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def to_node(self):
+        """
+        Returns the node tree of this table. The node tree is marked as finalized.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        # Creating many objects triggers many (useless) runs of the garbage collector.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._create_nodes()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,42 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+
+
+class LoadedCompoundJobNode(CompoundJobNode):
+    """
+    A compound node loaded from XML. The child nodes and dependencies are loaded from XML too.
+    """
+
+    __slots__ = ()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        The child nodes are loaded from XML.
+        """
+        pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        The dependencies are loaded from XML.
+        """
+        pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def ensure_dependencies_input_port(self):
+        """
+        Ensures that the input port 'all' of all child nodes depends on input port 'all' of this node. If this node has
+        additional input ports the dependencies on the input ports of this node are loaded from XML and dependencies of
+        child nodes added after loading must be added explicitly.
+        """
+        if len(self.input_ports) <= 1:
+            CompoundJobNode.ensure_dependencies_input_port(self)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,32 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+
+
+class LoadedScheduleNode(ScheduleNode):
+    """
+    A schedule loaded from XML. The child nodes and dependencies are loaded from XML too.
+    """
+
+    __slots__ = ()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        """
+        The child nodes are loaded from XML.
+        """
+        pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        """
+        The dependencies are loaded from XML.
+        """
+        pass
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,290 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import sys
+from xml.etree import ElementTree
+
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.consumption.ReadWriteLockConsumption import ReadWriteLockConsumption
+from enarksh_lib.xml_generator.loader.LoadedCompoundJobNode import LoadedCompoundJobNode
+from enarksh_lib.xml_generator.loader.LoadedScheduleNode import LoadedScheduleNode
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.ManualTriggerNode import ManualTriggerNode
+from enarksh_lib.xml_generator.node.TerminatorNode import TerminatorNode
+from enarksh_lib.xml_generator.port.InputPort import InputPort
+from enarksh_lib.xml_generator.port.Port import Port
+from enarksh_lib.xml_generator.resource.CountingResource import CountingResource
+from enarksh_lib.xml_generator.resource.ReadWriteLockResource import ReadWriteLockResource
+from enarksh_lib.xml_generator.writer.Compression import Compression
+
+
+class XmlLoader:
+    """
+    Class for loading a schedule from XML, e.g. from an archive of deployed schedules.
+
+    The XML is parsed incrementally and each XML element is discarded as soon as it has been parsed, hence only the node
+    tree is held in memory. Generating the XML of the loaded schedule gives the original XML (in the same format and
+    encoding). Only carriage returns in compact XML are lost, because XML parsers normalize line endings.
+    """
+
+    NODE_CLASSES = {'Schedule':      LoadedScheduleNode,
+                    'CompoundJob':   LoadedCompoundJobNode,
+                    'CommandJob':    CommandJobNode,
+                    'ManualTrigger': ManualTriggerNode,
+                    'Terminator':    TerminatorNode}
+    """
+    The classes of the nodes per XML tag.
+
+    :type: dict[str,type]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        """
+        Object constructor.
+        """
+        self._schedule = None
+        """
+        The loaded schedule.
+
+        :type: enarksh_lib.xml_generator.node.ScheduleNode.ScheduleNode|None
+        """
+
+        self._elements = []
+        """
+        The XML elements that are being parsed.
+
+        :type: list[xml.etree.ElementTree.Element]
+        """
+
+        self._nodes = []
+        """
+        The nodes that are being loaded.
+
+        :type: list[enarksh_lib.xml_generator.node.Node.Node]
+        """
+
+        self._dependencies = []
+        """
+        Per node that is being loaded, the dependencies within the scope of the node that are not yet resolved, i.e.
+        tuples of the successor port, the name of the predecessor node, and the name of the predecessor port.
+
+        :type: list[list[(enarksh_lib.xml_generator.port.Port.Port,str,str)]]
+        """
+
+        self._port = None
+        """
+        The port that is being loaded.
+
+        :type: enarksh_lib.xml_generator.port.Port.Port|None
+        """
+
+        self._fields = {}
+        """
+        The texts of the child elements of the dependency, consumption, or resource that is being loaded.
+
+        :type: dict[str,str]
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def load(self, file):
+        """
+        Loads a schedule from a (compressed) XML file and returns the schedule.
+
+        :param str|* file: The path of the file or a binary stream. The stream must support peek() or seeking.
+
+        :rtype: enarksh_lib.xml_generator.node.ScheduleNode.ScheduleNode
+        """
+        stream = Compression.open_reader(file)
+        try:
+            self._schedule = None
+            for event, element in ElementTree.iterparse(stream, ('start', 'end')):
+                if event == 'start':
+                    self._start(element)
+                else:
+                    self._end(element)
+        finally:
+            if stream is not file:
+                stream.close()
+
+        if self._schedule is None:
+            raise ValueError('The XML does not contain a schedule')
+
+        # The loaded schedule has been finalized already.
+        self._schedule._mark_clean()
+
+        return self._schedule
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end(self, element):
+        """
+        Handles the end of an XML element.
+
+        :param xml.etree.ElementTree.Element element: The XML element.
+        """
+        elements = self._elements
+        tag = element.tag
+        parent_tag = elements[-2].tag if len(elements) >= 2 else None
+        text = element.text or ''
+
+        if tag in self.NODE_CLASSES:
+            self._end_node()
+        elif tag == 'NodeName' and parent_tag in self.NODE_CLASSES:
+            self._end_node_name(text)
+        elif tag == 'UserName':
+            self._nodes[-1].username = text
+        elif tag == 'PortName' and parent_tag == 'Port':
+            self._end_port_name(elements[-3].tag, text)
+        elif tag == 'Dependency':
+            self._end_dependency()
+        elif tag == 'Path':
+            self._nodes[-1].path = text
+        elif tag == 'Arg':
+            self._nodes[-1].args.append(text)
+        elif tag == 'CountingConsumption':
+            self._nodes[-1].consumptions.append(CountingConsumption(self._fields['ResourceName'],
+                                                                    self._get_amount(self._fields['Amount'])))
+        elif tag == 'ReadWriteLockConsumption':
+            self._nodes[-1].consumptions.append(ReadWriteLockConsumption(self._fields['ResourceName'],
+                                                                         self._fields['Mode']))
+        elif tag == 'CountingResource':
+            self._nodes[-1].resources.append(CountingResource(self._fields['ResourceName'],
+                                                              self._get_amount(self._fields['Amount'])))
+        elif tag == 'ReadWriteLockResource':
+            self._nodes[-1].resources.append(ReadWriteLockResource(self._fields['ResourceName']))
+        else:
+            self._fields[tag] = text
+
+        # Discard the XML element.
+        element.clear()
+        elements.pop()
+        if elements:
+            elements[-1].remove(element)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_dependency(self):
+        """
+        Handles the end of a dependency of a port. The dependency is resolved at the end of the scope of the port.
+        """
+        port = self._port
+        if isinstance(port, InputPort):
+            if len(self._dependencies) < 2:
+                raise ValueError("Input port '{0}' of node '{1}' can not have dependencies".format(port.port_name,
+                                                                                                  port.node.name))
+            dependencies = self._dependencies[-2]
+        else:
+            dependencies = self._dependencies[-1]
+
+        dependencies.append((port, self._fields['NodeName'], self._fields['PortName']))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_node(self):
+        """
+        Handles the end of a node. Resolves all dependencies within the scope of the node.
+        """
+        node = self._nodes.pop()
+        for port, node_name, port_name in self._dependencies.pop():
+            port.add_dependency(self._resolve_predecessor(node, port, node_name, port_name))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_node_name(self, name):
+        """
+        Handles the name of a node. Adds the node to its parent node.
+
+        :param str name: The name of the node.
+        """
+        node = self._nodes[-1]
+        node.name = sys.intern(name)
+        if len(self._nodes) >= 2:
+            self._nodes[-2].add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_port_name(self, ports_tag, name):
+        """
+        Handles the name of a port. Creates the port.
+
+        :param str ports_tag: The tag of the parent element of the port, i.e. InputPorts or OutputPorts.
+        :param str name:      The name of the port.
+        """
+        if ports_tag == 'InputPorts':
+            self._port = self._nodes[-1].make_input_port(name)
+        else:
+            self._port = self._nodes[-1].make_output_port(name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_amount(text):
+        """
+        Returns the amount of a consumption or resource. The amount is an integer unless the integer does not give the
+        original text.
+
+        :param str text: The text of the amount.
+
+        :rtype: int|str
+        """
+        try:
+            amount = int(text)
+        except ValueError:
+            return text
+
+        return amount if str(amount) == text else text
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _resolve_predecessor(scope, port, node_name, port_name):
+        """
+        Returns the predecessor port of a dependency.
+
+        :param enarksh_lib.xml_generator.node.Node.Node scope: The node that is the scope of the dependency.
+        :param enarksh_lib.xml_generator.port.Port.Port port:  The successor port.
+        :param str                                      node_name: The name of the predecessor node.
+        :param str                                      port_name: The name of the predecessor port.
+
+        :rtype: enarksh_lib.xml_generator.port.Port.Port
+        """
+        predecessor = None
+        if node_name == Port.NODE_SELF_NAME:
+            # The parent of the node of the port.
+            parent = scope if isinstance(port, InputPort) else scope.parent
+            if parent is not None:
+                predecessor = parent.input_ports.get(port_name)
+        else:
+            node = scope.child_nodes.get(node_name)
+            if node is not None:
+                predecessor = node.output_ports.get(port_name)
+            elif node_name == scope.name and not isinstance(port, InputPort):
+                predecessor = scope.input_ports.get(port_name)
+
+        if predecessor is None:
+            raise ValueError("Unable to resolve dependency '{0}:{1}' of port '{2}' of node '{3}'".format(
+                node_name, port_name, port.port_name, port.node.get_path()))
+
+        return predecessor
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _start(self, element):
+        """
+        Handles the start of an XML element.
+
+        :param xml.etree.ElementTree.Element element: The XML element.
+        """
+        self._elements.append(element)
+
+        node_class = self.NODE_CLASSES.get(element.tag)
+        if node_class is not None:
+            node = node_class(None)
+            if not self._nodes:
+                if element.tag != 'Schedule':
+                    raise ValueError("Unexpected document element '{0}'".format(element.tag))
+                self._schedule = node
+            self._nodes.append(node)
+            self._dependencies.append([])
+        elif element.tag in ('Dependency', 'CountingConsumption', 'ReadWriteLockConsumption', 'CountingResource',
+                             'ReadWriteLockResource'):
+            self._fields = {}
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,145 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+
+
+class ArgumentList(list):
+    """
+    The list of arguments of a command job. Changing the list clears the digests of the command job and its ancestors,
+    because the arguments are part of the digest of the command job, see Node.get_digest().
+    """
+
+    __slots__ = ('_node',)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, node, iterable=()):
+        """
+        Object constructor.
+
+        :param enarksh_lib.xml_generator.node.CommandJobNode.CommandJobNode node:     The command job.
+        :param iterable                                                     iterable: The initial arguments.
+        """
+        list.__init__(self, iterable)
+
+        self._node = node
+        """
+        The command job of which these are the arguments.
+
+        :type: enarksh_lib.xml_generator.node.CommandJobNode.CommandJobNode
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __reduce__(self):
+        """
+        Returns the state of this list for pickling.
+        """
+        return self.__class__, (self._node, list(self))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __iadd__(self, other):
+        list.extend(self, other)
+        self._node._clear_digests()
+
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __imul__(self, other):
+        list.__imul__(self, other)
+        self._node._clear_digests()
+
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def append(self, item):
+        """
+        Appends an argument to the end of this list.
+
+        :param * item: The argument.
+        """
+        list.append(self, item)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Removes all arguments from this list.
+        """
+        list.clear(self)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def extend(self, iterable):
+        """
+        Appends arguments to the end of this list.
+
+        :param iterable iterable: The arguments.
+        """
+        list.extend(self, iterable)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def insert(self, index, item):
+        """
+        Inserts an argument before an index.
+
+        :param int index: The index.
+        :param * item:    The argument.
+        """
+        list.insert(self, index, item)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def pop(self, index=-1):
+        """
+        Removes and returns the argument at an index.
+
+        :param int index: The index.
+
+        :rtype: *
+        """
+        item = list.pop(self, index)
+        self._node._clear_digests()
+
+        return item
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove(self, item):
+        """
+        Removes an argument from this list.
+
+        :param * item: The argument.
+        """
+        list.remove(self, item)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reverse(self):
+        """
+        Reverses the arguments in this list.
+        """
+        list.reverse(self)
+        self._node._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def sort(self, *args, **kwargs):
+        """
+        Sorts the arguments in this list.
+        """
+        list.sort(self, *args, **kwargs)
+        self._node._clear_digests()
+
+# ----------------------------------------------------------------------------------------------------------------------
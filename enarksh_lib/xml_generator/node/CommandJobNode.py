@@ -5,9 +5,9 @@ Copyright 2015-2016 Set Based IT Consultancy
 
 Licence MIT
 """
-from xml.etree.ElementTree import SubElement
-
+from enarksh_lib.xml_generator.node.ArgumentList import ArgumentList
 from enarksh_lib.xml_generator.node.Node import Node
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class CommandJobNode(Node):
@@ -15,6 +15,8 @@ class CommandJobNode(Node):
     Class for generating XML messages for elements of type 'CommandJobType'.
     """
 
+    __slots__ = ('_args', '_path')
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name):
         """
@@ -24,20 +26,55 @@ class CommandJobNode(Node):
         """
         Node.__init__(self, name)
 
-        self.args = []
+        self._args = ArgumentList(self)
         """
-        The arguments of the executable.
+        The arguments of the executable, see args.
 
-        :type: list[str]
+        :type: enarksh_lib.xml_generator.node.ArgumentList.ArgumentList
         """
 
-        self.path = ''
+        self._path = ''
         """
-        The path of the executable that must be run by this job.
+        The path of the executable that must be run by this job, see path.
 
         :type: str
         """
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def args(self):
+        """
+        The arguments of the executable.
+
+        :rtype: enarksh_lib.xml_generator.node.ArgumentList.ArgumentList
+        """
+        return self._args
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @args.setter
+    def args(self, args):
+        """
+        Replaces the arguments of the executable.
+
+        :param list args: The arguments.
+        """
+        self._args = ArgumentList(self, args)
+        self._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _copy(self):
+        """
+        Returns a shallow copy of this node without child nodes, parent node, and dependencies. The copy has its own
+        ports, consumptions, resources, and arguments.
+
+        :rtype: enarksh_lib.xml_generator.node.CommandJobNode.CommandJobNode
+        """
+        node = Node._copy(self)
+        node._args = ArgumentList(node, self._args)
+        node._path = self._path
+
+        return node
+
     # ------------------------------------------------------------------------------------------------------------------
     def generate_xml(self, parent):
         """
@@ -60,21 +97,45 @@ class CommandJobNode(Node):
                 argument.text = str(arg)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def get_implicit_dependencies_output_ports(self, port_name, ports, level):
+    def get_implicit_input_port_name(self):
         """
+        Returns the name of the input port on which all output ports of this node depend implicitly, i.e. the output
+        ports of a command job depend on input port 'all'.
 
-        :param str                                                port_name:
-        :param list[enarksh_lib.xml_generator.port.Port.Port] ports:
-        :param int                                                level:
+        :rtype: str
+        """
+        return self.ALL_PORT_NAME
 
-        :rtype: list[]
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def path(self):
         """
-        port = self.get_output_port(port_name)
+        The path of the executable that must be run by this job.
+
+        :rtype: str
+        """
+        return self._path
 
-        if port not in ports:
-            if level:
-                ports.append(port)
+    # ------------------------------------------------------------------------------------------------------------------
+    @path.setter
+    def path(self, path):
+        """
+        Sets the path of the executable that must be run by this job.
+
+        :param str path: The path.
+        """
+        self._path = path
+        self._clear_digests()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this node that are part of its XML, excluding the child nodes.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        Node.update_hash(self, hasher)
 
-        self.get_implicit_dependencies_input_ports(self.ALL_PORT_NAME, ports, level + 1)
+        hasher.update(repr((self.path, [str(arg) for arg in self.args])).encode())
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -6,9 +6,10 @@ Copyright 2015-2016 Set Based IT Consultancy
 Licence MIT
 """
 import abc
-from xml.etree.ElementTree import SubElement
 
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
 from enarksh_lib.xml_generator.node.Node import Node
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement, XmlElement
 
 
 class CompoundJobNode(Node):
@@ -16,18 +17,181 @@ class CompoundJobNode(Node):
     Class for generating XML messages for elements of type 'CompoundJobType'.
     """
 
+    __slots__ = ('_deferred', '_expanding')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name):
+        """
+        Object constructor.
+
+        :param str name: The name of the node.
+        """
+        Node.__init__(self, name)
+
+        self._deferred = False
+        """
+        If True, create_child_nodes() and create_dependencies() have been deferred and must be called before the child
+        nodes are used.
+
+        :type: bool
+        """
+
+        self._expanding = False
+        """
+        If True, the child nodes of which the creation has been deferred are being created and finalized.
+
+        :type: bool
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_child_nodes_parallel(self, child_nodes, executor, lazy=False):
+        """
+        Calls create_node() of compound nodes using an executor (e.g. a concurrent.futures.ThreadPoolExecutor or
+        ProcessPoolExecutor) and adds the created nodes as child nodes of this node in the given order. The result is
+        identical to calling create_node() and add_child_node() for each node in turn.
+
+        The compound nodes must not have a parent node yet and create_node() of a compound node must not use other
+        nodes. With a process pool the compound nodes are pickled to the worker processes and the created nodes are
+        pickled back, hence the compound nodes must be picklable and the created nodes are copies of the given nodes.
+
+        :param list[enarksh_lib.xml_generator.node.CompoundJobNode.CompoundJobNode] child_nodes: The compound nodes.
+        :param concurrent.futures.Executor executor: The executor.
+        :param bool lazy: If True, the compound nodes are created in lazy mode, see create_node().
+
+        :rtype: list[enarksh_lib.xml_generator.node.CompoundJobNode.CompoundJobNode]
+        """
+        names = set()
+        for child_node in child_nodes:
+            if child_node.parent is not None:
+                raise ValueError("Node '{0}' has already a parent node".format(child_node.get_path()))
+            if child_node.name in names or self.search_child_node(child_node.name):
+                raise ValueError("Node '{0}' has already a child node with name '{1}'".format(self.get_path(),
+                                                                                           child_node.name))
+            names.add(child_node.name)
+
+        futures = [executor.submit(CompoundJobNode._create_subtree, child_node, lazy) for child_node in child_nodes]
+
+        created = []
+        for future in futures:
+            child_node, dependencies = future.result()
+            child_node._attach_dependencies(dependencies)
+            self.add_child_node(child_node)
+            created.append(child_node)
+
+        return created
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def child_nodes(self):
+        """
+        The child nodes of this node. If the creation of the child nodes has been deferred, the child nodes are created.
+
+        :rtype: enarksh_lib.xml_generator.node.NamedList.NamedList[enarksh_lib.xml_generator.node.Node.Node]
+        """
+        if self._deferred:
+            self._create_deferred()
+
+        return Node.child_nodes.fget(self)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @child_nodes.setter
+    def child_nodes(self, child_nodes):
+        """
+        Replaces the child nodes of this node.
+
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList child_nodes: The child nodes.
+        """
+        self._deferred = False
+        Node.child_nodes.fset(self, child_nodes)
+
     # ------------------------------------------------------------------------------------------------------------------
-    def create_node(self):
+    def _copy(self):
+        """
+        Returns a shallow copy of this node without child nodes, parent node, and dependencies. The copy has its own
+        ports, consumptions, and resources.
+
+        :rtype: enarksh_lib.xml_generator.node.CompoundJobNode.CompoundJobNode
+        """
+        # Finalizing the deferred child nodes might add ports to this node.
+        if self._deferred:
+            self._create_deferred()
+
+        node = Node._copy(self)
+        # The child nodes are copied by clone().
+        node._deferred = False
+        node._expanding = False
+
+        return node
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _create_deferred(self):
+        """
+        Creates the child nodes and the dependencies between the child nodes of which the creation has been deferred.
+        If this node has been finalized, the child nodes are finalized too. If creating or finalizing the child nodes
+        fails, the child nodes are released and the creation of the child nodes remains deferred.
+        """
+        finalized = not self._dirty
+
+        # Creating the same child nodes again does not change this node, hence this node and its ancestors keep their
+        # digests and remain finalized (unless the parent node has been changed, e.g. by creating the 'all' output port
+        # of this node).
+        digest = self.digest
+        ancestors = []
+        node = self.parent
+        while finalized and node is not None and not node._dirty_descendants:
+            ancestors.append((node, node.digest))
+            node = node.parent
+
+        self._deferred = False
+        self._expanding = finalized
+        try:
+            self._run_step(self.create_child_nodes)
+            self._run_step(self.create_dependencies)
+            if finalized:
+                self.finalize()
+        except Exception:
+            self._release_child_nodes()
+            self._dirty = not finalized
+            raise
+        finally:
+            self._expanding = False
+
+        if finalized:
+            if not (self.parent is not None and self.parent._dirty) and not any(node._dirty for node, _ in ancestors):
+                self.digest = digest
+                for node, node_digest in ancestors:
+                    node._dirty_descendants = False
+                    node.digest = node_digest
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_node(self, lazy=False):
         """
         Execute all the necessary steps the create a compound node.
+
+        In lazy mode the calls of create_child_nodes() and create_dependencies() are deferred until the child nodes are
+        used, e.g. when the XML of this node is generated. The ports created by create_input_ports() and
+        create_output_ports() are available right away. After generating the XML of this node the child nodes are
+        released (unless they have been used before), hence only the subtree of which the XML is being generated is
+        held in memory. Hence, in lazy mode:
+        - create_input_ports(), create_output_ports(), and create_finish() must not use the child nodes,
+        - create_child_nodes() and create_dependencies() might be called more than once and must create the same child
+          nodes and dependencies each time,
+        - the cycle detection of finalize() assumes all output ports of this node depend on all input ports of this
+          node until the child nodes have been created.
+
+        :param bool lazy: If True, the creation of the child nodes and the dependencies is deferred.
         """
-        self.create_start()
-        self.create_resources()
-        self.create_child_nodes()
-        self.create_input_ports()
-        self.create_output_ports()
-        self.create_dependencies()
-        self.create_finish()
+        self._run_step(self.create_start)
+        self._run_step(self.create_resources)
+        if lazy:
+            self._deferred = True
+        else:
+            self._run_step(self.create_child_nodes)
+        self._run_step(self.create_input_ports)
+        self._run_step(self.create_output_ports)
+        if not self._deferred:
+            self._run_step(self.create_dependencies)
+        self._run_step(self.create_finish)
 
     # ------------------------------------------------------------------------------------------------------------------
     @abc.abstractmethod
@@ -101,6 +265,44 @@ class CompoundJobNode(Node):
         # Noting to do.
         pass
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _create_subtree(node, lazy):
+        """
+        Calls create_node() of a compound node and returns the node and its dependencies detached from the node, such
+        that the node can be pickled efficiently. Runs in a worker of the executor of add_child_nodes_parallel().
+
+        :param enarksh_lib.xml_generator.node.CompoundJobNode.CompoundJobNode node: The compound node.
+        :param bool lazy: If True, the compound node is created in lazy mode.
+
+        :rtype: (enarksh_lib.xml_generator.node.CompoundJobNode.CompoundJobNode,(list[list[int]],list[list[int]]))
+        """
+        node.create_node(lazy)
+
+        return node, node._detach_dependencies()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def ensure_dependencies(self):
+        """
+        Creates the dependencies as described in Node.ensure_dependencies(). If the creation of the child nodes has
+        been deferred, only the dependencies of the input ports of this node are created. The other dependencies are
+        created when the child nodes are created (and then the dependencies of the input ports of this node are not
+        created again).
+        """
+        if self._deferred:
+            if self._dirty or (self.parent is not None and self.parent._dirty):
+                self.ensure_dependencies_self()
+        elif self._expanding:
+            # The dependencies of the input ports of this node are defined within the parent node and have been ensured
+            # and purged when the parent node was finalized. Ensuring these dependencies again would add the purged
+            # dependencies and change the parent node.
+            if self._child_nodes:
+                self._ensure_dependencies_child_nodes()
+                self.ensure_dependencies_input_port()
+                self.ensure_dependencies_output_port()
+        else:
+            Node.ensure_dependencies(self)
+
     # ------------------------------------------------------------------------------------------------------------------
     def generate_xml(self, parent):
         """
@@ -112,4 +314,80 @@ class CompoundJobNode(Node):
 
         self._generate_xml_common(compound_job)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _generate_xml_common(self, parent):
+        """
+        Generates the common XML elements of the XML element for this node. If the creation of the child nodes has been
+        deferred, the child nodes are created before and released after generating the XML.
+
+        :param xml.etree.ElementTree.Element parent: The parent XML element (i.e. the node XML element).
+        """
+        deferred = self._deferred
+        if deferred:
+            self._create_deferred()
+
+        Node._generate_xml_common(self, parent)
+
+        if deferred:
+            if isinstance(parent, XmlElement):
+                # The writer might write the XML of the child nodes later.
+                parent.writer.call_later(self._release_child_nodes)
+            else:
+                self._release_child_nodes()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_child_nodes(self):
+        """
+        Returns the child nodes of this node. If the creation of the child nodes has been deferred, the child nodes are
+        created.
+
+        :rtype: list[enarksh_lib.xml_generator.node.Node.Node]
+        """
+        if self._deferred:
+            self._create_deferred()
+
+        return self._child_nodes or ()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_deferred(self):
+        """
+        Returns True if the creation of the child nodes of this node has been deferred and the child nodes have not
+        been created yet (or have been released).
+
+        :rtype: bool
+        """
+        return self._deferred
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _release_child_nodes(self):
+        """
+        Releases the child nodes of this node and all dependencies defined within this node. The child nodes and their
+        dependencies will be created again by create_child_nodes() and create_dependencies() when they are used.
+        """
+        for port in self.output_ports:
+            for predecessor in port.predecessors:
+                del predecessor.successors[port]
+            port.predecessors.clear()
+
+        for port in self.input_ports:
+            for successor in [successor for successor in port.successors if successor.node.parent is self]:
+                del port.successors[successor]
+
+        self._child_nodes = None
+        self._dirty_descendants = False
+        self._deferred = True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _run_step(self, step):
+        """
+        Runs a step of creating this node. If instrumentation is active the elapsed time of the step is recorded.
+
+        :param callable step: The step, a method of this node.
+        """
+        instrumentation = Instrumentation.active
+        if instrumentation is None:
+            step()
+        else:
+            instrumentation.call(step.__name__, self, step)
+
 # ----------------------------------------------------------------------------------------------------------------------
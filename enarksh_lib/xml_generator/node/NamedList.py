@@ -0,0 +1,226 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+
+
+class NamedList(list):
+    """
+    A list of named objects (e.g. child nodes or ports) with an index on the names of the objects. The names of the
+    objects in the list must be unique and must not change while the objects are in the list.
+
+    Most lists (e.g. the ports of a node) are small, hence the index is created only when the list grows beyond
+    INDEX_SIZE objects. Small lists are searched linearly.
+    """
+
+    INDEX_SIZE = 8
+    """
+    The maximum number of objects in a list without an index.
+
+    :type: int
+    """
+
+    __slots__ = ('_attribute', '_index')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, attribute, iterable=()):
+        """
+        Object constructor.
+
+        :param str      attribute: The name of the attribute that holds the name of an object.
+        :param iterable iterable:  The initial objects.
+        """
+        list.__init__(self)
+
+        self._attribute = attribute
+        """
+        The name of the attribute that holds the name of an object.
+
+        :type: str
+        """
+
+        self._index = None
+        """
+        The index from names to objects, or None if this list has not grown beyond INDEX_SIZE objects yet.
+
+        :type: dict[str,*]|None
+        """
+
+        if iterable:
+            self.extend(iterable)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __reduce__(self):
+        """
+        Returns the state of this list for pickling.
+        """
+        return self.__class__, (self._attribute, list(self))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _add(self, item):
+        """
+        Adds an object to the index.
+
+        :param * item: The object.
+        """
+        name = getattr(item, self._attribute)
+        if self._index is None:
+            if self.get(name) is not None:
+                raise ValueError("Duplicate name '{0}'".format(name))
+
+            if len(self) >= self.INDEX_SIZE:
+                self._index = self._create_index(self)
+                self._index[name] = item
+        else:
+            if name in self._index:
+                raise ValueError("Duplicate name '{0}'".format(name))
+
+            self._index[name] = item
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _create_index(self, items):
+        """
+        Returns the index on the names of objects.
+
+        :param list items: The objects.
+
+        :rtype: dict[str,*]
+        """
+        index = {}
+        for item in items:
+            name = getattr(item, self._attribute)
+            if name in index:
+                raise ValueError("Duplicate name '{0}'".format(name))
+            index[name] = item
+
+        return index
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _rebuild(self, items):
+        """
+        Replaces the objects in this list and rebuilds the index.
+
+        :param list items: The new objects.
+        """
+        index = self._create_index(items)
+
+        list.__init__(self, items)
+        self._index = index if len(index) > self.INDEX_SIZE else None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __delitem__(self, key):
+        items = list(self)
+        del items[key]
+        self._rebuild(items)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __iadd__(self, other):
+        self.extend(other)
+
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __imul__(self, other):
+        self._rebuild(list(self) * other)
+
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __setitem__(self, key, value):
+        items = list(self)
+        items[key] = value
+        self._rebuild(items)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def append(self, item):
+        """
+        Appends an object to the end of this list.
+
+        :param * item: The object.
+        """
+        self._add(item)
+        list.append(self, item)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Removes all objects from this list.
+        """
+        list.clear(self)
+        self._index = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def extend(self, iterable):
+        """
+        Appends objects to the end of this list.
+
+        :param iterable iterable: The objects.
+        """
+        items = list(iterable)
+        if not self and len(items) > self.INDEX_SIZE:
+            # Much faster than appending the objects one by one.
+            self._rebuild(items)
+        else:
+            for item in items:
+                self.append(item)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, name):
+        """
+        Returns the object with a name. If no object with the name exists returns None.
+
+        :param str name: The name of the object.
+
+        :rtype: *
+        """
+        if self._index is not None:
+            return self._index.get(name)
+
+        attribute = self._attribute
+        for item in self:
+            if getattr(item, attribute) == name:
+                return item
+
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def insert(self, index, item):
+        """
+        Inserts an object before an index.
+
+        :param int index: The index.
+        :param * item:    The object.
+        """
+        self._add(item)
+        list.insert(self, index, item)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def pop(self, index=-1):
+        """
+        Removes and returns the object at an index.
+
+        :param int index: The index.
+
+        :rtype: *
+        """
+        item = list.pop(self, index)
+        if self._index is not None:
+            del self._index[getattr(item, self._attribute)]
+
+        return item
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove(self, item):
+        """
+        Removes an object from this list.
+
+        :param * item: The object.
+        """
+        list.remove(self, item)
+        if self._index is not None:
+            del self._index[getattr(item, self._attribute)]
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -6,10 +6,21 @@ Copyright 2015-2016 Set Based IT Consultancy
 Licence MIT
 """
 import abc
-from xml.etree.ElementTree import SubElement
-
+import copy
+import gc
+import hashlib
+import itertools
+import sys
+import time
+from collections import OrderedDict
+
+from enarksh_lib.xml_generator.graph.CycleDetector import CycleDetector
+from enarksh_lib.xml_generator.graph.PortGraph import PortGraph
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
+from enarksh_lib.xml_generator.node.NamedList import NamedList
 from enarksh_lib.xml_generator.port.InputPort import InputPort
 from enarksh_lib.xml_generator.port.OutputPort import OutputPort
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement, XmlElement
 
 
 class Node(metaclass=abc.ABCMeta):
@@ -39,6 +50,20 @@ class Node(metaclass=abc.ABCMeta):
     :type: str
     """
 
+    _implicit_dependencies_hooks = {}
+    """
+    Per node class whether the class overrides get_implicit_dependencies_input_ports() and
+    get_implicit_dependencies_output_ports(), see _get_implicit_dependencies_hooks().
+
+    :type: dict[type,(bool,bool)]
+    """
+
+    __slots__ = ('_name', '_child_nodes', '_consumptions', 'input_ports', 'output_ports', 'parent', '_resources',
+                 '_username', 'digest', '_dirty', '_dirty_descendants')
+    """
+    Nodes have no __dict__ (unless a subclass does not define __slots__), because a schedule can have many nodes.
+    """
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name):
         """
@@ -46,39 +71,40 @@ class Node(metaclass=abc.ABCMeta):
 
         :param str name: The name of the node.
         """
-        self.name = name
+        # Nodes of the same template have the same names.
+        self._name = sys.intern(name) if type(name) is str else name
         """
-        The name of the node.
+        The name of the node, see name.
 
         :type: str
         """
 
-        self.child_nodes = []
+        self._child_nodes = None
         """
-        The child nodes of this node.
+        The child nodes of this node, or None if not created yet (most nodes have no child nodes), see child_nodes.
 
-        :type: list[enarksh_lib.xml_generator.node.Node.Node]
+        :type: enarksh_lib.xml_generator.node.NamedList.NamedList[enarksh_lib.xml_generator.node.Node.Node]|None
         """
 
-        self.consumptions = []
+        self._consumptions = None
         """
-        The consumptions.
+        The consumptions, or None if not created yet, see consumptions.
 
-        :type: list[enarksh_lib.xml_generator.consumption.Consumption.Consumption]
+        :type: list[enarksh_lib.xml_generator.consumption.Consumption.Consumption]|None
         """
 
-        self.input_ports = []
+        self.input_ports = NamedList('port_name')
         """
         The input ports of this node.
 
-        :type: list[enarksh_lib.xml_generator.port.InputPort.InputPort]
+        :type: enarksh_lib.xml_generator.node.NamedList.NamedList[enarksh_lib.xml_generator.port.InputPort.InputPort]
         """
 
-        self.output_ports = []
+        self.output_ports = NamedList('port_name')
         """
         The output ports of this node.
 
-        :type: list[enarksh_lib.xml_generator.port.OutputPort.OutputPort]
+        :type: enarksh_lib.xml_generator.node.NamedList.NamedList[enarksh_lib.xml_generator.port.OutputPort.OutputPort]
         """
 
         self.parent = None
@@ -88,20 +114,44 @@ class Node(metaclass=abc.ABCMeta):
         :type: enarksh_lib.xml_generator.node.Node.Node
         """
 
-        self.resources = []
+        self._resources = None
         """
-        The resources of this node.
+        The resources of this node, or None if not created yet, see resources.
 
-        :type: list[enarksh_lib.xml_generator.resource.Resource.Resource]
+        :type: list[enarksh_lib.xml_generator.resource.Resource.Resource]|None
         """
 
-        self.username = ''
+        self._username = ''
         """
-        The user under which this node or its child nodes must run.
+        The user under which this node or its child nodes must run, see username.
 
         :type: str
         """
 
+        self.digest = None
+        """
+        The digest of the subtree of this node (the structural hash in hexadecimal notation) as computed by the last
+        call of get_digest(), or None if not computed or this node or its descendants have been changed afterwards (see
+        mark_dirty()).
+
+        :type: str|None
+        """
+
+        self._dirty = True
+        """
+        If True, the child nodes, ports, or dependencies defined within this node have been changed since the last
+        finalize.
+
+        :type: bool
+        """
+
+        self._dirty_descendants = False
+        """
+        If True, one or more descendants of this node might have been changed since the last finalize.
+
+        :type: bool
+        """
+
     # ------------------------------------------------------------------------------------------------------------------
     def add_child_node(self, child_node):
         """
@@ -109,8 +159,18 @@ class Node(metaclass=abc.ABCMeta):
 
         :param enarksh_lib.xml_generator.node.Node.Node child_node: The new child node.
         """
+        if self.search_child_node(child_node.name):
+            raise ValueError("Node '{0}' has already a child node with name '{1}'".format(self.get_path(),
+                                                                                       child_node.name))
+
         self.child_nodes.append(child_node)
         child_node.parent = self
+        # The dependencies of the input ports of the child node are defined within this node.
+        child_node.digest = None
+
+        self.mark_dirty()
+        if child_node._dirty or child_node._dirty_descendants:
+            child_node._mark_ancestors_dirty()
 
     # ------------------------------------------------------------------------------------------------------------------
     def add_dependency(self, successor_node_name, successor_port_name, predecessor_node_name, predecessor_port_name):
@@ -142,13 +202,362 @@ class Node(metaclass=abc.ABCMeta):
         succ_port.add_dependency(pred_port)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def finalize(self):
+    def add_dependencies(self, dependencies):
+        """
+        Adds dependencies between child nodes and this node in bulk. Each dependency is a tuple (successor node name,
+        successor port name, predecessor node name, predecessor port name), see add_dependency().
+
+        Names are resolved once per distinct name. All dependencies are checked before any dependency is added and all
+        unknown child nodes and ports are reported together.
+
+        :param iterable[(str,str,str,str)] dependencies: The dependencies, e.g. a list or a generator.
+        """
+        ports = {}
+        errors = []
+        pairs = []
+        for successor_node_name, successor_port_name, predecessor_node_name, predecessor_port_name in dependencies:
+            succ_port = ports.get((successor_node_name, successor_port_name, True), False)
+            if succ_port is False:
+                succ_port = self._resolve_dependency_port(successor_node_name, successor_port_name, True, ports, errors)
+
+            pred_port = ports.get((predecessor_node_name, predecessor_port_name, False), False)
+            if pred_port is False:
+                pred_port = self._resolve_dependency_port(predecessor_node_name, predecessor_port_name, False, ports,
+                                                          errors)
+
+            pairs.append((succ_port, pred_port))
+
+        if errors:
+            raise ValueError("Unable to add dependencies to node '{0}': {1}".format(self.get_path(),
+                                                                                    ', '.join(OrderedDict.fromkeys(errors))))
+
+        for succ_port, pred_port in pairs:
+            succ_port.add_dependency(pred_port)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_dependencies_columns(self,
+                                 successor_node_names,
+                                 predecessor_node_names,
+                                 successor_port_names=None,
+                                 predecessor_port_names=None):
+        """
+        Adds dependencies between child nodes and this node in bulk given as parallel sequences of names. See
+        add_dependencies().
+
+        :param iterable[str]      successor_node_names:   The names of the successor nodes.
+        :param iterable[str]      predecessor_node_names: The names of the predecessor nodes.
+        :param None|iterable[str] successor_port_names:   The names of the successor ports. None for port 'all'.
+        :param None|iterable[str] predecessor_port_names: The names of the predecessor ports. None for port 'all'.
+        """
+        columns = [successor_node_names, successor_port_names, predecessor_node_names, predecessor_port_names]
+        lengths = set(len(column) for column in columns if hasattr(column, '__len__'))
+        if len(lengths) > 1:
+            raise ValueError('Columns have different lengths: {0}'.format(', '.join(map(str, sorted(lengths)))))
+
+        if successor_port_names is None:
+            columns[1] = itertools.repeat(self.ALL_PORT_NAME)
+        if predecessor_port_names is None:
+            columns[3] = itertools.repeat(self.ALL_PORT_NAME)
+
+        self.add_dependencies(zip(*columns))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _attach_dependencies(self, dependencies):
+        """
+        Restores the dependencies between the ports of this node and its descendants removed by
+        _detach_dependencies().
+
+        :param (list[list[int]],list[list[int]]) dependencies: The removed dependencies.
+        """
+        ports = self._get_ports()
+        predecessors, successors = dependencies
+        if len(predecessors) != len(ports):
+            raise ValueError("The dependencies do not match the ports of node '{0}'".format(self.get_path()))
+
+        port_set = InputPort.PORT_SET
+        for port, port_predecessors, port_successors in zip(ports, predecessors, successors):
+            port.predecessors = port_set.fromkeys(ports[index] for index in port_predecessors)
+            port.successors = port_set.fromkeys(ports[index] for index in port_successors)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def child_nodes(self):
+        """
+        The child nodes of this node.
+
+        :rtype: enarksh_lib.xml_generator.node.NamedList.NamedList[enarksh_lib.xml_generator.node.Node.Node]
+        """
+        if self._child_nodes is None:
+            self._child_nodes = NamedList('name')
+
+        return self._child_nodes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @child_nodes.setter
+    def child_nodes(self, child_nodes):
+        """
+        Replaces the child nodes of this node.
+
+        :param enarksh_lib.xml_generator.node.NamedList.NamedList child_nodes: The child nodes.
+        """
+        self._child_nodes = child_nodes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _clear_digests(self):
+        """
+        Clears the digests of this node and its ancestors after changing a property of this node that is part of the
+        digest of this node but does not affect the dependencies (e.g. the username).
+        """
+        node = self
+        while node is not None:
+            node.digest = None
+            node = node.parent
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clone(self, name=None, hook=None):
+        """
+        Returns a copy of this node and all its descendants, including the ports, dependencies, consumptions, and
+        resources. The copy is made structurally, i.e. create_node() is not called, hence cloning a (finalized) template
+        is much faster than building the same node again.
+
+        The copy has no parent node. Dependencies on ports outside this node and its descendants are not copied. The
+        copy is finalized if and only if this node is finalized.
+
+        :param str|None name:      The name of the copy. If None, the copy has the name of this node.
+        :param callable|None hook: If not None, a function that is called with each node and its copy, before the copy
+                                   is added to its parent node. The function can change e.g. the name, username, or
+                                   arguments of the copy.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        # Creating many objects triggers many (useless) runs of the garbage collector.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._clone_nodes(name, hook)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _clone_nodes(self, name, hook):
+        """
+        Returns a copy of this node and all its descendants, see clone().
+
+        :param str|None name:      The name of the copy.
+        :param callable|None hook: The function that is called with each node and its copy.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        ports = {}
+        clone = None
+
+        stack = [(self, None)]
+        while stack:
+            node, parent = stack.pop()
+            node_copy = node._copy()
+            if parent is None:
+                clone = node_copy
+                if name is not None:
+                    node_copy.name = name
+            if hook is not None:
+                hook(node, node_copy)
+
+            # The copy is added after the hook, because the hook might change the name of the copy.
+            if parent is not None:
+                parent.child_nodes.append(node_copy)
+                node_copy.parent = parent
+                if hook is None:
+                    # The dependencies of the copy are equal to the dependencies of the node.
+                    node_copy.digest = node.digest
+
+            for port, port_copy in zip(node.input_ports, node_copy.input_ports):
+                ports[port] = port_copy
+            for port, port_copy in zip(node.output_ports, node_copy.output_ports):
+                ports[port] = port_copy
+
+            for child_node in reversed(node._get_child_nodes()):
+                stack.append((child_node, node_copy))
+
+        # The dependencies are copied in their original order.
+        for port, port_copy in ports.items():
+            for predecessor in port.predecessors:
+                predecessor_copy = ports.get(predecessor)
+                if predecessor_copy is not None:
+                    port_copy.predecessors[predecessor_copy] = None
+            for successor in port.successors:
+                successor_copy = ports.get(successor)
+                if successor_copy is not None:
+                    port_copy.successors[successor_copy] = None
+
+        return clone
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def consumptions(self):
+        """
+        The consumptions of this node.
+
+        :rtype: list[enarksh_lib.xml_generator.consumption.Consumption.Consumption]
+        """
+        if self._consumptions is None:
+            self._consumptions = []
+
+        return self._consumptions
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @consumptions.setter
+    def consumptions(self, consumptions):
+        """
+        Replaces the consumptions of this node.
+
+        :param list[enarksh_lib.xml_generator.consumption.Consumption.Consumption] consumptions: The consumptions.
+        """
+        self._consumptions = consumptions
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _copy(self):
+        """
+        Returns a shallow copy of this node without child nodes, parent node, and dependencies. The copy has its own
+        ports, consumptions, and resources.
+
+        Subclasses with mutable attributes or with __slots__ (other than the attributes of this class) must override
+        this method.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        # Much faster than copy.copy().
+        node = self.__class__.__new__(self.__class__)
+        if hasattr(self, '__dict__'):
+            node.__dict__.update(self.__dict__)
+        node._name = self._name
+        node._child_nodes = None
+        node._consumptions = list(map(copy.copy, self._consumptions)) if self._consumptions else None
+        node.input_ports = NamedList('port_name', [port._copy(node) for port in self.input_ports])
+        node.output_ports = NamedList('port_name', [port._copy(node) for port in self.output_ports])
+        node.parent = None
+        node._resources = list(map(copy.copy, self._resources)) if self._resources else None
+        node._username = self._username
+        node.digest = None
+        node._dirty = self._dirty
+        node._dirty_descendants = self._dirty_descendants
+
+        return node
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _detach_dependencies(self):
+        """
+        Removes all dependencies between the ports of this node and its descendants and returns the removed
+        dependencies as indexes of the ports, see _get_ports(). Without dependencies between ports a node tree can be
+        pickled without deep recursion. This node must not have dependencies on ports outside its descendants.
+
+        :rtype: (list[list[int]],list[list[int]])
+        """
+        ports = self._get_ports()
+        indexes = {port: index for index, port in enumerate(ports)}
+
+        predecessors = []
+        successors = []
+        for port in ports:
+            try:
+                predecessors.append([indexes[predecessor] for predecessor in port.predecessors])
+                successors.append([indexes[successor] for successor in port.successors])
+            except KeyError:
+                raise ValueError("Port '{0}' of node '{1}' depends on a port outside node '{2}'".format(
+                    port.port_name, port.node.get_path(), self.get_path()))
+
+        for port in ports:
+            port.predecessors = port.PORT_SET()
+            port.successors = port.PORT_SET()
+
+        return predecessors, successors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def finalize(self, reference=False, executor=None):
         """
         Ensures that all required dependencies between the 'all' input and output ports are present and removes
         redundant dependencies between ports and nodes.
+
+        Before purging the dependencies are checked for cycles, see find_cycles().
+
+        Only the nodes that have been changed since the last finalize (see mark_dirty()) are finalized again. The
+        result is the same as finalizing all nodes.
+
+        :param bool reference: If True, the reference (i.e. port by port) implementation of purge() is used.
+        :param concurrent.futures.Executor|None executor: If not None, the executor (e.g. a process pool) for purging
+                                                          the dependencies in parallel, see PortGraph.purge().
         """
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            start = time.perf_counter()
+
         self.ensure_dependencies()
-        self.purge()
+
+        if instrumentation is not None:
+            start = instrumentation.add_time('ensure_dependencies', self, start)
+
+        nodes = self._get_dirty_nodes()
+
+        detector = CycleDetector()
+        for node in nodes:
+            detector.add_scope(node)
+        cycles = detector.find_cycles()
+        if cycles:
+            raise ValueError("Node '{0}' has cyclic dependencies:\n{1}".format(
+                self.get_path(),
+                '\n'.join(' -> '.join(cycle + cycle[:1]) for cycle in cycles)))
+
+        if instrumentation is not None:
+            start = instrumentation.add_time('find_cycles', self, start)
+
+        if reference:
+            self.purge(True)
+        else:
+            graph = PortGraph()
+            for port in self.input_ports:
+                graph.add_port(port)
+            for node in nodes:
+                graph.add_scope(node)
+            graph.purge(executor)
+
+        if instrumentation is not None:
+            instrumentation.add_time('purge', self, start)
+
+        self._mark_clean()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def find_cycles(self):
+        """
+        Returns the cycles in the dependencies between the ports of this node and its descendants. Each cycle is a list
+        of labels (path of the node, direction, and name of the port) where each port depends on the next port and the
+        last port depends on the first port.
+
+        :rtype: list[list[str]]
+        """
+        detector = CycleDetector()
+        detector.add_node(self)
+
+        return detector.find_cycles()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_dirty_nodes(self):
+        """
+        Returns this node and all its descendants that have been changed since the last finalize.
+
+        :rtype: list[enarksh_lib.xml_generator.node.Node.Node]
+        """
+        nodes = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._dirty:
+                nodes.append(node)
+            if node._dirty_descendants:
+                for child_node in reversed(node.child_nodes):
+                    if child_node._dirty or child_node._dirty_descendants:
+                        stack.append(child_node)
+
+        return nodes
 
     # ------------------------------------------------------------------------------------------------------------------
     @abc.abstractmethod
@@ -185,9 +594,9 @@ class Node(metaclass=abc.ABCMeta):
                 port.generate_xml(input_ports)
 
         # Generate XML for consumptions.
-        if self.consumptions:
+        if self._consumptions:
             consumptions = SubElement(parent, 'Consumptions')
-            for consumption in self.consumptions:
+            for consumption in self._consumptions:
                 consumption.generate_xml(consumptions)
 
         # Generate XML for output ports.
@@ -197,17 +606,30 @@ class Node(metaclass=abc.ABCMeta):
                 port.generate_xml(output_ports)
 
         # Generate XML for resources.
-        if self.resources:
+        if self._resources:
             resources = SubElement(parent, 'Resources')
-            for resource in self.resources:
+            for resource in self._resources:
                 resource.generate_xml(resources)
 
         # Generate XML for nodes.
-        if self.child_nodes:
+        if self._child_nodes:
             child_nodes = SubElement(parent, 'Nodes')
-            for node in self.child_nodes:
-                node.pre_generate_xml()
-                node.generate_xml(child_nodes)
+            for node in self._child_nodes:
+                if isinstance(child_nodes, XmlElement):
+                    # The writer might reuse the XML of an identical node or write the node later.
+                    child_nodes.writer.write_node(node, child_nodes)
+                else:
+                    node.pre_generate_xml()
+                    node.generate_xml(child_nodes)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_child_nodes(self):
+        """
+        Returns the child nodes of this node. Unlike child_nodes an empty list of child nodes is not created.
+
+        :rtype: list[enarksh_lib.xml_generator.node.Node.Node]
+        """
+        return self._child_nodes or ()
 
     # ------------------------------------------------------------------------------------------------------------------
     def get_child_node(self, name):
@@ -225,32 +647,63 @@ class Node(metaclass=abc.ABCMeta):
         return ret
 
     # ------------------------------------------------------------------------------------------------------------------
-    def get_implicit_dependencies_input_ports(self, port_name, ports, level):
+    @classmethod
+    def _get_implicit_dependencies_hooks(cls):
+        """
+        Returns whether this class overrides get_implicit_dependencies_input_ports() and
+        get_implicit_dependencies_output_ports(). The implicit dependencies of the ports of nodes of such a class are
+        found by calling the overriding method, also when purging with a PortGraph.
+
+        :rtype: (bool,bool)
         """
-        :param string port_name:
-        :param list[] ports:
-        :param int    level:
+        hooks = Node._implicit_dependencies_hooks.get(cls)
+        if hooks is None:
+            hooks = (cls.get_implicit_dependencies_input_ports is not Node.get_implicit_dependencies_input_ports,
+                     cls.get_implicit_dependencies_output_ports is not Node.get_implicit_dependencies_output_ports)
+            Node._implicit_dependencies_hooks[cls] = hooks
+
+        return hooks
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_implicit_dependencies_input_ports(self, port_name, ports, level):
         """
-        port = self.get_input_port(port_name)
+        Adds an input port of this node (if level > 0) and its implicit dependencies to a list of ports.
 
-        if port not in ports:
-            if level:
-                ports.append(port)
-            port.get_dependencies_ports(ports, level + 1)
+        You MAY override this method in your concrete class if the input ports of your node have other implicit
+        dependencies. Overriding this method disables the single-pass purge (see PortGraph) for the scopes that contain
+        your node.
+
+        :param str                                            port_name: The name of the input port.
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports:     The implicit dependencies found so far.
+        :param int                                            level:     The level of the input port.
+        """
+        self.get_input_port(port_name).walk_implicit_dependencies(ports, level)
 
     # ------------------------------------------------------------------------------------------------------------------
     def get_implicit_dependencies_output_ports(self, port_name, ports, level):
         """
-        :param string port_name:
-        :param list[] ports:
-        :param int    level:
+        Adds an output port of this node (if level > 0) and its implicit dependencies to a list of ports.
+
+        You MAY override this method in your concrete class if the output ports of your node have other implicit
+        dependencies (by default the output ports of command jobs depend implicitly on input port 'all', see
+        get_implicit_input_port_name()). Overriding this method disables the single-pass purge (see PortGraph) for the
+        scopes that contain your node.
+
+        :param str                                            port_name: The name of the output port.
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports:     The implicit dependencies found so far.
+        :param int                                            level:     The level of the output port.
+        """
+        self.get_output_port(port_name).walk_implicit_dependencies(ports, level)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_implicit_input_port_name(self):
         """
-        port = self.get_output_port(port_name)
+        Returns the name of the input port on which all output ports of this node depend implicitly. Returns None if
+        the output ports of this node have no implicit dependencies.
 
-        if port not in ports:
-            if level:
-                ports.append(port)
-            port.get_dependencies_ports(ports, level + 1)
+        :rtype: None|str
+        """
+        return None
 
     # ------------------------------------------------------------------------------------------------------------------
     def get_input_port(self, name):
@@ -290,6 +743,75 @@ class Node(metaclass=abc.ABCMeta):
 
         return ret
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_ports(self):
+        """
+        Returns all ports of this node and its descendants in preorder of the nodes, first the input ports then the
+        output ports of each node. The child nodes of deferred nodes are not created.
+
+        :rtype: list[enarksh_lib.xml_generator.port.Port.Port]
+        """
+        ports = []
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            ports.extend(node.input_ports)
+            ports.extend(node.output_ports)
+            stack.extend(reversed(node._child_nodes or ()))
+
+        return ports
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_digest(self, digests=None):
+        """
+        Returns the digest of the subtree of this node, i.e. the structural hash (see get_structural_hash()) in
+        hexadecimal notation.
+
+        The digests of the nodes in the subtree are kept until the nodes are changed (see mark_dirty()), hence after a
+        change only the digests of the changed nodes and their ancestors are computed again. The digests of nodes that
+        have been changed since the last finalize are not kept. If the creation of the child nodes of a compound node
+        has been deferred, the child nodes are created and released again.
+
+        :param dict|None digests: If not None, the digests of the nodes that are not kept are stored in and reused from
+                                  this dict, e.g. when computing the digests of the nodes in a changed subtree top down.
+
+        :rtype: str
+        """
+        if self.digest is not None:
+            return self.digest
+        if digests is not None and self in digests:
+            return digests[self]
+
+        computed = {}
+
+        stack = [(self, None)]
+        while stack:
+            node, deferred = stack.pop()
+            if deferred is None:
+                digest = node.digest
+                if digest is None and digests is not None:
+                    digest = digests.get(node)
+                if digest is None:
+                    stack.append((node, getattr(node, '_deferred', False)))
+                    for child_node in node._get_child_nodes():
+                        stack.append((child_node, None))
+                else:
+                    computed[node] = digest
+            else:
+                child_hashes = [bytes.fromhex(computed.pop(child_node)) for child_node in node._child_nodes or ()]
+                digest = node._compute_structural_hash(child_hashes).hex()
+                computed[node] = digest
+                if deferred:
+                    node._release_child_nodes()
+                # The digest is kept only if a change of the subtree clears the digest, see mark_dirty().
+                if not (node._dirty or node._dirty_descendants or (node.parent is not None and node.parent._dirty)):
+                    node.digest = digest
+                elif digests is not None:
+                    digests[node] = digest
+
+        return computed[self]
+
     # ------------------------------------------------------------------------------------------------------------------
     def get_path(self):
         """
@@ -297,9 +819,104 @@ class Node(metaclass=abc.ABCMeta):
 
         :rtype: str
         """
-        path = self.parent.get_path() if self.parent else "/"
+        if self.parent:
+            return self.parent.get_path() + '/' + self.name
+
+        return '/' + self.name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_structural_hash(self):
+        """
+        Returns a stable hash of the XML of this node, i.e. a hash over the name, username, ports and dependencies,
+        consumptions, resources, and (recursively) child nodes of this node. Nodes with the same structural hash
+        generate the same XML. The hash does not depend on the process, hence it can be stored.
+
+        :rtype: bytes
+        """
+        return self.get_structural_hashes()[self]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _compute_structural_hash(self, child_hashes):
+        """
+        Returns the structural hash of this node given the structural hashes of its child nodes.
+
+        :param list[bytes] child_hashes: The structural hashes of the child nodes of this node (in order).
+
+        :rtype: bytes
+        """
+        hasher = hashlib.sha256()
+        self.update_hash(hasher)
+        hasher.update(repr(len(child_hashes)).encode())
+        for child_hash in child_hashes:
+            hasher.update(child_hash)
+
+        return hasher.digest()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_structural_hashes(self):
+        """
+        Returns the structural hashes (see get_structural_hash()) of this node and all its descendants.
+
+        :rtype: dict[enarksh_lib.xml_generator.node.Node.Node,bytes]
+        """
+        hashes = {}
 
-        return path + self.name
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                hashes[node] = node._compute_structural_hash([hashes[child_node]
+                                                              for child_node in node._get_child_nodes()])
+            else:
+                stack.append((node, True))
+                for child_node in node._get_child_nodes():
+                    stack.append((child_node, False))
+
+        return hashes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def mark_dirty(self):
+        """
+        Marks the child nodes, ports, or dependencies defined within this node as changed since the last finalize.
+
+        Changes made with the methods of nodes and ports and changes of the name, the username, and the path and the
+        arguments of command jobs are tracked automatically. This method must be called only after changing a node in
+        another way, e.g. by appending a port to a list of ports directly, or after changing a property that is part of
+        the digest of the node (e.g. the consumptions) after the digest has been computed, see get_digest().
+        """
+        if not self._dirty:
+            self._dirty = True
+            # The dependencies of the input ports of the child nodes are defined within this node.
+            for child_node in self._child_nodes or ():
+                child_node.digest = None
+        self.digest = None
+        self._mark_ancestors_dirty()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _mark_ancestors_dirty(self):
+        """
+        Marks all ancestors of this node as having a changed descendant.
+        """
+        node = self.parent
+        while node is not None and not node._dirty_descendants:
+            node._dirty_descendants = True
+            node.digest = None
+            node = node.parent
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _mark_clean(self):
+        """
+        Marks this node and all its descendants as not changed since the last finalize.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._dirty_descendants:
+                for child_node in node._child_nodes or ():
+                    if child_node._dirty or child_node._dirty_descendants:
+                        stack.append(child_node)
+            node._dirty = False
+            node._dirty_descendants = False
 
     # ------------------------------------------------------------------------------------------------------------------
     def make_input_port(self, name):
@@ -310,9 +927,16 @@ class Node(metaclass=abc.ABCMeta):
 
         :rtype: enarksh_lib.xml_generator.port.Port.Port
         """
+        if self.search_input_port(name):
+            raise ValueError("Node '{0}' has already an input port with name '{1}'".format(self.get_path(), name))
+
         port = InputPort(self, name)
         self.input_ports.append(port)
 
+        self.mark_dirty()
+        if self.parent is not None:
+            self.parent.mark_dirty()
+
         return port
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -324,11 +948,42 @@ class Node(metaclass=abc.ABCMeta):
 
         :rtype: enarksh_lib.xml_generator.port.Port.Port
         """
+        if self.search_output_port(name):
+            raise ValueError("Node '{0}' has already an output port with name '{1}'".format(self.get_path(), name))
+
         port = OutputPort(self, name)
         self.output_ports.append(port)
 
+        self.mark_dirty()
+        if self.parent is not None:
+            self.parent.mark_dirty()
+
         return port
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def name(self):
+        """
+        The name of this node.
+
+        :rtype: str
+        """
+        return self._name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @name.setter
+    def name(self, name):
+        """
+        Renames this node. A child node can not be renamed, because the child nodes of a node are indexed by name.
+
+        :param str name: The new name of this node.
+        """
+        if self.parent is not None:
+            raise ValueError("Node '{0}' can not be renamed while it is a child node".format(self.get_path()))
+
+        self._name = sys.intern(name) if type(name) is str else name
+        self._clear_digests()
+
     # ------------------------------------------------------------------------------------------------------------------
     def pre_generate_xml(self):
         """
@@ -340,50 +995,141 @@ class Node(metaclass=abc.ABCMeta):
         pass
 
     # ------------------------------------------------------------------------------------------------------------------
-    def purge(self):
+    def purge(self, reference=False, executor=None):
         """
         Removes duplicate dependencies and dependencies that are dependencies of predecessors.
+
+        By default all ports of this node and its descendants are purged at once by a PortGraph. The reference
+        implementation purges port by port and is kept for equivalence testing.
+
+        :param bool reference: If True, the reference implementation is used.
+        :param concurrent.futures.Executor|None executor: If not None, the executor (e.g. a process pool) for purging
+                                                          the dependencies in parallel, see PortGraph.purge().
         """
-        for port in self.input_ports:
-            port.purge()
+        if reference:
+            for port in self.input_ports:
+                port.purge()
 
-        for node in self.child_nodes:
-            node.purge()
+            for node in self._child_nodes or ():
+                node.purge(True)
 
-        for port in self.output_ports:
-            port.purge()
+            for port in self.output_ports:
+                port.purge()
+        else:
+            graph = PortGraph()
+            graph.add_node(self)
+            graph.purge(executor)
 
     # ------------------------------------------------------------------------------------------------------------------
     def remove_child_node(self, node_name):
         """
         Removes node 'node_name' as a child node. The dependencies of any successor of 'node' will be replaced
-        with all dependencies of the removed node.
+        with all dependencies of the removed node, see remove_child_nodes().
 
         :param str node_name:
         """
-        node = None
-
-        # Find and remove node 'node_name'.
-        for tmp in self.child_nodes:
-            if tmp.name == node_name:
-                node = tmp
-                self.child_nodes.remove(tmp)
-                break
+        self.remove_child_nodes([node_name])
 
-        if not node:
-            raise Exception("Node '{0}' doesn't have child node '{1}'".format(self.get_path(), node_name))
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_child_nodes(self, nodes):
+        """
+        Removes multiple child nodes at once. The dependencies of any successor of a removed node will be replaced with
+        all dependencies of the removed node. If a removed node depends on another removed node the dependencies of the
+        latter are used instead, and so on.
 
-        # Get all dependencies of the node.
-        deps = []
-        for port in node.input_ports:
-            for dep in port.predecessors:
-                deps.append(dep)
+        The successors are the input ports of the remaining child nodes and the output ports of this node. Predecessors
+        are matched by identity of the node (not by name), and each successor gets the dependencies of a removed node
+        once, regardless of how many ports of the removed node it depends. The input ports of the removed nodes are
+        detached from their predecessors, i.e. the removed nodes keep no dependencies on nodes of this node.
 
-        for tmp in self.child_nodes:
-            tmp.replace_node_dependency(node_name, deps)
+        :param iterable[str]|callable nodes: The names of the child nodes or a function that returns True for each child
+                                             node that must be removed.
+        """
+        # Find the nodes that must be removed.
+        if callable(nodes):
+            removed = [node for node in self.child_nodes if nodes(node)]
+        else:
+            removed = []
+            for node_name in nodes:
+                node = self.search_child_node(node_name)
+                if not node:
+                    raise Exception("Node '{0}' doesn't have child node '{1}'".format(self.get_path(), node_name))
+                removed.append(node)
+        removed = set(removed)
+        if not removed:
+            return
+
+        # Find all ports within this node that depend on a removed node.
+        successors = OrderedDict()
+        for node in removed:
+            for port in itertools.chain(node.input_ports, node.output_ports):
+                for successor in port.successors:
+                    if successor.node not in removed and successor.get_scope() is self:
+                        successors[successor] = None
+
+        dependencies = self._get_removed_dependencies(removed)
+
+        # Replace the dependencies on the removed nodes, port by port.
+        for port in successors:
+            obsolete = [predecessor for predecessor in port.predecessors if predecessor.node in removed]
+            for predecessor in obsolete:
+                port.remove_dependency(predecessor)
+            for predecessor in obsolete:
+                for dependency in dependencies[predecessor.node]:
+                    port.add_dependency(dependency)
+
+        # Detach the removed nodes from their predecessors.
+        for node in removed:
+            for port in node.input_ports:
+                for predecessor in list(port.predecessors):
+                    port.remove_dependency(predecessor)
+
+        self.child_nodes[:] = [node for node in self.child_nodes if node not in removed]
+        for node in removed:
+            node.parent = None
+        self.mark_dirty()
 
-        for port in self.output_ports:
-            port.replace_node_dependency(node_name, deps)
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _get_removed_dependencies(removed):
+        """
+        Returns for each node that will be removed the ports on which the node depends. Dependencies on other removed
+        nodes are replaced with the dependencies of those nodes.
+
+        :param set[enarksh_lib.xml_generator.node.Node.Node] removed: The nodes that will be removed.
+
+        :rtype: dict[enarksh_lib.xml_generator.node.Node.Node,list[enarksh_lib.xml_generator.port.Port.Port]]
+        """
+        dependencies = {}
+        for root in removed:
+            if root in dependencies:
+                continue
+
+            # Iterative depth first search, a node gets its dependencies after all removed nodes it depends on.
+            dependencies[root] = None
+            ports = [port for input_port in root.input_ports for port in input_port.predecessors]
+            stack = [(root, ports, iter(ports))]
+            while stack:
+                node, ports, it = stack[-1]
+                for port in it:
+                    if port.node in removed and port.node not in dependencies:
+                        dependencies[port.node] = None
+                        ports = [predecessor for input_port in port.node.input_ports
+                                 for predecessor in input_port.predecessors]
+                        stack.append((port.node, ports, iter(ports)))
+                        break
+                else:
+                    stack.pop()
+                    result = OrderedDict()
+                    for port in ports:
+                        if port.node in removed:
+                            # A cyclic dependency between removed nodes is skipped.
+                            result.update((dependency, None) for dependency in dependencies[port.node] or ())
+                        else:
+                            result[port] = None
+                    dependencies[node] = list(result)
+
+        return dependencies
 
     # ------------------------------------------------------------------------------------------------------------------
     def replace_node_dependency(self, node_name, dependencies):
@@ -396,6 +1142,76 @@ class Node(metaclass=abc.ABCMeta):
         for port in self.input_ports:
             port.replace_node_dependency(node_name, dependencies)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _resolve_dependency_port(self, node_name, port_name, successor, ports, errors):
+        """
+        Returns the port of a dependency, see add_dependency(). If the node or port doesn't exist, returns None and
+        appends a message to errors.
+
+        :param str       node_name: The name of the node (use NODE_SELF_NAME for the this node).
+        :param str       port_name: The name of the port.
+        :param bool      successor: If True the port of the successor is resolved, otherwise the port of the
+                                    predecessor.
+        :param dict      ports:     The ports resolved so far. The resolved port is added.
+        :param list[str] errors:    The errors found so far.
+
+        :rtype: None|enarksh_lib.xml_generator.port.Port.Port
+        """
+        key = (node_name, port_name, successor)
+
+        if not port_name:
+            port_name = self.ALL_PORT_NAME
+
+        port = None
+        if node_name == self.NODE_SELF_NAME:
+            node = self
+        else:
+            node = self.search_child_node(node_name)
+            if not node:
+                errors.append("unknown child node '{0}'".format(node_name))
+
+        if node:
+            # A successor is an input port of a child node or an output port of this node, and vice versa.
+            if successor != (node is self):
+                port = node.search_input_port(port_name)
+                if not port and port_name == self.ALL_PORT_NAME:
+                    port = node.make_input_port(port_name)
+                if not port:
+                    errors.append("node '{0}' has no input port '{1}'".format(node_name, port_name))
+            else:
+                port = node.search_output_port(port_name)
+                if not port and port_name == self.ALL_PORT_NAME:
+                    port = node.make_output_port(port_name)
+                if not port:
+                    errors.append("node '{0}' has no output port '{1}'".format(node_name, port_name))
+
+        ports[key] = port
+
+        return port
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def resources(self):
+        """
+        The resources of this node.
+
+        :rtype: list[enarksh_lib.xml_generator.resource.Resource.Resource]
+        """
+        if self._resources is None:
+            self._resources = []
+
+        return self._resources
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @resources.setter
+    def resources(self, resources):
+        """
+        Replaces the resources of this node.
+
+        :param list[enarksh_lib.xml_generator.resource.Resource.Resource] resources: The resources.
+        """
+        self._resources = resources
+
     # ------------------------------------------------------------------------------------------------------------------
     def search_child_node(self, name):
         """
@@ -406,13 +1222,7 @@ class Node(metaclass=abc.ABCMeta):
 
         :rtype: None|enarksh_lib.xml_generator.node.Node.Node
         """
-        ret = None
-        for node in self.child_nodes:
-            if node.name == name:
-                ret = node
-                break
-
-        return ret
+        return self.child_nodes.get(name)
 
     # ------------------------------------------------------------------------------------------------------------------
     def search_input_port(self, name):
@@ -424,13 +1234,7 @@ class Node(metaclass=abc.ABCMeta):
 
         :rtype: None|enarksh_lib.xml_generator.port.InputPort.InputPort
         """
-        ret = None
-        for port in self.input_ports:
-            if port.port_name == name:
-                ret = port
-                break
-
-        return ret
+        return self.input_ports.get(name)
 
     # ------------------------------------------------------------------------------------------------------------------
     def search_output_port(self, name):
@@ -440,15 +1244,9 @@ class Node(metaclass=abc.ABCMeta):
 
         :param str name: The name of the output port.
 
-        :rtype: None|enarksh_lib.xml_generator.port.InputPort.InputPort
+        :rtype: None|enarksh_lib.xml_generator.port.OutputPort.OutputPort
         """
-        ret = None
-        for port in self.output_ports:
-            if port.port_name == name:
-                ret = port
-                break
-
-        return ret
+        return self.output_ports.get(name)
 
     # ------------------------------------------------------------------------------------------------------------------
     def ensure_dependencies_input_port(self):
@@ -483,7 +1281,7 @@ class Node(metaclass=abc.ABCMeta):
         """
         input_port_all = self.get_input_port(self.ALL_PORT_NAME)
         for input_port in self.input_ports:
-            for port in input_port.predecessors:
+            for port in list(input_port.predecessors):
                 if port.node != self.parent:
                     input_port_all.add_dependency(port.node.get_output_port(self.ALL_PORT_NAME))
 
@@ -497,15 +1295,83 @@ class Node(metaclass=abc.ABCMeta):
           this node.
         This is done recursively for all child node.
 
+        Dependencies of nodes that have not been changed since the last finalize are present already and are skipped.
+
         Remember: Redundant and duplicate dependencies are removed by purge().
         """
-        if self.child_nodes:
+        if self._child_nodes:
+            # Dependencies added below mark this node as changed, hence we must test this node before the child nodes.
+            dirty = self._dirty
+
             # Apply this method recursively for all child node.
-            for node in self.child_nodes:
+            self._ensure_dependencies_child_nodes()
+
+            if dirty:
+                self.ensure_dependencies_input_port()
+                self.ensure_dependencies_output_port()
+
+            if dirty or (self.parent is not None and self.parent._dirty):
+                self.ensure_dependencies_self()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _ensure_dependencies_child_nodes(self):
+        """
+        Applies ensure_dependencies() to all child nodes that might miss dependencies, i.e. when the child node, any of
+        its descendants, or this node has been changed since the last finalize.
+        """
+        for node in self.child_nodes:
+            if self._dirty or node._dirty or node._dirty_descendants:
                 node.ensure_dependencies()
 
-            self.ensure_dependencies_input_port()
-            self.ensure_dependencies_output_port()
-            self.ensure_dependencies_self()
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this node that are part of its XML, excluding the child nodes.
+
+        Subclasses that generate additional XML must override this method.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        # Nodes of different classes with the same generate_xml() method (e.g. a compound node and the same compound
+        # node loaded from XML) generate the same XML.
+        generate_xml = self.__class__.generate_xml
+        hasher.update(repr((generate_xml.__module__,
+                            generate_xml.__qualname__,
+                            self.name,
+                            self.username,
+                            len(self.input_ports),
+                            len(self._consumptions or ()),
+                            len(self.output_ports),
+                            len(self._resources or ()))).encode())
+
+        for port in self.input_ports:
+            port.update_hash(hasher)
+        for consumption in self._consumptions or ():
+            consumption.update_hash(hasher)
+        for port in self.output_ports:
+            port.update_hash(hasher)
+        for resource in self._resources or ():
+            resource.update_hash(hasher)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def username(self):
+        """
+        The user under which this node or its child nodes must run.
+
+        :rtype: str
+        """
+        return self._username
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @username.setter
+    def username(self, username):
+        """
+        Sets the user under which this node or its child nodes must run.
+
+        :param str username: The user.
+        """
+        self._username = username
+        self._clear_digests()
 
 # ----------------------------------------------------------------------------------------------------------------------
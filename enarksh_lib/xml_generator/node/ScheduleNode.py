@@ -6,11 +6,19 @@ Copyright 2015-2016 Set Based IT Consultancy
 Licence MIT
 """
 import abc
+import io
+import sys
+import time
 from xml.dom import minidom
 from xml.etree import ElementTree
-from xml.etree.ElementTree import Element, SubElement
+from xml.etree.ElementTree import Element
 
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
 from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.writer.Compression import Compression
+from enarksh_lib.xml_generator.writer.XmlChunkStream import XmlChunkStream
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
+from enarksh_lib.xml_generator.writer.XmlWriter import XmlWriter
 
 
 class ScheduleNode(CompoundJobNode, metaclass=abc.ABCMeta):
@@ -18,8 +26,38 @@ class ScheduleNode(CompoundJobNode, metaclass=abc.ABCMeta):
     Class for generating XML messages for elements of type 'ScheduleType'.
     """
 
+    __slots__ = ()
+
+    BACKEND_ELEMENT_TREE = 'etree'
+    """
+    Serialization backend that builds an ElementTree (and a minidom document for pretty printing).
+
+    :type: str
+    """
+
+    BACKEND_STRING = 'string'
+    """
+    Serialization backend that writes the XML directly.
+
+    :type: str
+    """
+
     # ------------------------------------------------------------------------------------------------------------------
-    def get_xml(self, encoding='utf-8'):
+    def fingerprint(self):
+        """
+        Returns the fingerprint of this schedule, i.e. the root of a Merkle tree over the (finalized) node tree, without
+        generating XML. Schedules with equal fingerprints generate equal XML.
+
+        Sets the digest of each (finalized) node in this schedule to the digest of the subtree of the node, see
+        get_digest(). Changed subtrees of two schedules can be found by comparing the digests of the child nodes of
+        nodes with different digests.
+
+        :rtype: str
+        """
+        return self.get_digest()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_xml(self, encoding='utf-8', pretty=True, backend=BACKEND_ELEMENT_TREE, cache=None):
         """
         Returns the XML-code of this schedule.
 
@@ -27,17 +65,154 @@ class ScheduleNode(CompoundJobNode, metaclass=abc.ABCMeta):
         mode (the file will encoded the requested encoding). Or you can convert the byte string to a string with
         .decode(encoding).
 
+        Both backends give identical output. The string backend writes the XML directly without building an
+        ElementTree and a DOM and is much faster. The string backend can reuse the XML of identical subtrees written
+        before from a fragment cache.
+
         :param str encoding: The encoding of the XML.
+        :param bool pretty:  If True, the XML is pretty printed (like minidom). Otherwise, the XML is compact (like
+                             ElementTree.tostring()).
+        :param str backend:  The serialization backend: BACKEND_ELEMENT_TREE or BACKEND_STRING.
+        :param enarksh_lib.xml_generator.writer.FragmentCache.FragmentCache|None cache: The cache for the XML of
+                                                                                         subtrees (string backend only).
 
         :rtype: bytes
         """
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            start = time.perf_counter()
+
+        if backend == self.BACKEND_STRING:
+            stream = io.BytesIO()
+            writer = XmlWriter(stream, encoding, ' ', sys.maxsize, pretty, cache)
+            self.generate_xml(writer.root)
+            writer.close()
+
+            if instrumentation is not None:
+                instrumentation.add_time('generate_xml', self, start)
+
+            return stream.getvalue()
+
+        if backend != self.BACKEND_ELEMENT_TREE:
+            raise ValueError("Unknown backend '{0}'".format(backend))
+
+        if cache is not None:
+            raise ValueError('A fragment cache requires the string backend')
+
         tree = Element(None)
         self.generate_xml(tree)
 
-        xml_string = ElementTree.tostring(tree)
-        document = minidom.parseString(xml_string)
+        if instrumentation is not None:
+            start = instrumentation.add_time('generate_xml', self, start)
+
+        if not pretty:
+            xml = ElementTree.tostring(tree, encoding)
+        else:
+            xml_string = ElementTree.tostring(tree)
+            document = minidom.parseString(xml_string)
+            xml = document.toprettyxml(indent=' ', encoding=encoding)
+
+        if instrumentation is not None:
+            instrumentation.add_time('serialize', self, start)
+
+        return xml
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def iter_xml_chunks(self,
+                        chunk_size=65536,
+                        encoding='utf-8',
+                        indent=' ',
+                        pretty=True,
+                        compression=None,
+                        cache=None):
+        """
+        Returns an iterator over the XML-code of this schedule in chunks of encoded bytes, e.g. for sending the XML over
+        a socket.
+
+        The iterator is a generator that walks the node tree: the XML of a node is generated when the chunks generated
+        so far have been consumed (see XmlWriter.iterate()), hence the XML document is never held in memory as a whole
+        and an abandoned iterator holds no other resources. The node tree must not be modified while iterating. The
+        concatenation of the chunks is identical to the output of write_xml().
+
+        :param int chunk_size:       The size in bytes of the chunks (except the last chunk).
+        :param str encoding:         The encoding of the XML.
+        :param str indent:           The indentation per level.
+        :param bool pretty:          If True, the XML is pretty printed. Otherwise, the XML is compact.
+        :param str|None compression: The compression of the XML: Compression.GZIP, Compression.LZMA, or None.
+        :param enarksh_lib.xml_generator.writer.FragmentCache.FragmentCache|None cache: The cache for the XML of
+                                                                                         subtrees.
+
+        :rtype: iterator[bytes]
+        """
+        instrumentation = Instrumentation.active
+        elapsed = 0.0
+        start = time.perf_counter()
+
+        chunks = XmlChunkStream(chunk_size)
+        stream = Compression.open_writer(chunks, compression)
+        writer = XmlWriter(stream, encoding, indent, chunk_size, pretty, cache)
+        for _ in writer.iterate(self):
+            ready = chunks.get_chunks()
+            if ready:
+                # The time of the consumer is not included.
+                elapsed += time.perf_counter() - start
+                yield from ready
+                start = time.perf_counter()
+        writer.close()
+        if stream is not chunks:
+            stream.close()
+
+        if instrumentation is not None:
+            elapsed += time.perf_counter() - start
+            instrumentation.add_time('generate_xml', self, time.perf_counter() - elapsed)
+
+        yield from chunks.get_chunks(True)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write_xml(self,
+                  file_obj,
+                  encoding='utf-8',
+                  indent=' ',
+                  pretty=True,
+                  compression=None,
+                  buffer_size=65536,
+                  cache=None):
+        """
+        Writes the XML-code of this schedule to a binary stream while walking the node tree.
+
+        Unlike get_xml() the XML document is never held in memory as a whole. With the default indentation the
+        output is identical to the output of get_xml() with the same value for pretty. If compression is used the XML
+        is compressed while it is written.
+
+        With a fragment cache the XML of subtrees identical to subtrees written before (by any schedule in this process
+        using the same cache) is reused. The XML of a node must depend only on the properties included in its
+        structural hash, see Node.get_structural_hash(). The hash of a subtree is computed after pre_generate_xml() of
+        all nodes in the subtree has been called. Subtrees with deferred compound nodes are not cached.
+
+        :param file_obj:             The binary stream, e.g. a file opened in binary mode.
+        :param str encoding:         The encoding of the XML.
+        :param str indent:           The indentation per level.
+        :param bool pretty:          If True, the XML is pretty printed. Otherwise, the XML is compact.
+        :param str|None compression: The compression of the XML: Compression.GZIP, Compression.LZMA, or None.
+        :param int buffer_size:      The maximum number of characters buffered before writing to the stream.
+        :param enarksh_lib.xml_generator.writer.FragmentCache.FragmentCache|None cache: The cache for the XML of
+                                                                                         subtrees.
+        """
+        stream = Compression.open_writer(file_obj, compression)
+
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            start = time.perf_counter()
+
+        writer = XmlWriter(stream, encoding, indent, buffer_size, pretty, cache)
+        self.generate_xml(writer.root)
+        writer.close()
+
+        if instrumentation is not None:
+            instrumentation.add_time('generate_xml', self, start)
 
-        return document.toprettyxml(indent=' ', encoding=encoding)
+        if stream is not file_obj:
+            stream.close()
 
     # ------------------------------------------------------------------------------------------------------------------
     def ensure_dependencies(self):
@@ -46,8 +221,7 @@ class ScheduleNode(CompoundJobNode, metaclass=abc.ABCMeta):
         this method.
         """
         # Apply this method recursively for all child node.
-        for node in self.child_nodes:
-            node.ensure_dependencies()
+        self._ensure_dependencies_child_nodes()
 
     # ------------------------------------------------------------------------------------------------------------------
     def generate_xml(self, parent):
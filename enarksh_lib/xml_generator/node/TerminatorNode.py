@@ -5,9 +5,8 @@ Copyright 2015-2016 Set Based IT Consultancy
 
 Licence MIT
 """
-from xml.etree.ElementTree import SubElement
-
 from enarksh_lib.xml_generator.node.Node import Node
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class TerminatorNode(Node):
@@ -15,6 +14,8 @@ class TerminatorNode(Node):
     Class for generating XML messages for elements of type 'TerminatorType'.
     """
 
+    __slots__ = ()
+
     # ------------------------------------------------------------------------------------------------------------------
     def generate_xml(self, parent):
         """
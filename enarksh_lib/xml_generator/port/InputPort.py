@@ -13,6 +13,8 @@ class InputPort(Port):
     Class for generating XML messages for elements of type 'InputPortType'.
     """
 
+    __slots__ = ()
+
     # ------------------------------------------------------------------------------------------------------------------
     def get_implicit_dependencies_ports(self, ports, level):
         """
@@ -21,4 +23,23 @@ class InputPort(Port):
         """
         self.node.get_implicit_dependencies_input_ports(self.port_name, ports, level)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_scope(self):
+        """
+        Returns the node within which the dependencies of this port are defined, i.e. the parent node of the node of
+        this port.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        return self.node.parent
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _has_implicit_dependencies_hook(self):
+        """
+        Returns True if the node of this port overrides get_implicit_dependencies_input_ports().
+
+        :rtype: bool
+        """
+        return self.node._get_implicit_dependencies_hooks()[0]
+
 # ----------------------------------------------------------------------------------------------------------------------
@@ -13,6 +13,29 @@ class OutputPort(Port):
     Class for generating XML messages for elements of type 'OutputPortType'.
     """
 
+    __slots__ = ()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _add_implicit_dependencies(self, ports, seen, stack, level):
+        """
+        Adds this port to the implicit dependencies (if level > 0) and pushes the dependencies of this port on the
+        stack of the traversal. If the output ports of the node depend implicitly on an input port of the node (e.g.
+        command jobs), that input port is followed instead of the dependencies of this port.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param set[enarksh_lib.xml_generator.port.Port.Port]  seen:  The set of ports in 'ports'.
+        :param list[(iter,int)]                               stack: The stack of the traversal.
+        :param int                                            level: The level of this port.
+        """
+        name = self.node.get_implicit_input_port_name()
+        if name is None:
+            Port._add_implicit_dependencies(self, ports, seen, stack, level)
+        else:
+            if self not in seen and level:
+                ports.append(self)
+                seen.add(self)
+            self.node.get_input_port(name)._follow_implicit_dependencies(ports, seen, stack, level + 1)
+
     # ------------------------------------------------------------------------------------------------------------------
     def get_implicit_dependencies_ports(self, ports, level):
         """
@@ -23,4 +46,22 @@ class OutputPort(Port):
         """
         return self.node.get_implicit_dependencies_output_ports(self.port_name, ports, level)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_scope(self):
+        """
+        Returns the node within which the dependencies of this port are defined, i.e. the node of this port.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        return self.node
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _has_implicit_dependencies_hook(self):
+        """
+        Returns True if the node of this port overrides get_implicit_dependencies_output_ports().
+
+        :rtype: bool
+        """
+        return self.node._get_implicit_dependencies_hooks()[1]
+
 # ----------------------------------------------------------------------------------------------------------------------
@@ -6,7 +6,11 @@ Copyright 2015-2016 Set Based IT Consultancy
 Licence MIT
 """
 import abc
-from xml.etree.ElementTree import SubElement
+import sys
+from collections import OrderedDict
+
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class Port(metaclass=abc.ABCMeta):
@@ -20,6 +24,16 @@ class Port(metaclass=abc.ABCMeta):
     Token for node self.
     """
 
+    PORT_SET = dict if sys.version_info >= (3, 7) else OrderedDict
+    """
+    The type of the sets of predecessors and successors. As of Python 3.7 dictionaries are insertion-ordered and
+    much smaller than ordered dictionaries.
+
+    :type: type
+    """
+
+    __slots__ = ('node', 'port_name', 'predecessors', 'successors')
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, node, port_name):
         """
@@ -33,25 +47,27 @@ class Port(metaclass=abc.ABCMeta):
         :type: enarksh_lib.xml_generator.node.Node.Node
         """
 
-        self.port_name = port_name
+        self.port_name = sys.intern(port_name) if type(port_name) is str else port_name
         """
         The name of this port.
 
         :type: str
         """
 
-        self.predecessors = []
+        self.predecessors = self.PORT_SET()
         """
-        The dependencies of this port.
+        The dependencies of this port. Used as an insertion-ordered set, i.e. the keys are the ports and the values are
+        always None.
 
-        :type: list[enarksh_lib.xml_generator.port.Port.Port]
+        :type: dict[enarksh_lib.xml_generator.port.Port.Port,None]
         """
 
-        self.successors = []
+        self.successors = self.PORT_SET()
         """
-        The dependants of this port.
+        The dependants of this port. Used as an insertion-ordered set, i.e. the keys are the ports and the values are
+        always None.
 
-        :type: list[enarksh_lib.xml_generator.port.Port.Port]
+        :type: dict[enarksh_lib.xml_generator.port.Port.Port,None]
         """
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -61,8 +77,36 @@ class Port(metaclass=abc.ABCMeta):
 
         :param enarksh_lib.xml_generator.port.Port.Port port: The port that depends on this port.
         """
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.count('add_dependency')
+
         if port not in self.predecessors:
-            self.predecessors.append(port)
+            self.predecessors[port] = None
+            port.successors[self] = None
+            self._mark_dirty()
+        elif instrumentation is not None:
+            instrumentation.count('duplicate_dependency')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _copy(self, node):
+        """
+        Returns a copy of this port without dependencies.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node of the copy.
+
+        :rtype: enarksh_lib.xml_generator.port.Port.Port
+        """
+        # Much faster than copy.copy().
+        port = self.__class__.__new__(self.__class__)
+        if hasattr(self, '__dict__'):
+            port.__dict__.update(self.__dict__)
+        port.node = node
+        port.port_name = self.port_name
+        port.predecessors = self.PORT_SET()
+        port.successors = self.PORT_SET()
+
+        return port
 
     # ------------------------------------------------------------------------------------------------------------------
     def generate_xml(self, parent):
@@ -91,20 +135,92 @@ class Port(metaclass=abc.ABCMeta):
                 port_name = SubElement(dependency, 'PortName')
                 port_name.text = predecessor.port_name
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def _add_implicit_dependencies(self, ports, seen, stack, level):
+        """
+        Adds this port to the implicit dependencies (if level > 0) and pushes the dependencies of this port on the
+        stack of the traversal. See walk_implicit_dependencies().
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param set[enarksh_lib.xml_generator.port.Port.Port]  seen:  The set of ports in 'ports'.
+        :param list[(iter,int)]                               stack: The stack of the traversal.
+        :param int                                            level: The level of this port.
+        """
+        if self not in seen:
+            if level:
+                ports.append(self)
+                seen.add(self)
+            stack.append((iter(self.predecessors), level + 1))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _follow_implicit_dependencies(self, ports, seen, stack, level):
+        """
+        Like _add_implicit_dependencies(), but if the node of this port overrides
+        get_implicit_dependencies_input_ports() or get_implicit_dependencies_output_ports() (see
+        Node._get_implicit_dependencies_hooks()), the overriding method adds this port and its implicit dependencies
+        instead.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param set[enarksh_lib.xml_generator.port.Port.Port]  seen:  The set of ports in 'ports'.
+        :param list[(iter,int)]                               stack: The stack of the traversal.
+        :param int                                            level: The level of this port.
+        """
+        if self._has_implicit_dependencies_hook():
+            count = len(ports)
+            self.get_implicit_dependencies_ports(ports, level)
+            seen.update(ports[count:])
+        else:
+            self._add_implicit_dependencies(ports, seen, stack, level)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def _walk_dependencies(ports, seen, stack):
+        """
+        Walks depth first through the dependencies on the stack until the stack is empty.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param set[enarksh_lib.xml_generator.port.Port.Port]  seen:  The set of ports in 'ports'.
+        :param list[(iter,int)]                               stack: The stack of the traversal.
+        """
+        while stack:
+            iterator, level = stack[-1]
+            for port in iterator:
+                if port not in seen:
+                    if level:
+                        ports.append(port)
+                        seen.add(port)
+                    port._follow_implicit_dependencies(ports, seen, stack, level + 1)
+                    break
+            else:
+                stack.pop()
+
     # ------------------------------------------------------------------------------------------------------------------
     def get_dependencies_ports(self, ports, level):
         """
+        Adds the dependencies of this port and their implicit dependencies to a list of ports.
 
-        :param list[enarksh_lib.xml_generator.port.Port.Port] ports:
-        :param int                                            level:
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param int                                            level: The level of this port.
 
-        :rtype: list[]
+        :rtype: None
         """
-        for port in self.predecessors:
-            if port not in ports:
-                if level:
-                    ports.append(port)
-                port.get_implicit_dependencies_ports(ports, level + 1)
+        self._walk_dependencies(ports, set(ports), [(iter(self.predecessors), level)])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def walk_implicit_dependencies(self, ports, level):
+        """
+        Adds this port (if level > 0) and its implicit dependencies to a list of ports.
+
+        The traversal uses an explicit stack, hence the length of a chain of dependencies is not limited by the
+        recursion limit of Python.
+
+        :param list[enarksh_lib.xml_generator.port.Port.Port] ports: The implicit dependencies found so far.
+        :param int                                            level: The level of this port.
+        """
+        seen = set(ports)
+        stack = []
+        self._add_implicit_dependencies(ports, seen, stack, level)
+        self._walk_dependencies(ports, seen, stack)
 
     # ------------------------------------------------------------------------------------------------------------------
     @abc.abstractmethod
@@ -115,6 +231,47 @@ class Port(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @abc.abstractmethod
+    def get_scope(self):
+        """
+        Returns the node within which the dependencies of this port are defined.
+
+        :rtype: enarksh_lib.xml_generator.node.Node.Node
+        """
+        raise NotImplementedError()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @abc.abstractmethod
+    def _has_implicit_dependencies_hook(self):
+        """
+        Returns True if the node of this port overrides the method that adds the implicit dependencies of this port,
+        see get_implicit_dependencies_ports().
+
+        :rtype: bool
+        """
+        raise NotImplementedError()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def has_dependency(self, port):
+        """
+        Returns True if and only if a port is a dependency of this port.
+
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+
+        :rtype: bool
+        """
+        return port in self.predecessors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _mark_dirty(self):
+        """
+        Marks the scope of this port as changed since the last finalize.
+        """
+        scope = self.get_scope()
+        if scope is not None:
+            scope.mark_dirty()
+
     # ------------------------------------------------------------------------------------------------------------------
     def purge(self):
         """
@@ -122,19 +279,32 @@ class Port(metaclass=abc.ABCMeta):
         """
         # Get all implicit dependencies ports.
         implicit_dependencies = []
+        seen = set()
+        stack = []
         for port in self.predecessors:
-            port.get_implicit_dependencies_ports(implicit_dependencies, 0)
+            port._follow_implicit_dependencies(implicit_dependencies, seen, stack, 0)
+            self._walk_dependencies(implicit_dependencies, seen, stack)
 
-        # Create a new dependency array without implicit dependencies.
-        direct_dependencies = []
-        for port in self.predecessors:
-            if port not in implicit_dependencies:
+        # Remove the implicit dependencies.
+        count = len(self.predecessors)
+        for port in implicit_dependencies:
+            self.remove_dependency(port)
 
-                # Prevent duplicate dependencies.
-                if port not in direct_dependencies:
-                    direct_dependencies.append(port)
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.count('purged_dependency', count - len(self.predecessors))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_dependency(self, port):
+        """
+        Removes a port as a dependency of this port. If the port is not a dependency of this port nothing happens.
 
-        self.predecessors = direct_dependencies
+        :param enarksh_lib.xml_generator.port.Port.Port port: The port.
+        """
+        if port in self.predecessors:
+            del self.predecessors[port]
+            del port.successors[self]
+            self._mark_dirty()
 
     # ------------------------------------------------------------------------------------------------------------------
     def replace_node_dependency(self, node_name, dependencies):
@@ -144,20 +314,43 @@ class Port(metaclass=abc.ABCMeta):
         :param str    node_name:
         :param list[] dependencies:
         """
-        obsolete = []
-
         # Find any predecessor that depends on node 'node_name'.
-        for index, port in enumerate(self.predecessors):
-            if port.node.name == node_name:
-                obsolete.append(index)
+        obsolete = [port for port in self.predecessors if port.node.name == node_name]
 
         if obsolete:
             # Remove all dependencies of node 'node_name'.
-            for index in obsolete:
-                self.predecessors.pop(index)
+            for port in obsolete:
+                self.remove_dependency(port)
 
             # And replace those dependencies with 'dependencies'.
             for dep in dependencies:
-                self.predecessors.append(dep)
+                self.add_dependency(dep)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_dependency_names(self):
+        """
+        Returns the dependencies of this port as in the XML of this port, i.e. the pairs of node name and port name of
+        the predecessors of this port. The node name of a port of the parent node is NODE_SELF_NAME.
+
+        :rtype: list[(str,str)]
+        """
+        dependencies = []
+        for predecessor in self.predecessors:
+            if predecessor.node == self.node.parent:
+                dependencies.append((self.NODE_SELF_NAME, predecessor.port_name))
+            else:
+                dependencies.append((predecessor.node.name, predecessor.port_name))
+
+        return dependencies
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this port that are part of its XML, i.e. the name of this port and
+        its dependencies.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        hasher.update(repr((self.port_name, self.get_dependency_names())).encode())
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -5,9 +5,8 @@ Copyright 2015-2016 Set Based IT Consultancy
 
 Licence MIT
 """
-from xml.etree.ElementTree import SubElement
-
 from enarksh_lib.xml_generator.resource.Resource import Resource
+from enarksh_lib.xml_generator.writer.XmlElement import SubElement
 
 
 class CountingResource(Resource):
@@ -15,6 +14,8 @@ class CountingResource(Resource):
     Class for generating XML messages for elements of type 'CountingResourceType'.
     """
 
+    __slots__ = ('amount',)
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name, amount):
         """
@@ -46,4 +47,15 @@ class CountingResource(Resource):
         amount = SubElement(resource, 'Amount')
         amount.text = str(self.amount)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_hash(self, hasher):
+        """
+        Updates a hash object with the properties of this resource that are part of its XML.
+
+        :param hasher: The hash object, e.g. hashlib.sha256().
+        """
+        Resource.update_hash(self, hasher)
+
+        hasher.update(repr(str(self.amount)).encode())
+
 # ----------------------------------------------------------------------------------------------------------------------
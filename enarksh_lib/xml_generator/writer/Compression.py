@@ -0,0 +1,129 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import gzip
+import lzma
+from xml.etree import ElementTree
+
+
+class Compression:
+    """
+    Helper class for writing and reading compressed XML files with gzip or lzma (xz format).
+    """
+
+    GZIP = 'gzip'
+    """
+    Compression with gzip.
+
+    :type: str
+    """
+
+    LZMA = 'lzma'
+    """
+    Compression with lzma (xz format).
+
+    :type: str
+    """
+
+    _MAGIC = ((b'\x1f\x8b', GZIP),
+              (b'\xfd7zXZ\x00', LZMA))
+    """
+    The magic numbers at the start of compressed files.
+
+    :type: tuple[(bytes,str)]
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def open_writer(file_obj, compression):
+        """
+        Returns a binary stream that compresses all written data and writes the compressed data to another binary
+        stream. The returned stream must be closed after writing, this does not close the other stream.
+
+        :param file_obj:             The binary stream for the compressed data.
+        :param str|None compression: The compression: GZIP, LZMA, or None for no compression.
+        """
+        if compression is None:
+            return file_obj
+
+        if compression == Compression.GZIP:
+            # Without file name and time stamp the output depends on the data only.
+            return gzip.GzipFile('', 'wb', fileobj=file_obj, mtime=0)
+
+        if compression == Compression.LZMA:
+            return lzma.LZMAFile(file_obj, 'wb')
+
+        raise ValueError("Unknown compression '{0}'".format(compression))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def detect(data):
+        """
+        Returns the compression of data given the first bytes of the data.
+
+        :param bytes data: The first (at least 6) bytes of the data.
+
+        :rtype: str|None
+        """
+        for magic, compression in Compression._MAGIC:
+            if data.startswith(magic):
+                return compression
+
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def open_reader(file):
+        """
+        Returns a binary stream that reads the decompressed data of a file that is compressed with gzip or lzma or is
+        not compressed at all. The data is decompressed while reading.
+
+        :param str|* file: The path of the file or a binary stream. The stream must support peek() or seeking.
+        """
+        if isinstance(file, str):
+            with open(file, 'rb') as handle:
+                compression = Compression.detect(handle.read(6))
+
+            if compression == Compression.GZIP:
+                return gzip.open(file, 'rb')
+            if compression == Compression.LZMA:
+                return lzma.open(file, 'rb')
+
+            return open(file, 'rb')
+
+        if hasattr(file, 'peek'):
+            compression = Compression.detect(file.peek(6)[:6])
+        else:
+            position = file.tell()
+            compression = Compression.detect(file.read(6))
+            file.seek(position)
+
+        if compression == Compression.GZIP:
+            return gzip.GzipFile(fileobj=file, mode='rb')
+        if compression == Compression.LZMA:
+            return lzma.LZMAFile(file, 'rb')
+
+        return file
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def parse(file):
+        """
+        Parses a (compressed) XML file and returns the element tree.
+
+        :param str|* file: The path of the file or a binary stream. The stream must support peek() or seeking.
+
+        :rtype: xml.etree.ElementTree.ElementTree
+        """
+        stream = Compression.open_reader(file)
+        try:
+            return ElementTree.parse(stream)
+        finally:
+            if stream is not file:
+                stream.close()
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,154 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """
+    A least recently used cache for the serialized XML of nodes (i.e. XML fragments) keyed by the structural hash of the
+    nodes and the output format. The cache can be shared by XmlWriters in multiple threads.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, max_size=16777216):
+        """
+        Object constructor.
+
+        :param int max_size: The maximum total size in characters of the cached fragments.
+        """
+        self.max_size = max_size
+        """
+        The maximum total size in characters of the cached fragments.
+
+        :type: int
+        """
+
+        self.size = 0
+        """
+        The total size in characters of the cached fragments.
+
+        :type: int
+        """
+
+        self.hits = 0
+        """
+        The number of lookups that found a fragment.
+
+        :type: int
+        """
+
+        self.misses = 0
+        """
+        The number of lookups that did not find a fragment.
+
+        :type: int
+        """
+
+        self.evictions = 0
+        """
+        The number of fragments removed from the cache to make room for other fragments.
+
+        :type: int
+        """
+
+        self._fragments = OrderedDict()
+        """
+        The cached fragments, the least recently used fragment first.
+
+        :type: collections.OrderedDict[tuple,str]
+        """
+
+        self._lock = threading.Lock()
+        """
+        The lock for accessing the cache.
+
+        :type: threading.Lock
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        """
+        Returns the number of cached fragments.
+
+        :rtype: int
+        """
+        return len(self._fragments)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Removes all fragments from the cache and resets the statistics.
+        """
+        with self._lock:
+            self._fragments.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, key):
+        """
+        Returns a cached fragment. Returns None if the fragment is not in the cache.
+
+        :param tuple key: The key of the fragment.
+
+        :rtype: str|None
+        """
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._fragments.move_to_end(key)
+
+        return fragment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_statistics(self):
+        """
+        Returns the statistics of this cache.
+
+        :rtype: dict[str,int]
+        """
+        with self._lock:
+            return {'fragments': len(self._fragments),
+                    'size':      self.size,
+                    'max_size':  self.max_size,
+                    'hits':      self.hits,
+                    'misses':    self.misses,
+                    'evictions': self.evictions}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def put(self, key, fragment):
+        """
+        Adds a fragment to the cache. Removes the least recently used fragments if the cache is full. A fragment larger
+        than the maximum size of the cache is not cached.
+
+        :param tuple key:    The key of the fragment.
+        :param str fragment: The fragment.
+        """
+        if len(fragment) > self.max_size:
+            return
+
+        with self._lock:
+            old = self._fragments.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+
+            while self._fragments and self.size + len(fragment) > self.max_size:
+                _, evicted = self._fragments.popitem(False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+            self._fragments[key] = fragment
+            self.size += len(fragment)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,71 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+
+
+class XmlChunkStream:
+    """
+    A binary stream that collects the written data and hands it over in chunks of fixed size.
+
+    Used by ScheduleNode.iter_xml_chunks(): the XML writer writes the XML of a node to this stream and the chunks
+    collected so far are yielded before the XML of the next node is generated, hence only a few chunks are held in
+    memory at any time.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, chunk_size=65536):
+        """
+        Object constructor.
+
+        :param int chunk_size: The size in bytes of the chunks (except the last chunk).
+        """
+        if chunk_size < 1:
+            raise ValueError('The chunk size must be positive')
+
+        self._chunk_size = chunk_size
+        """
+        The size in bytes of the chunks (except the last chunk).
+
+        :type: int
+        """
+
+        self._buffer = bytearray()
+        """
+        The written data that is not yet handed over.
+
+        :type: bytearray
+        """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_chunks(self, final=False):
+        """
+        Returns the complete chunks written so far and removes them from this stream.
+
+        :param bool final: If True, the remaining data is returned too (as the last chunk).
+
+        :rtype: list[bytes]
+        """
+        size = self._chunk_size
+        length = len(self._buffer) if final else len(self._buffer) - len(self._buffer) % size
+        if not length:
+            return []
+
+        data = bytes(self._buffer[:length])
+        del self._buffer[:length]
+
+        return [data[offset:offset + size] for offset in range(0, length, size)]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write(self, data):
+        """
+        Writes data to this stream.
+
+        :param bytes data: The data.
+        """
+        self._buffer += data
+
+# ----------------------------------------------------------------------------------------------------------------------
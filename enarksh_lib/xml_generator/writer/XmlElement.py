@@ -0,0 +1,91 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+from xml.etree import ElementTree
+
+
+def SubElement(parent, tag):
+    """
+    Creates a child element of an XML element. The parent element is either an ElementTree element or an XML element of
+    an XmlWriter.
+
+    :param xml.etree.ElementTree.Element|XmlElement parent: The parent element.
+    :param str                                      tag:    The tag.
+
+    :rtype: xml.etree.ElementTree.Element|XmlElement
+    """
+    if isinstance(parent, XmlElement):
+        return parent.writer.sub_element(parent, tag)
+
+    return ElementTree.SubElement(parent, tag)
+
+
+class XmlElement:
+    """
+    An XML element that is written by an XmlWriter as soon as possible, i.e. when the next element is created. Supports
+    the part of the interface of xml.etree.ElementTree.Element used by the generate_xml() methods: creating child
+    elements with SubElement() and setting the text of an element.
+
+    The start tag of an element cannot be written when the element is created, because whether the element is empty,
+    has text, or has child elements is known only when the next element is created. Hence, an element object is
+    created for each element, but it has no __dict__ and is discarded as soon as it has been written.
+    """
+
+    __slots__ = ('writer', 'tag', 'level', 'opened', 'closed', 'text')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, writer, tag, level):
+        """
+        Object constructor.
+
+        :param enarksh_lib.xml_generator.writer.XmlWriter.XmlWriter writer: The writer of this element.
+        :param str|None                                             tag:    The tag of this element (None for the root).
+        :param int                                                  level:  The depth of this element.
+        """
+        self.writer = writer
+        """
+        The writer of this element.
+
+        :type: enarksh_lib.xml_generator.writer.XmlWriter.XmlWriter
+        """
+
+        self.tag = tag
+        """
+        The tag of this element.
+
+        :type: str|None
+        """
+
+        self.level = level
+        """
+        The depth of this element, i.e. 0 for the document element.
+
+        :type: int
+        """
+
+        self.opened = False
+        """
+        If True, the start tag of this element has been written (because this element has child elements).
+
+        :type: bool
+        """
+
+        self.closed = False
+        """
+        If True, this element has been written completely.
+
+        :type: bool
+        """
+
+        self.text = None
+        """
+        The text of this element. Must be set before child elements are created.
+
+        :type: str|None
+        """
+
+# ----------------------------------------------------------------------------------------------------------------------
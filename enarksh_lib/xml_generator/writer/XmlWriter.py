@@ -0,0 +1,543 @@
+"""
+Enarksh
+
+Copyright 2015-2016 Set Based IT Consultancy
+
+Licence MIT
+"""
+import codecs
+import sys
+from xml.dom import minidom
+
+from enarksh_lib.xml_generator.writer.XmlElement import XmlElement
+
+
+class XmlWriter:
+    """
+    Class for writing an XML document to a binary stream while the document is generated.
+
+    The generate_xml() methods create the elements of the document in document order. An element is written as soon as
+    the next element is created, hence only the elements on the path from the root to the current element are kept in
+    memory. The pretty printed output is identical to the output of ElementTree.tostring() pretty printed by minidom.
+    The compact output is identical to the output of ElementTree.tostring().
+
+    With a fragment cache the XML of a node with child nodes is reused when a node with the same structural hash has
+    been written before (by any writer using the same cache).
+
+    The XML of the child nodes of a node is written by write_node(). Normally the XML of a child node is written right
+    away, i.e. the node tree is walked recursively. Under iterate() the XML of the child nodes of a node is written
+    after generate_xml() of the node has returned, i.e. the node tree is walked by a generator.
+    """
+
+    ESCAPE_QUOTES = minidom.Document().createTextNode('"').toxml() != '"'
+    """
+    If True, minidom escapes double quotes in text (depends on the version of Python).
+
+    :type: bool
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, file_obj, encoding='utf-8', indent=' ', buffer_size=65536, pretty=True, cache=None):
+        """
+        Object constructor.
+
+        :param file_obj:        The binary stream.
+        :param str encoding:    The encoding of the XML document.
+        :param str indent:      The indentation per level (pretty printed output only).
+        :param int buffer_size: The maximum number of characters buffered before writing to the stream.
+        :param bool pretty:     If True, the output is pretty printed like minidom. Otherwise, the output is compact
+                                like ElementTree.
+        :param enarksh_lib.xml_generator.writer.FragmentCache.FragmentCache|None cache: The cache for the XML of nodes.
+        """
+        self._file = file_obj
+        """
+        The binary stream.
+        """
+
+        self._encoder = codecs.getincrementalencoder(encoding)('xmlcharrefreplace')
+        """
+        The encoder for the encoding of the XML document.
+
+        :type: codecs.IncrementalEncoder
+        """
+
+        self._indent = indent
+        """
+        The indentation per level.
+
+        :type: str
+        """
+
+        self._pretty = pretty
+        """
+        If True, the output is pretty printed.
+
+        :type: bool
+        """
+
+        self._buffer_size = buffer_size
+        """
+        The maximum number of characters buffered before writing to the stream.
+
+        :type: int
+        """
+
+        self._cache = cache
+        """
+        The cache for the XML of nodes.
+
+        :type: enarksh_lib.xml_generator.writer.FragmentCache.FragmentCache|None
+        """
+
+        self._hashes = {}
+        """
+        The structural hashes of the nodes of which pre_generate_xml() has been called by _get_hash(), None for nodes
+        with deferred descendants.
+
+        :type: dict[enarksh_lib.xml_generator.node.Node.Node,bytes|None]
+        """
+
+        self._pending = None
+        """
+        The child nodes (and functions) of which the writing has been deferred while generating the XML of the current
+        node under iterate(), or None if the XML of child nodes is written right away.
+
+        :type: list[(enarksh_lib.xml_generator.node.Node.Node,XmlElement)|callable]|None
+        """
+
+        self._buffer = []
+        """
+        The buffered text.
+
+        :type: list[str]
+        """
+
+        self._size = 0
+        """
+        The number of buffered characters.
+
+        :type: int
+        """
+
+        self.root = XmlElement(self, None, -1)
+        """
+        The root of the XML document, i.e. the parent of the document element.
+
+        :type: enarksh_lib.xml_generator.writer.XmlElement.XmlElement
+        """
+
+        self.root.opened = True
+
+        self._stack = [self.root]
+        """
+        The elements that are not yet written completely.
+
+        :type: list[enarksh_lib.xml_generator.writer.XmlElement.XmlElement]
+        """
+
+        self._indents = ['']
+        """
+        The indentation of each level.
+
+        :type: list[str]
+        """
+
+        self._start = self._start_pretty if pretty else self._start_compact
+        """
+        The method for writing the start of an element with child elements.
+
+        :type: callable
+        """
+
+        self._end = self._end_pretty if pretty else self._end_compact
+        """
+        The method for writing the end of an element.
+
+        :type: callable
+        """
+
+        if pretty:
+            self._write('<?xml version="1.0" encoding="{0}"?>\n'.format(encoding))
+        elif encoding.lower() not in ('utf-8', 'us-ascii'):
+            self._write("<?xml version='1.0' encoding='{0}'?>\n".format(encoding))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def call_later(self, function):
+        """
+        Calls a function after the XML of all child nodes passed to write_node() so far has been written. E.g. a
+        compound node releases its child nodes after their XML has been written.
+
+        :param callable function: The function.
+        """
+        if self._pending is None:
+            function()
+        else:
+            self._pending.append(function)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self):
+        """
+        Writes all remaining elements and flushes the buffer to the stream. The stream is not closed.
+        """
+        while len(self._stack) > 1:
+            self._end(self._stack.pop())
+        self.root.closed = True
+
+        self._flush(True)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def escape_compact(text):
+        """
+        Returns a text escaped like ElementTree escapes text.
+
+        :param str text: The text.
+
+        :rtype: str
+        """
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+
+        return text
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def escape_pretty(text):
+        """
+        Returns a text escaped like minidom escapes text, after normalizing line endings like an XML parser does.
+
+        :param str text: The text.
+
+        :rtype: str
+        """
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        if '"' in text and XmlWriter.ESCAPE_QUOTES:
+            text = text.replace('"', '&quot;')
+
+        return text
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_hash(self, root):
+        """
+        Calls pre_generate_xml() of a node and its descendants (in document order) and returns the structural hash of
+        the node after the calls. Returns None if the node has deferred descendants (or is deferred itself): the child
+        nodes of deferred nodes are not created for computing a hash, hence their XML is never cached.
+
+        The hashes of the descendants are stored too, the XML of a descendant is written without calling
+        pre_generate_xml() again.
+
+        :param enarksh_lib.xml_generator.node.Node.Node root: The node.
+
+        :rtype: bytes|None
+        """
+        hashes = self._hashes
+
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                child_hashes = [hashes[child_node] for child_node in node._child_nodes or ()]
+                hashes[node] = None if None in child_hashes else node._compute_structural_hash(child_hashes)
+            else:
+                node.pre_generate_xml()
+                if getattr(node, '_deferred', False):
+                    hashes[node] = None
+                else:
+                    stack.append((node, True))
+                    for child_node in reversed(node._child_nodes or ()):
+                        stack.append((child_node, False))
+
+        return hashes[root]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def iterate(self, node):
+        """
+        Writes the XML of a node (e.g. a schedule) while walking the node tree with a generator. Yields (None) after the
+        XML of each node (excluding the XML of its child nodes) has been generated. The writer is not closed.
+
+        The XML of the child nodes of a node is written after generate_xml() of the node has returned, hence the
+        element with the child nodes must be the last element generated by generate_xml() (as is the case for all nodes
+        of this package). Otherwise a ValueError is raised.
+
+        If the generator is closed before the end, the functions passed to call_later() are called nevertheless.
+
+        :param enarksh_lib.xml_generator.node.Node.Node node: The node.
+
+        :rtype: iterator[None]
+        """
+        stack = []
+        try:
+            stack.append(iter(self._write_deferred(node.generate_xml, self.root)))
+            yield
+
+            while stack:
+                item = next(stack[-1], None)
+                if item is None:
+                    stack.pop()
+                elif callable(item):
+                    item()
+                else:
+                    pending = self._write_deferred(self._write_node, *item)
+                    if pending:
+                        stack.append(iter(pending))
+                    yield
+        finally:
+            for items in reversed(stack):
+                for item in items:
+                    if callable(item):
+                        item()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def sub_element(self, parent, tag):
+        """
+        Creates a child element of an element of this writer. All elements created after the parent element are
+        written.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement parent: The parent element.
+        :param str                                                    tag:    The tag of the child element.
+
+        :rtype: enarksh_lib.xml_generator.writer.XmlElement.XmlElement
+        """
+        self._prepare(parent)
+
+        element = XmlElement(self, tag, parent.level + 1)
+        self._stack.append(element)
+
+        return element
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write_node(self, node, parent):
+        """
+        Calls pre_generate_xml() of a child node and writes the XML of the child node. If this writer has a fragment
+        cache the XML of a node with child nodes is taken from the cache if possible. Under iterate() the node is
+        written after generate_xml() of its parent node has returned.
+
+        With a fragment cache pre_generate_xml() of the node and all its descendants is called before the structural
+        hash of the node is computed, i.e. before the XML of the node is generated or taken from the cache. The XML of a
+        node must depend only on the properties included in its structural hash. Nodes with deferred descendants are
+        not cached.
+
+        :param enarksh_lib.xml_generator.node.Node.Node                node:   The node.
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement parent: The parent element, i.e. the Nodes
+                                                                              element.
+        """
+        if self._pending is None:
+            self._write_node(node, parent)
+        else:
+            self._pending.append((node, parent))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _write_deferred(self, function, *args):
+        """
+        Calls a function that generates XML and returns the child nodes (and functions) passed to write_node() (and
+        call_later()) meanwhile.
+
+        :param callable function: The function.
+        :param args:              The arguments of the function.
+
+        :rtype: list[(enarksh_lib.xml_generator.node.Node.Node,XmlElement)|callable]
+        """
+        pending = self._pending = []
+        try:
+            function(*args)
+        finally:
+            self._pending = None
+
+        return pending
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _write_node(self, node, parent):
+        """
+        Writes the XML of a node right away, see write_node().
+
+        :param enarksh_lib.xml_generator.node.Node.Node                node:   The node.
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement parent: The parent element.
+        """
+        if self._cache is None:
+            node.pre_generate_xml()
+            node.generate_xml(parent)
+            return
+
+        if node in self._hashes:
+            # pre_generate_xml() has been called when the hash of an ancestor was computed.
+            self._write_hashed_node(node, parent, self._hashes[node])
+        elif self._hashes:
+            # A child node of a deferred node.
+            self._write_hashed_node(node, parent, self._get_hash(node))
+        else:
+            self._write_hashed_node(node, parent, self._get_hash(node))
+            # The hashes are not required after the XML of the node and its descendants has been written.
+            self.call_later(self._hashes.clear)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _write_hashed_node(self, node, parent, digest):
+        """
+        Writes the XML of a node of which pre_generate_xml() has been called using the fragment cache.
+
+        :param enarksh_lib.xml_generator.node.Node.Node                node:   The node.
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement parent: The parent element.
+        :param bytes|None                                             digest: The structural hash of the node.
+        """
+        if digest is None or not node._child_nodes:
+            node.generate_xml(parent)
+            return
+
+        if self._pretty:
+            key = (digest, True, parent.level + 1, self._indent)
+        else:
+            key = (digest, False, 0, '')
+
+        self._prepare(parent)
+
+        fragment = self._cache.get(key)
+        if fragment is None:
+            # Capture the XML of the node (including its child nodes) in a separate buffer that is never flushed.
+            buffer, size, buffer_size, pending = self._buffer, self._size, self._buffer_size, self._pending
+            self._buffer, self._size, self._buffer_size, self._pending = [], 0, sys.maxsize, None
+            try:
+                node.generate_xml(parent)
+                self._prepare(parent)
+                fragment = ''.join(self._buffer)
+            finally:
+                self._buffer, self._size, self._buffer_size, self._pending = buffer, size, buffer_size, pending
+
+            self._cache.put(key, fragment)
+
+        self._write(fragment)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_compact(self, element):
+        """
+        Writes the end of an element in compact format.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement element: The element.
+        """
+        if element.opened:
+            self._write('</' + element.tag + '>')
+        elif element.text:
+            self._write('<' + element.tag + '>' + self.escape_compact(element.text) + '</' + element.tag + '>')
+        else:
+            self._write('<' + element.tag + ' />')
+
+        element.closed = True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _end_pretty(self, element):
+        """
+        Writes the end of an element in pretty printed format.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement element: The element.
+        """
+        indent = self._get_indent(element.level)
+        if element.opened:
+            self._write(indent + '</' + element.tag + '>\n')
+        elif element.text:
+            self._write(indent + '<' + element.tag + '>' + self.escape_pretty(element.text) + '</' + element.tag +
+                        '>\n')
+        else:
+            self._write(indent + '<' + element.tag + '/>\n')
+
+        element.closed = True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _flush(self, final=False):
+        """
+        Writes the buffered text to the stream.
+
+        :param bool final: If True, this is the last write.
+        """
+        data = self._encoder.encode(''.join(self._buffer), final)
+        self._buffer = []
+        self._size = 0
+
+        if data:
+            self._file.write(data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _get_indent(self, level):
+        """
+        Returns the indentation of a level.
+
+        :param int level: The level.
+
+        :rtype: str
+        """
+        indents = self._indents
+        while len(indents) <= level:
+            indents.append(indents[-1] + self._indent)
+
+        return indents[level]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _prepare(self, parent):
+        """
+        Writes all elements created after an element and the start of the element, i.e. prepares the writer for writing
+        a child element of the element.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement parent: The element.
+        """
+        stack = self._stack
+        if stack[-1] is parent:
+            if not parent.opened:
+                self._start(parent)
+        else:
+            if parent.closed:
+                raise ValueError("Element '{0}' has been written already".format(parent.tag))
+
+            while stack[-1] is not parent:
+                self._end(stack.pop())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _start_compact(self, element):
+        """
+        Writes the start of an element with child elements in compact format.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement element: The element.
+        """
+        if element.text:
+            self._write('<' + element.tag + '>' + self.escape_compact(element.text))
+        else:
+            self._write('<' + element.tag + '>')
+
+        element.opened = True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _start_pretty(self, element):
+        """
+        Writes the start of an element with child elements in pretty printed format.
+
+        :param enarksh_lib.xml_generator.writer.XmlElement.XmlElement element: The element.
+        """
+        indent = self._get_indent(element.level)
+        if element.text:
+            self._write(indent + '<' + element.tag + '>\n' +
+                        self._get_indent(element.level + 1) + self.escape_pretty(element.text) + '\n')
+        else:
+            self._write(indent + '<' + element.tag + '>\n')
+
+        element.opened = True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _write(self, text):
+        """
+        Appends text to the buffer and flushes the buffer if it is full.
+
+        :param str text: The text.
+        """
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= self._buffer_size:
+            self._flush()
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -41,7 +41,7 @@ setup(
 
     keywords='',
 
-    packages=find_packages(exclude=['build', 'test']),
+    packages=find_packages(exclude=['benchmark', 'build', 'test']),
 
     install_requires=[''],
 )
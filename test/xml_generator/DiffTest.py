@@ -0,0 +1,151 @@
+import unittest
+
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.diff.Change import Change
+from enarksh_lib.xml_generator.diff.NodeDiff import NodeDiff
+from test.xml_generator import LazyTest
+from test.xml_generator.FinalizeTest import RandomScheduleNode
+from test.xml_generator.NodeTest import JobsCompoundJobNode
+
+
+class DiffTest(unittest.TestCase):
+    """
+    Test cases for the structural diff between node trees.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_node():
+        """
+        Returns a compound node with jobs and dependencies.
+
+        :rtype: JobsCompoundJobNode
+        """
+        node = JobsCompoundJobNode('compound', 4)
+        node.create_node()
+        node.add_dependencies([('job1', '', 'job0', ''), ('job2', '', 'job1', ''), ('job3', '', 'job0', '')])
+        node.finalize()
+
+        return node
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_no_changes(self):
+        """
+        Test identical and reordered node trees have no changes.
+        """
+        old = self.create_node()
+        new = self.create_node()
+        new.child_nodes.reverse()
+
+        diff = NodeDiff(old, new)
+        self.assertFalse(diff)
+        self.assertEqual('No changes\n', diff.get_report())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_changes(self):
+        """
+        Test the changes between node trees.
+        """
+        old = self.create_node()
+        new = self.create_node()
+        new.get_child_node('job1').path = '/bin/false'
+        new.get_child_node('job2').consumptions.append(CountingConsumption('cpu', 2))
+        new.get_child_node('job3').make_output_port('done')
+        new.remove_child_node('job0')
+
+        diff = NodeDiff(old, new)
+        expected = [Change(Change.REMOVED, '/compound/job0', Change.NODE, 'job0', old='CommandJobNode'),
+                    Change(Change.MODIFIED, '/compound/job1', Change.PROPERTY, 'path', '/bin/true', '/bin/false'),
+                    Change(Change.ADDED, '/compound/job1', Change.DEPENDENCY, 'input port all <- .:all'),
+                    Change(Change.REMOVED, '/compound/job1', Change.DEPENDENCY, 'input port all <- job0:all'),
+                    Change(Change.ADDED, '/compound/job2', Change.CONSUMPTION, 'CountingConsumption cpu',
+                           new={'amount': 2}),
+                    Change(Change.ADDED, '/compound/job3', Change.DEPENDENCY, 'input port all <- .:all'),
+                    Change(Change.REMOVED, '/compound/job3', Change.DEPENDENCY, 'input port all <- job0:all'),
+                    Change(Change.ADDED, '/compound/job3', Change.OUTPUT_PORT, 'done')]
+        self.assertEqual(expected, diff.changes)
+        self.assertIn("~ /compound/job1 property path: '/bin/true' -> '/bin/false'\n", diff.get_report())
+
+        reverse = NodeDiff(new, old)
+        self.assertEqual(len(expected), len(reverse.changes))
+        self.assertIn(Change(Change.ADDED, '/compound/job0', Change.NODE, 'job0', new='CommandJobNode'),
+                      reverse.changes)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_rename(self):
+        """
+        Test renaming the root node is a change.
+        """
+        old = self.create_node()
+        new = self.create_node()
+        new.name = 'renamed'
+
+        for _ in range(2):
+            diff = NodeDiff(old, new)
+            self.assertTrue(diff)
+            self.assertEqual([Change(Change.MODIFIED, '/renamed', Change.PROPERTY, 'name', 'compound', 'renamed')],
+                             diff.changes)
+            old.get_digest()
+            new.get_digest()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_digests(self):
+        """
+        Test a diff reuses the digests of unchanged subtrees and gives the same changes as a diff without digests.
+        """
+        def create_schedule(seed, change):
+            schedule = RandomScheduleNode('RANDOM', seed)
+            schedule.create_node()
+            schedule.finalize()
+            if change:
+                schedule.child_nodes[0].username = 'changed'
+                schedule.child_nodes[0].mark_dirty()
+                if len(schedule.child_nodes) > 1:
+                    schedule.remove_child_node(schedule.child_nodes[-1].name)
+                schedule.finalize()
+
+            return schedule
+
+        for seed in range(20):
+            old = create_schedule(seed, False)
+            new = create_schedule(seed, False)
+            self.assertFalse(NodeDiff(old, new))
+            self.assertTrue(all(node.digest is None for node in new.child_nodes))
+            old.fingerprint()
+            new.fingerprint()
+            self.assertFalse(NodeDiff(old, new))
+            self.assertTrue(all(node.digest is not None for node in new.child_nodes))
+
+            # Only the digests of the changed node and its ancestors are cleared.
+            new.child_nodes[0].username = 'changed'
+            new.child_nodes[0].mark_dirty()
+            self.assertIsNone(new.digest)
+            self.assertEqual([0], [index for index, node in enumerate(new.child_nodes) if node.digest is None])
+            self.assertEqual([Change(Change.MODIFIED, new.child_nodes[0].get_path(), Change.PROPERTY, 'username', '',
+                                     'changed')],
+                             NodeDiff(old, new).changes)
+
+            if len(new.child_nodes) > 1:
+                new.remove_child_node(new.child_nodes[-1].name)
+            new.finalize()
+            self.assertEqual(NodeDiff(create_schedule(seed, False), create_schedule(seed, True)).changes,
+                             NodeDiff(old, new).changes)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_lazy(self):
+        """
+        Test a diff creates the child nodes of deferred compound nodes for the comparison only.
+        """
+        old = LazyTest.LayerScheduleNode.create_schedule(False)
+        new = LazyTest.LayerScheduleNode.create_schedule(True)
+        self.assertFalse(NodeDiff(old, new))
+        self.assertTrue(all(node.is_deferred() for node in new.child_nodes))
+
+        old.get_child_node('compound2').get_child_node('job1').username = 'changed'
+        old.get_child_node('compound2').get_child_node('job1').mark_dirty()
+        self.assertEqual([Change(Change.MODIFIED, '/LAYERS/compound2/job1', Change.PROPERTY, 'username', 'changed',
+                                 '')],
+                         NodeDiff(old, new).changes)
+        self.assertTrue(all(node.is_deferred() for node in new.child_nodes))
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,329 @@
+import random
+import unittest
+
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.node.ManualTriggerNode import ManualTriggerNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+from enarksh_lib.xml_generator.node.TerminatorNode import TerminatorNode
+
+
+class RandomCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with random child nodes and random dependencies.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, generator, depth):
+        CompoundJobNode.__init__(self, name)
+
+        self.generator = generator
+        self.depth = depth
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(self.generator.randint(1, 7)):
+            kind = self.generator.random()
+            if kind < 0.6 or self.depth > 2:
+                job = CommandJobNode('job%d' % i)
+                job.path = '/bin/true'
+            elif kind < 0.8:
+                job = RandomCompoundJobNode('compound%d' % i, self.generator, self.depth + 1)
+                job.create_node()
+            elif kind < 0.9:
+                job = ManualTriggerNode('trigger%d' % i)
+            else:
+                job = TerminatorNode('terminator%d' % i)
+            self.add_child_node(job)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_input_ports(self):
+        self.make_input_port('extra')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_output_ports(self):
+        self.make_output_port('extra')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        for i, node in enumerate(self.child_nodes):
+            if isinstance(node, ManualTriggerNode):
+                continue
+            for _ in range(self.generator.randint(0, 4)):
+                if self.generator.random() < 0.15:
+                    self.add_dependency(node.name, '', '.', self.generator.choice(['', 'extra']))
+                elif i:
+                    predecessor = self.child_nodes[self.generator.randrange(i)]
+                    if not isinstance(predecessor, TerminatorNode):
+                        self.add_dependency(node.name, '', predecessor.name, '')
+
+        for _ in range(self.generator.randint(0, 3)):
+            predecessor = self.generator.choice(self.child_nodes)
+            if not isinstance(predecessor, TerminatorNode):
+                self.add_dependency('.', self.generator.choice(['', 'extra']), predecessor.name, '')
+
+        if self.generator.random() < 0.2:
+            self.add_dependency('.', 'extra', '.', 'extra')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def ensure_dependencies_input_port(self):
+        parent_port = self.get_input_port(self.ALL_PORT_NAME)
+        for node in self.child_nodes:
+            node.get_input_port(self.ALL_PORT_NAME).add_dependency(parent_port)
+
+
+class RandomScheduleNode(ScheduleNode):
+    """
+    Schedule with random child nodes and random dependencies.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, seed):
+        ScheduleNode.__init__(self, name)
+
+        self.generator = random.Random(seed)
+        self.depth = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        RandomCompoundJobNode.create_child_nodes(self)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        for i, node in enumerate(self.child_nodes):
+            if isinstance(node, ManualTriggerNode):
+                continue
+            for _ in range(self.generator.randint(0, 3)):
+                if i:
+                    predecessor = self.child_nodes[self.generator.randrange(i)]
+                    if not isinstance(predecessor, TerminatorNode):
+                        self.add_dependency(node.name, '', predecessor.name, '')
+
+
+class ChainCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with a long chain of command jobs.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, length):
+        CompoundJobNode.__init__(self, name)
+
+        self.length = length
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(self.length):
+            job = CommandJobNode('job%d' % i)
+            job.path = '/bin/true'
+            self.add_child_node(job)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        for i in range(1, self.length):
+            self.add_dependency('job%d' % i, '', 'job%d' % (i - 1), '')
+
+
+class OpaqueCommandJobNode(CommandJobNode):
+    """
+    Command job of which the output ports have no implicit dependencies.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_implicit_dependencies_output_ports(self, port_name, ports, level):
+        port = self.get_output_port(port_name)
+        if level and port not in ports:
+            ports.append(port)
+
+
+class TriangleCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with job 'c' depending on jobs 'a' and 'b' and job 'b' depending on job 'a'.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, job_class):
+        CompoundJobNode.__init__(self, name)
+
+        self.job_class = job_class
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for name in ('a', 'b', 'c'):
+            job = self.job_class(name)
+            job.path = '/bin/true'
+            self.add_child_node(job)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('b', '', 'a', '')
+        self.add_dependency('c', '', 'a', '')
+        self.add_dependency('c', '', 'b', '')
+
+
+class FinalizeTest(unittest.TestCase):
+    """
+    Test cases for finalizing schedules.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_schedule(seed):
+        """
+        Returns a random schedule.
+
+        :param int seed: The seed of the random generator.
+
+        :rtype: RandomScheduleNode
+        """
+        schedule = RandomScheduleNode('RANDOM%d' % seed, seed)
+        schedule.create_node()
+
+        return schedule
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def modify_schedule(schedule, generator):
+        """
+        Adds and removes random child nodes and dependencies of a schedule.
+
+        :param RandomScheduleNode schedule:  The schedule.
+        :param random.Random      generator: The random generator.
+        """
+        nodes = []
+        stack = [schedule]
+        while stack:
+            node = stack.pop()
+            if node.child_nodes:
+                nodes.append(node)
+                stack.extend(node.child_nodes)
+
+        for _ in range(generator.randint(1, 3)):
+            node = generator.choice(nodes)
+            kind = generator.random()
+            if kind < 0.4:
+                job = CommandJobNode('new%d' % generator.getrandbits(32))
+                job.path = '/bin/true'
+                predecessor = generator.choice(node.child_nodes)
+                node.add_child_node(job)
+                if not isinstance(predecessor, TerminatorNode):
+                    node.add_dependency(job.name, '', predecessor.name, '')
+                if node is not schedule:
+                    node.add_dependency('.', '', job.name, '')
+            elif kind < 0.8:
+                i = generator.randrange(len(node.child_nodes))
+                j = generator.randrange(len(node.child_nodes))
+                successor = node.child_nodes[max(i, j)]
+                predecessor = node.child_nodes[min(i, j)]
+                if i != j and not isinstance(successor, ManualTriggerNode) and \
+                        not isinstance(predecessor, TerminatorNode):
+                    node.add_dependency(successor.name, '', predecessor.name, '')
+            elif len(node.child_nodes) > 1:
+                node.remove_child_node(generator.choice(node.child_nodes).name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_purge_equals_reference(self):
+        """
+        Test the purge engine gives the same dependencies as the reference implementation.
+        """
+        for seed in range(200):
+            expected = self.create_schedule(seed)
+            expected.finalize(True)
+
+            actual = self.create_schedule(seed)
+            actual.finalize()
+
+            self.assertEqual(expected.get_xml(), actual.get_xml(), 'seed %d' % seed)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_finalize_incremental(self):
+        """
+        Test finalizing a changed schedule again gives the same result as finalizing all nodes again.
+        """
+        for seed in range(100):
+            expected = self.create_schedule(seed)
+            expected.finalize()
+            actual = self.create_schedule(seed)
+            actual.finalize()
+
+            for step in range(3):
+                self.modify_schedule(expected, random.Random(seed * 10 + step))
+                self.modify_schedule(actual, random.Random(seed * 10 + step))
+
+                stack = [expected]
+                while stack:
+                    node = stack.pop()
+                    node.mark_dirty()
+                    stack.extend(node.child_nodes)
+
+                expected.finalize()
+                actual.finalize()
+
+                self.assertEqual(expected.get_xml(), actual.get_xml(), 'seed %d step %d' % (seed, step))
+                self.assertEqual([], actual._get_dirty_nodes())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_purge_chain(self):
+        """
+        Test purge removes all but the last dependency of output port 'all' of a compound node with a chain of jobs.
+        """
+        node = ChainCompoundJobNode('chain', 1000)
+        node.create_node()
+        node.finalize()
+
+        port = node.get_output_port(node.ALL_PORT_NAME)
+        self.assertEqual([node.get_child_node('job999').get_output_port(node.ALL_PORT_NAME)],
+                         list(port.predecessors))
+        self.assertEqual(1, len(node.get_child_node('job500').get_input_port(node.ALL_PORT_NAME).predecessors))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_reference_purge_chain(self):
+        """
+        Test the reference implementation of purge on a chain of jobs longer than the recursion limit.
+        """
+        expected = ChainCompoundJobNode('chain', 800)
+        expected.create_node()
+        expected.finalize()
+
+        actual = ChainCompoundJobNode('chain', 800)
+        actual.create_node()
+        actual.finalize(True)
+
+        for expected_node, actual_node in zip(expected.child_nodes, actual.child_nodes):
+            self.assertEqual([port.node.name for port in expected_node.get_input_port('all').predecessors],
+                             [port.node.name for port in actual_node.get_input_port('all').predecessors])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_implicit_dependencies_hook(self):
+        """
+        Test purging uses the overridden get_implicit_dependencies_output_ports() of a node class.
+        """
+        for job_class, expected in ((CommandJobNode, ['b']), (OpaqueCommandJobNode, ['a', 'b', 'triangle'])):
+            for reference in (False, True):
+                node = TriangleCompoundJobNode('triangle', job_class)
+                node.create_node()
+                node.finalize(reference)
+
+                predecessors = node.get_child_node('c').get_input_port('all').predecessors
+                self.assertEqual(expected, [port.node.name for port in predecessors], (job_class, reference))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cycle(self):
+        """
+        Test finalize reports cyclic dependencies.
+        """
+        node = ChainCompoundJobNode('chain', 10)
+        node.create_node()
+        node.add_dependency('job3', '', 'job7', '')
+        node.add_dependency('job9', '', 'job9', '')
+
+        cycles = node.find_cycles()
+        self.assertEqual(2, len(cycles))
+        self.assertIn("/chain/job7 output port 'all'", cycles[0])
+        self.assertEqual(10, len(cycles[0]))
+        self.assertEqual(["/chain/job9 input port 'all'", "/chain/job9 output port 'all'"], sorted(cycles[1]))
+
+        with self.assertRaises(ValueError):
+            node.finalize()
+
+# ----------------------------------------------------------------------------------------------------------------------
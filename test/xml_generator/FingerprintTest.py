@@ -0,0 +1,106 @@
+import pickle
+import unittest
+
+from test.xml_generator import LazyTest
+from test.xml_generator.FinalizeTest import RandomScheduleNode
+
+
+class FingerprintTest(unittest.TestCase):
+    """
+    Test cases for fingerprints of schedules and digests of nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_fingerprint(self):
+        """
+        Test the fingerprint of a schedule changes only when its XML changes and the digests locate the changes.
+        """
+        for seed in range(20):
+            schedule1 = RandomScheduleNode('RANDOM', seed)
+            schedule1.create_node()
+            schedule1.finalize()
+            schedule2 = RandomScheduleNode('RANDOM', seed)
+            schedule2.create_node()
+            schedule2.finalize()
+
+            self.assertEqual(schedule1.fingerprint(), schedule2.fingerprint())
+            self.assertEqual(64, len(schedule1.fingerprint()))
+
+            node = schedule2.child_nodes[-1]
+            node.username = 'changed'
+            self.assertIsNone(schedule2.digest)
+            self.assertEqual(schedule1.fingerprint() == schedule2.fingerprint(),
+                             schedule1.get_xml() == schedule2.get_xml())
+            self.assertNotEqual(schedule1.fingerprint(), schedule2.fingerprint())
+
+            changed = [child_node.name
+                       for child_node1, child_node in zip(schedule1.child_nodes, schedule2.child_nodes)
+                       if child_node1.digest != child_node.digest]
+            self.assertEqual([node.name], changed)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_properties(self):
+        """
+        Test changing the username, path, or arguments of a node after computing the fingerprint changes the
+        fingerprint.
+        """
+        schedule = LazyTest.LayerScheduleNode.create_schedule(False)
+        compound = schedule.get_child_node('compound2').get_child_node('sub3')
+        job = compound.get_child_node('job1')
+
+        changes = [lambda: setattr(compound, 'username', 'operator'),
+                   lambda: setattr(job, 'username', 'operator'),
+                   lambda: setattr(job, 'args', ['-v']),
+                   lambda: job.args.append('-q'),
+                   lambda: job.args.insert(0, '-x'),
+                   lambda: job.args.__setitem__(0, '-y'),
+                   lambda: job.args.extend(['-a', '-b']),
+                   lambda: job.args.sort(),
+                   lambda: job.args.reverse(),
+                   lambda: job.args.remove('-q'),
+                   lambda: job.args.pop(),
+                   lambda: job.args.__delitem__(0),
+                   lambda: job.args.__iadd__(['-z']),
+                   lambda: job.args.__imul__(2),
+                   lambda: setattr(job, 'path', '/bin/false'),
+                   lambda: job.args.clear()]
+
+        fingerprints = {schedule.fingerprint()}
+        for change in changes:
+            change()
+            self.assertIsNone(schedule.digest)
+            fingerprint = schedule.fingerprint()
+            self.assertEqual(schedule.get_structural_hash().hex(), fingerprint)
+            fingerprints.add(fingerprint)
+        self.assertEqual(len(changes), len(fingerprints) - 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_rename(self):
+        """
+        Test renaming a schedule after computing the fingerprint changes the fingerprint.
+        """
+        schedule = LazyTest.LayerScheduleNode.create_schedule(False)
+        fingerprint = schedule.fingerprint()
+
+        schedule.name = 'RENAMED'
+        self.assertIsNone(schedule.digest)
+        self.assertNotEqual(fingerprint, schedule.fingerprint())
+        self.assertEqual(schedule.get_structural_hash().hex(), schedule.fingerprint())
+
+        schedule.name = 'LAYERS'
+        self.assertEqual(fingerprint, schedule.fingerprint())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_pickle_args(self):
+        """
+        Test the arguments of a pickled command job belong to the unpickled command job.
+        """
+        schedule = LazyTest.LayerScheduleNode.create_schedule(False)
+        job = pickle.loads(pickle.dumps(schedule.get_child_node('compound0').get_child_node('job0')._copy()))
+
+        self.assertIs(job, job.args._node)
+        job.digest = 'stale'
+        job.args.append('-v')
+        self.assertIsNone(job.digest)
+
+# ----------------------------------------------------------------------------------------------------------------------
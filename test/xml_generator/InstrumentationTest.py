@@ -0,0 +1,101 @@
+import io
+import unittest
+
+from enarksh_lib.xml_generator.instrumentation.Instrumentation import Instrumentation
+from test.xml_generator import LazyTest
+
+
+class InstrumentationTest(unittest.TestCase):
+    """
+    Test cases for instrumentation of building, finalizing, and generating the XML of schedules.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def count_dependencies(schedule):
+        """
+        Returns the number of dependencies of a schedule.
+
+        :param enarksh_lib.xml_generator.node.ScheduleNode.ScheduleNode schedule: The schedule.
+
+        :rtype: int
+        """
+        count = 0
+        stack = [schedule]
+        while stack:
+            node = stack.pop()
+            for port in node.input_ports + node.output_ports:
+                count += len(port.predecessors)
+            stack.extend(node.child_nodes)
+
+        return count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_report(self):
+        """
+        Test the timings and counters of building, finalizing, and generating the XML of a schedule.
+        """
+        events = []
+        with Instrumentation(lambda name, node, value: events.append((name, node, value))) as instrumentation:
+            schedule = LazyTest.LayerScheduleNode(False)
+            schedule.create_node()
+            schedule.ensure_dependencies()
+            dependencies = self.count_dependencies(schedule)
+            schedule.finalize()
+            schedule.get_xml()
+            schedule.write_xml(io.BytesIO())
+        self.assertIsNone(Instrumentation.active)
+
+        report = instrumentation.get_report()
+        steps = {(timing['step'], timing['path']): timing['count'] for timing in report['timings']}
+        for step in ('create_start', 'create_resources', 'create_child_nodes', 'create_input_ports',
+                     'create_output_ports', 'create_dependencies', 'create_finish'):
+            self.assertEqual(1, steps[(step, '/LAYERS')])
+            self.assertEqual(1, steps[(step, '/LAYERS/compound2/sub3')])
+        for step in ('ensure_dependencies', 'find_cycles', 'purge'):
+            self.assertEqual(1, steps[(step, '/LAYERS')])
+        self.assertEqual(2, steps[('generate_xml', '/LAYERS')])
+        self.assertEqual(1, steps[('serialize', '/LAYERS')])
+
+        counters = report['counters']
+        self.assertGreater(counters['duplicate_dependency'], 0)
+        self.assertGreater(counters['add_dependency'], counters['duplicate_dependency'])
+        self.assertEqual(dependencies - self.count_dependencies(schedule), counters['purged_dependency'])
+
+        # The callback is called for each timing and for each counter when the instrumentation stops.
+        self.assertEqual(sum(timing['count'] for timing in report['timings']) + len(counters), len(events))
+        self.assertEqual([(name, None, value) for name, value in counters.items()], events[-len(counters):])
+        self.assertEqual(set(instrumentation.get_totals()), {step for step, _ in steps})
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_reference_purge(self):
+        """
+        Test the purge counter of the reference implementation of purge.
+        """
+        with Instrumentation() as instrumentation:
+            schedule = LazyTest.LayerScheduleNode(False)
+            schedule.create_node()
+            schedule.ensure_dependencies()
+            dependencies = self.count_dependencies(schedule)
+            schedule.finalize(True)
+
+        purged = dependencies - self.count_dependencies(schedule)
+        self.assertEqual(purged, instrumentation.counters['purged_dependency'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_off(self):
+        """
+        Test nothing is recorded when no instrumentation is active and only one instrumentation is active.
+        """
+        instrumentation = Instrumentation()
+        LazyTest.LayerScheduleNode.create_schedule(False).get_xml()
+        self.assertEqual({'timings': [], 'counters': {'add_dependency': 0,
+                                                      'duplicate_dependency': 0,
+                                                      'purged_dependency': 0}}, instrumentation.get_report())
+
+        with instrumentation:
+            with self.assertRaises(ValueError):
+                Instrumentation().start()
+        self.assertIsNone(Instrumentation.active)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,146 @@
+import io
+import unittest
+
+from enarksh_lib.xml_generator.interchange.BinaryFormat import BinaryFormat
+from enarksh_lib.xml_generator.interchange.JsonFormat import JsonFormat
+from enarksh_lib.xml_generator.interchange.ScheduleTable import ScheduleTable
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.Node import Node
+from enarksh_lib.xml_generator.resource.CountingResource import CountingResource
+from test.xml_generator import WriterTest
+
+
+class ShellJobNode(Node):
+    """
+    Job that runs a shell command, a node type that is not derived from CommandJobNode.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, command):
+        Node.__init__(self, name)
+
+        self.path = '/bin/sh'
+        self.args = ['-c', command]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def generate_xml(self, parent):
+        CommandJobNode.generate_xml(self, parent)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_implicit_input_port_name(self):
+        return self.ALL_PORT_NAME
+
+
+class InterchangeTest(unittest.TestCase):
+    """
+    Test cases for the interchange formats of node trees.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_round_trip(self):
+        """
+        Test converting schedules to and from the interchange formats is lossless.
+        """
+        for seed in range(30):
+            schedule = WriterTest.WriterTest.create_schedule(seed)
+            for interchange_format in (JsonFormat, BinaryFormat):
+                data = interchange_format.dumps(schedule)
+                loaded = interchange_format.loads(data)
+
+                self.assertEqual(schedule.get_xml(), loaded.get_xml(), 'seed %d' % seed)
+                self.assertEqual(schedule.fingerprint(), loaded.fingerprint(), 'seed %d' % seed)
+                self.assertEqual(data, interchange_format.dumps(loaded), 'seed %d' % seed)
+
+                stream = io.BytesIO()
+                interchange_format.write(schedule, stream)
+                stream.seek(0)
+                self.assertEqual(schedule.get_xml(), interchange_format.read(stream).get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_symbols(self):
+        """
+        Test names are stored once and amounts keep their type.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(5)
+        schedule.resources.append(CountingResource('cpu', 4))
+        schedule.resources.append(CountingResource('memory', '4'))
+
+        table = ScheduleTable.from_node(schedule)
+        self.assertEqual(len(set(table.symbols)), len(table.symbols))
+        self.assertIn('all', table.symbols)
+
+        for interchange_format in (JsonFormat, BinaryFormat):
+            loaded = interchange_format.loads(interchange_format.dumps(schedule))
+            self.assertEqual([4, '4'], [resource.amount for resource in loaded.resources[-2:]])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_amount_types(self):
+        """
+        Test amounts of type bool and float keep their type.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(5)
+        schedule.resources.append(CountingResource('flag', True))
+        schedule.resources.append(CountingResource('ratio', 0.25))
+        schedule.child_nodes[0].consumptions.append(CountingConsumption('flag', False))
+
+        for interchange_format in (JsonFormat, BinaryFormat):
+            loaded = interchange_format.loads(interchange_format.dumps(schedule))
+            amounts = [resource.amount for resource in loaded.resources[-2:]]
+            amounts.append(loaded.child_nodes[0].consumptions[-1].amount)
+            self.assertEqual([(True, bool), (0.25, float), (False, bool)],
+                             [(amount, type(amount)) for amount in amounts])
+            self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+        schedule.resources.append(CountingResource('size', None))
+        with self.assertRaises(ValueError):
+            ScheduleTable.from_node(schedule)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_user_node_type(self):
+        """
+        Test a node of a user defined class is stored as the node type of its XML element.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(3)
+        schedule.add_child_node(ShellJobNode('shell', 'echo "hello"'))
+        schedule.add_dependency('shell', 'all', schedule.child_nodes[0].name, 'all')
+        schedule.finalize()
+
+        for interchange_format in (JsonFormat, BinaryFormat):
+            loaded = interchange_format.loads(interchange_format.dumps(schedule))
+            self.assertIsInstance(loaded.get_child_node('shell'), CommandJobNode)
+            self.assertEqual(['-c', 'echo "hello"'], loaded.get_child_node('shell').args)
+            self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_modify_loaded(self):
+        """
+        Test a loaded schedule is finalized and can be modified.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(7)
+        loaded = BinaryFormat.loads(BinaryFormat.dumps(schedule))
+        loaded.finalize()
+        self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+        for node in (schedule, loaded):
+            job = CommandJobNode('new')
+            node.add_child_node(job)
+            node.add_dependency('new', 'all', node.child_nodes[0].name, 'all')
+            node.finalize()
+        self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_errors(self):
+        """
+        Test loading invalid data.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(1)
+        data = BinaryFormat.dumps(schedule)
+        for invalid in (data[:-1], data[:10], data + b'\x00', b'<Schedule/>'):
+            with self.assertRaises(ValueError):
+                BinaryFormat.loads(invalid)
+
+        with self.assertRaises(ValueError):
+            JsonFormat.loads(b'{"format": "enarksh-schedule", "version": 0}')
+
+# ----------------------------------------------------------------------------------------------------------------------
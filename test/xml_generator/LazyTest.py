@@ -0,0 +1,257 @@
+import io
+import unittest
+
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+
+
+class LayerCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with a chain of jobs and (nested) compound nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, size, lazy):
+        CompoundJobNode.__init__(self, name)
+
+        self.size = size
+        self.lazy = lazy
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def child_name(index):
+        return 'sub%d' % index if index % 4 == 3 else 'job%d' % index
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(self.size):
+            if i % 4 == 3:
+                node = LayerCompoundJobNode(self.child_name(i), 3, self.lazy)
+                node.create_node(self.lazy)
+            else:
+                node = CommandJobNode(self.child_name(i))
+                node.path = '/bin/true'
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        for i in range(1, self.size):
+            self.add_dependency(self.child_name(i), '', self.child_name(i - 1), '')
+        if self.size > 2:
+            self.add_dependency('job2', '', '.', 'extra')
+            self.add_dependency('job2', '', 'job0', '')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_input_ports(self):
+        self.make_input_port('extra')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def ensure_dependencies_input_port(self):
+        port = self.get_input_port('all')
+        for node in self.child_nodes:
+            node.get_input_port('all').add_dependency(port)
+
+
+class CycleCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with cyclic dependencies between its child nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(3):
+            node = CommandJobNode('job%d' % i)
+            node.path = '/bin/true'
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('job1', '', 'job0', '')
+        self.add_dependency('job2', '', 'job1', '')
+        self.add_dependency('job0', '', 'job2', '')
+
+
+class NestedCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with two jobs and a nested compound node that depends on both jobs.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, lazy):
+        CompoundJobNode.__init__(self, name)
+
+        self.lazy = lazy
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for name in ('a', 'b'):
+            node = CommandJobNode(name)
+            node.path = '/bin/true'
+            self.add_child_node(node)
+        self.get_child_node('a').make_output_port('done')
+
+        node = LayerCompoundJobNode('inner', 3, self.lazy)
+        node.create_node(self.lazy)
+        self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('b', '', 'a', '')
+        self.add_dependency('inner', '', 'a', 'done')
+        self.add_dependency('inner', '', 'b', '')
+
+
+class NestedScheduleNode(ScheduleNode):
+    """
+    Schedule with a compound node with a nested compound node.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, lazy):
+        ScheduleNode.__init__(self, 'NESTED')
+
+        self.lazy = lazy
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        node = NestedCompoundJobNode('outer', self.lazy)
+        node.create_node(self.lazy)
+        self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_schedule(lazy):
+        schedule = NestedScheduleNode(lazy)
+        schedule.create_node()
+        schedule.finalize()
+
+        return schedule
+
+
+class LayerScheduleNode(ScheduleNode):
+    """
+    Schedule with dependencies between compound nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, lazy):
+        ScheduleNode.__init__(self, 'LAYERS')
+
+        self.lazy = lazy
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(6):
+            node = LayerCompoundJobNode('compound%d' % i, 8, self.lazy)
+            node.create_node(self.lazy)
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('compound1', '', 'compound0', '')
+        self.add_dependency('compound2', 'extra', 'compound0', '')
+        self.add_dependency('compound3', '', 'compound1', '')
+        self.add_dependency('compound3', '', 'compound0', '')
+        self.add_dependency('compound4', '', 'compound2', '')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_schedule(lazy):
+        schedule = LayerScheduleNode(lazy)
+        schedule.create_node()
+        schedule.finalize()
+
+        return schedule
+
+
+class LazyTest(unittest.TestCase):
+    """
+    Test cases for compound nodes with deferred child nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_xml(self):
+        """
+        Test the XML of a lazy schedule is identical to the XML of an eager schedule and the child nodes are released
+        after generating the XML.
+        """
+        xml = LayerScheduleNode.create_schedule(False).get_xml()
+
+        schedule = LayerScheduleNode.create_schedule(True)
+        compound = schedule.get_child_node('compound0')
+        self.assertTrue(compound.is_deferred())
+        self.assertIsNone(compound._child_nodes)
+        self.assertEqual(['extra', 'all'], [port.port_name for port in compound.input_ports])
+
+        for backend in (ScheduleNode.BACKEND_ELEMENT_TREE, ScheduleNode.BACKEND_STRING):
+            self.assertEqual(xml, schedule.get_xml(backend=backend), backend)
+            self.assertTrue(compound.is_deferred())
+            self.assertIsNone(compound._child_nodes)
+
+        stream = io.BytesIO()
+        schedule.write_xml(stream)
+        self.assertEqual(xml, stream.getvalue())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_use_child_nodes(self):
+        """
+        Test using the child nodes of a deferred compound node creates and keeps the finalized child nodes.
+        """
+        eager = LayerScheduleNode.create_schedule(False)
+        schedule = LayerScheduleNode.create_schedule(True)
+
+        compound = schedule.get_child_node('compound2')
+        self.assertEqual(8, len(compound.child_nodes))
+        self.assertFalse(compound.is_deferred())
+        predecessors = compound.get_child_node('job2').input_ports[0].predecessors
+        self.assertEqual(['job1', 'compound2'], [port.node.name for port in predecessors])
+
+        schedule.get_xml()
+        self.assertFalse(compound.is_deferred())
+        self.assertEqual(eager.get_xml(), schedule.get_xml())
+
+        self.assertEqual(eager.fingerprint(), LayerScheduleNode.create_schedule(True).fingerprint())
+        self.assertEqual(eager.get_xml(), LayerScheduleNode.create_schedule(True).clone().get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_nested(self):
+        """
+        Test creating the child nodes of a nested deferred compound node does not change the dependencies of the
+        enclosing deferred compound node, hence the XML is the same each time.
+        """
+        xml = NestedScheduleNode.create_schedule(False).get_xml()
+
+        schedule = NestedScheduleNode.create_schedule(True)
+        self.assertEqual(xml, schedule.get_xml())
+        self.assertEqual(xml, schedule.get_xml())
+        stream = io.BytesIO()
+        schedule.write_xml(stream)
+        self.assertEqual(xml, stream.getvalue())
+        compound = schedule.get_child_node('outer')
+        self.assertTrue(compound.is_deferred())
+        self.assertFalse(compound._dirty)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cycle(self):
+        """
+        Test the child nodes of a deferred compound node are released when finalizing the child nodes fails.
+        """
+        compound = CycleCompoundJobNode('compound')
+        compound.create_node(True)
+        compound.finalize()
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                compound.child_nodes
+            self.assertTrue(compound.is_deferred())
+            self.assertIsNone(compound._child_nodes)
+            self.assertEqual([], [port for port in compound.get_input_port('all').successors])
+            self.assertEqual([], [port for port in compound.get_output_port('all').predecessors])
+            self.assertFalse(compound._dirty)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,87 @@
+import io
+import os
+import unittest
+
+from enarksh_lib.xml_generator.loader.XmlLoader import XmlLoader
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.writer.Compression import Compression
+from test.xml_generator import WriterTest
+from test.xml_generator.FinalizeTest import RandomScheduleNode
+
+
+class LoaderTest(unittest.TestCase):
+    """
+    Test cases for loading schedules from XML.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_round_trip(self):
+        """
+        Test generating the XML of a loaded schedule gives the original XML.
+        """
+        for seed in range(30):
+            schedule = WriterTest.WriterTest.create_schedule(seed)
+            for encoding in ('utf-8', 'latin-1'):
+                xml = schedule.get_xml(encoding)
+                self.assertEqual(xml, XmlLoader().load(io.BytesIO(xml)).get_xml(encoding), 'seed %d' % seed)
+
+                # XML parsers normalize line endings and compact XML does not escape carriage returns.
+                xml = schedule.get_xml(encoding, False).replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+                self.assertEqual(xml, XmlLoader().load(io.BytesIO(xml)).get_xml(encoding, False), 'seed %d' % seed)
+
+        path = os.path.join(os.path.dirname(__file__), 'ScheduleTest', 'test01.xml')
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), XmlLoader().load(path).get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_load_compressed(self):
+        """
+        Test loading compressed XML.
+        """
+        schedule = WriterTest.WriterTest.create_schedule(3)
+        for compression in (Compression.GZIP, Compression.LZMA):
+            stream = io.BytesIO()
+            schedule.write_xml(stream, compression=compression)
+            stream.seek(0)
+
+            self.assertEqual(schedule.get_xml(), XmlLoader().load(stream).get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_modify_loaded(self):
+        """
+        Test a loaded schedule has the same fingerprint as the original schedule and can be modified.
+        """
+        for seed in range(20):
+            schedule = RandomScheduleNode('RANDOM', seed)
+            schedule.create_node()
+            schedule.finalize()
+
+            loaded = XmlLoader().load(io.BytesIO(schedule.get_xml()))
+            self.assertEqual(schedule.fingerprint(), loaded.fingerprint())
+
+            loaded.finalize()
+            self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+            for node in (schedule, loaded):
+                job = CommandJobNode('new')
+                job.path = '/bin/true'
+                node.add_child_node(job)
+                node.add_dependency('new', 'all', node.child_nodes[0].name, 'all')
+                node.finalize()
+            self.assertEqual(schedule.get_xml(), loaded.get_xml())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_errors(self):
+        """
+        Test loading invalid XML.
+        """
+        with self.assertRaises(ValueError):
+            XmlLoader().load(io.BytesIO(b'<CompoundJob><NodeName>job</NodeName></CompoundJob>'))
+
+        xml = (b'<Schedule><NodeName>schedule</NodeName><Nodes><CommandJob><NodeName>job</NodeName><InputPorts><Port>'
+               b'<PortName>all</PortName><Dependencies><Dependency><NodeName>unknown</NodeName><PortName>all</PortName>'
+               b'</Dependency></Dependencies></Port></InputPorts></CommandJob></Nodes></Schedule>')
+        with self.assertRaises(ValueError):
+            XmlLoader().load(io.BytesIO(xml))
+
+# ----------------------------------------------------------------------------------------------------------------------
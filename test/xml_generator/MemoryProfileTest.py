@@ -0,0 +1,93 @@
+import io
+import tracemalloc
+import unittest
+
+from enarksh_lib.xml_generator.instrumentation.MemoryProfile import MemoryProfile
+from enarksh_lib.xml_generator.loader.XmlLoader import XmlLoader
+from test.xml_generator import LazyTest
+
+
+class MemoryProfileTest(unittest.TestCase):
+    """
+    Test cases for memory profiles of schedules.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_profile(self):
+        """
+        Test the memory profile of a schedule.
+        """
+        def build():
+            node = LazyTest.LayerScheduleNode(False)
+            node.create_node()
+
+            return node
+
+        profile = MemoryProfile(3).profile(build)
+        self.assertFalse(tracemalloc.is_tracing())
+        schedule = LazyTest.LayerScheduleNode.create_schedule(False)
+
+        self.assertEqual(['build', 'finalize', 'get_xml'], list(profile['phases']))
+        self.assertGreater(profile['tree'], 0)
+        self.assertGreater(profile['xml_peak'], 0)
+        self.assertEqual(len(schedule.get_xml()), profile['xml_size'])
+        self.assertEqual(3, len(profile['lines']))
+
+        classes = profile['classes']
+        self.assertEqual(1, classes['LayerScheduleNode']['count'])
+        self.assertEqual(6 + 12, classes['LayerCompoundJobNode']['count'])
+        self.assertEqual(6 * 6 + 12 * 3, classes['CommandJobNode']['count'])
+        ports = {'InputPort': 0, 'OutputPort': 0}
+        stack = [schedule]
+        while stack:
+            node = stack.pop()
+            ports['InputPort'] += len(node.input_ports)
+            ports['OutputPort'] += len(node.output_ports)
+            stack.extend(node.child_nodes)
+        for name, count in ports.items():
+            self.assertEqual(count, classes[name]['count'])
+
+        subtrees = profile['subtrees']
+        self.assertEqual(3, len(subtrees))
+        self.assertEqual({'path': '/LAYERS', 'nodes': 91, 'bytes': sum(entry['bytes'] for entry in classes.values())},
+                         subtrees[0])
+        self.assertEqual(15, subtrees[1]['nodes'])
+        self.assertGreaterEqual(subtrees[0]['bytes'], subtrees[1]['bytes'])
+        self.assertGreaterEqual(subtrees[1]['bytes'], subtrees[2]['bytes'])
+
+        text = MemoryProfile.format(profile)
+        self.assertIn('/LAYERS', text)
+        self.assertIn('CommandJobNode', text)
+        self.assertIn('estimate', text)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_built(self):
+        """
+        Test the memory profile of a schedule that has been built already.
+        """
+        xml = LazyTest.LayerScheduleNode.create_schedule(False).get_xml()
+        schedule = XmlLoader().load(io.BytesIO(xml))
+        profile = MemoryProfile(3).profile(schedule)
+
+        self.assertEqual(['finalize', 'get_xml'], list(profile['phases']))
+        self.assertIsNone(profile['tree'])
+        self.assertEqual(len(xml), profile['xml_size'])
+        self.assertEqual(1, profile['classes']['LoadedScheduleNode']['count'])
+        self.assertEqual(91, profile['subtrees'][0]['nodes'])
+        self.assertIn('n/a', MemoryProfile.format(profile))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_lazy(self):
+        """
+        Test the child nodes of deferred compound nodes are not created by the attribution.
+        """
+        schedule = LazyTest.LayerScheduleNode.create_schedule(True)
+        classes, subtrees = MemoryProfile.get_attribution(schedule)
+
+        self.assertEqual(6, classes['LayerCompoundJobNode']['count'])
+        self.assertNotIn('CommandJobNode', classes)
+        self.assertEqual([{'path': '/LAYERS', 'nodes': 7, 'bytes': subtrees[0]['bytes']}], subtrees)
+        for node in schedule._child_nodes:
+            self.assertTrue(node.is_deferred())
+
+# ----------------------------------------------------------------------------------------------------------------------
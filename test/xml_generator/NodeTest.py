@@ -0,0 +1,334 @@
+import unittest
+
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.port.OutputPort import OutputPort
+
+
+class JobsCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with child nodes 'job0', 'job1', ...
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, size=3):
+        CompoundJobNode.__init__(self, name)
+
+        self.size = size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(self.size):
+            job = CommandJobNode('job%d' % i)
+            job.path = '/bin/true'
+            self.add_child_node(job)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        pass
+
+
+class NodeTest(unittest.TestCase):
+    """
+    Test cases for building nodes.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_search(self):
+        """
+        Test child nodes and ports are found by name and keep their order.
+        """
+        node = JobsCompoundJobNode('compound')
+        node.create_node()
+        node.make_input_port('spam')
+        node.output_ports.append(OutputPort(node, 'eggs'))
+
+        self.assertIs(node.child_nodes[1], node.get_child_node('job1'))
+        self.assertIsNone(node.search_child_node('job3'))
+        self.assertIs(node.input_ports[0], node.get_input_port('spam'))
+        self.assertIs(node.output_ports[0], node.get_output_port('eggs'))
+        self.assertEqual(['job0', 'job1', 'job2'], [child_node.name for child_node in node.child_nodes])
+
+        node.remove_child_node('job1')
+        self.assertIsNone(node.search_child_node('job1'))
+        self.assertEqual(['job0', 'job2'], [child_node.name for child_node in node.child_nodes])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_duplicate_names(self):
+        """
+        Test duplicate names of child nodes and ports are rejected.
+        """
+        node = JobsCompoundJobNode('compound')
+        node.create_node()
+        node.make_input_port('spam')
+        node.make_output_port('spam')
+
+        with self.assertRaises(ValueError):
+            node.add_child_node(CommandJobNode('job0'))
+
+        with self.assertRaises(ValueError):
+            node.make_input_port('spam')
+
+        with self.assertRaises(ValueError):
+            node.output_ports.append(OutputPort(node, 'spam'))
+
+        self.assertEqual(3, len(node.child_nodes))
+        self.assertEqual(1, len(node.output_ports))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_rename(self):
+        """
+        Test a child node can not be renamed and a removed child node can be renamed.
+        """
+        for size in (3, 20):
+            node = JobsCompoundJobNode('compound', size)
+            node.create_node()
+            job = node.get_child_node('job1')
+
+            with self.assertRaises(ValueError):
+                job.name = 'renamed'
+            self.assertEqual('job1', job.name)
+            self.assertIs(job, node.get_child_node('job1'))
+            self.assertIsNone(node.search_child_node('renamed'))
+
+            node.remove_child_node('job1')
+            self.assertIsNone(job.parent)
+            job.name = 'renamed'
+            node.add_child_node(job)
+            self.assertIs(job, node.get_child_node('renamed'))
+            self.assertIsNone(node.search_child_node('job1'))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_add_dependencies(self):
+        """
+        Test adding dependencies in bulk.
+        """
+        node = JobsCompoundJobNode('compound', 4)
+        node.create_node()
+        node.make_output_port('spam')
+
+        node.add_dependencies(('job%d' % i, '', 'job%d' % (i - 1), '') for i in range(1, 3))
+        node.add_dependencies_columns(['job3', '.'], ['job2', 'job3'], predecessor_port_names=['', 'all'])
+        node.add_dependencies([('.', 'spam', 'job3', 'all')])
+
+        self.assertEqual(['job0'], [port.node.name for port in node.get_child_node('job1').input_ports[0].predecessors])
+        self.assertEqual(['job2'], [port.node.name for port in node.get_child_node('job3').input_ports[0].predecessors])
+        self.assertEqual(['job3'], [port.node.name for port in node.get_output_port('all').predecessors])
+        self.assertEqual(['job3'], [port.node.name for port in node.get_output_port('spam').predecessors])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_add_dependencies_errors(self):
+        """
+        Test all unknown nodes and ports are reported and no dependency is added.
+        """
+        node = JobsCompoundJobNode('compound')
+        node.create_node()
+
+        with self.assertRaises(ValueError) as context:
+            node.add_dependencies([('job1', '', 'job0', ''),
+                                   ('spam', '', 'job0', ''),
+                                   ('job2', 'eggs', 'ham', ''),
+                                   ('spam', '', 'job1', '')])
+
+        message = str(context.exception)
+        self.assertIn("'spam'", message)
+        self.assertIn("'eggs'", message)
+        self.assertIn("'ham'", message)
+        self.assertEqual(1, message.count("'spam'"))
+        self.assertEqual(0, len(node.get_child_node('job1').get_input_port('all').predecessors))
+
+        with self.assertRaises(ValueError):
+            node.add_dependencies_columns(['job1', 'job2'], ['job0'])
+
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_remove_child_nodes(self):
+        """
+        Test removing child nodes in batch replaces dependencies on the removed nodes transitively.
+        """
+        node = JobsCompoundJobNode('compound', 6)
+        node.create_node()
+        node.add_dependencies(('job%d' % i, '', 'job%d' % (i - 1), '') for i in range(1, 6))
+        node.add_dependencies([('job4', '', 'job0', ''), ('.', '', 'job3', '')])
+
+        node.remove_child_nodes(['job2', 'job3'])
+        node.remove_child_nodes(lambda child_node: child_node.name == 'job5')
+
+        self.assertEqual(['job0', 'job1', 'job4'], [child_node.name for child_node in node.child_nodes])
+        self.assertEqual(['job0', 'job1'],
+                         [port.node.name for port in node.get_child_node('job4').get_input_port('all').predecessors])
+        self.assertEqual(['job1'], [port.node.name for port in node.get_output_port('all').predecessors])
+        self.assertEqual(2, len(node.get_child_node('job1').get_output_port('all').successors))
+
+        with self.assertRaises(Exception):
+            node.remove_child_nodes(['job1', 'job2'])
+        self.assertEqual(3, len(node.child_nodes))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_remove_child_node(self):
+        """
+        Test removing a child node on which siblings and output ports of the parent depend by multiple ports.
+        """
+        node = JobsCompoundJobNode('compound', 4)
+        node.create_node()
+        node.make_input_port('in')
+        node.make_output_port('out')
+        node.get_child_node('job2').make_output_port('done')
+        node.add_dependencies([('job1', '', 'job0', ''),
+                               ('job1', '', '.', 'in'),
+                               ('job2', '', 'job1', ''),
+                               ('job3', '', 'job2', ''),
+                               ('job3', '', 'job2', 'done'),
+                               ('job3', '', 'job0', ''),
+                               ('.', 'out', 'job2', 'done'),
+                               ('.', '', 'job2', '')])
+
+        job2 = node.get_child_node('job2')
+        node.remove_child_node('job2')
+
+        def names(port):
+            return ['{0}.{1}'.format(predecessor.node.name, predecessor.port_name) for predecessor in port.predecessors]
+
+        # The dependencies on both ports of job2 are replaced once with the dependencies of job2, in order.
+        self.assertEqual(['job0.all', 'job1.all'], names(node.get_child_node('job3').get_input_port('all')))
+        self.assertEqual(['job1.all'], names(node.get_output_port('out')))
+        self.assertEqual(['job1.all'], names(node.get_output_port('all')))
+        self.assertEqual(['job0.all', 'compound.in'], names(node.get_child_node('job1').get_input_port('all')))
+
+        # The removed node is detached from its predecessors.
+        self.assertEqual([], names(job2.get_input_port('all')))
+        self.assertNotIn(job2.get_input_port('all'), node.get_child_node('job1').get_output_port('all').successors)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_structural_hash(self):
+        """
+        Test the structural hash depends on the XML of a node only.
+        """
+        def create():
+            node = JobsCompoundJobNode('compound', 4)
+            node.create_node()
+            node.add_dependencies([('job1', '', 'job0', ''), ('job2', '', '.', '')])
+
+            return node
+
+        node1 = create()
+        node2 = create()
+        self.assertEqual(node1.get_structural_hash(), node2.get_structural_hash())
+        self.assertEqual(32, len(node1.get_structural_hash()))
+
+        hashes = node1.get_structural_hashes()
+        self.assertEqual(5, len(hashes))
+        self.assertEqual(hashes[node1.get_child_node('job3')], node2.get_child_node('job3').get_structural_hash())
+        self.assertNotEqual(hashes[node1.get_child_node('job0')], hashes[node1.get_child_node('job3')])
+
+        changes = [lambda node: setattr(node, 'username', 'user'),
+                   lambda node: setattr(node.get_child_node('job3'), 'path', '/bin/false'),
+                   lambda node: node.get_child_node('job3').args.append(1),
+                   lambda node: node.add_dependency('job3', '', 'job2', ''),
+                   lambda node: node.get_child_node('job3').make_output_port('done'),
+                   lambda node: node.remove_child_node('job3')]
+        for change in changes:
+            node = create()
+            change(node)
+            self.assertNotEqual(node1.get_structural_hash(), node.get_structural_hash())
+
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_clone(self):
+        """
+        Test cloning a finalized node gives the same node as building the node again.
+        """
+        def create(name):
+            node = JobsCompoundJobNode(name, 4)
+            node.create_node()
+            node.get_child_node('job0').args = ['spam']
+            node.add_dependencies([('job1', '', 'job0', ''), ('job2', '', 'job1', ''), ('job3', '', 'job0', '')])
+            node.finalize()
+
+            return node
+
+        template = create('template')
+        clone = template.clone('compound')
+        self.assertEqual(create('compound').get_structural_hash(), clone.get_structural_hash())
+        self.assertIsNone(clone.parent)
+
+        nodes = [template]
+        for node in nodes:
+            nodes.extend(node.child_nodes)
+        copies = [clone]
+        for node in copies:
+            for child_node in node.child_nodes:
+                self.assertIs(node, child_node.parent)
+            for port in node.input_ports + node.output_ports:
+                self.assertIs(node, port.node)
+                for predecessor in port.predecessors:
+                    self.assertIn(port, predecessor.successors)
+            copies.extend(node.child_nodes)
+        self.assertEqual(len(nodes), len(copies))
+        self.assertFalse(set(map(id, nodes)) & set(map(id, copies)))
+
+        def hook(node, node_copy):
+            if node.name == 'job0':
+                node_copy.name = 'first'
+                node_copy.username = 'user'
+                node_copy.args.append('eggs')
+
+        clone = template.clone(hook=hook)
+        self.assertEqual(['first', 'job1', 'job2', 'job3'], [child_node.name for child_node in clone.child_nodes])
+        self.assertEqual(['spam', 'eggs'], clone.get_child_node('first').args)
+        self.assertEqual(['spam'], template.get_child_node('job0').args)
+        predecessors = clone.get_child_node('job1').get_input_port('all').predecessors
+        self.assertEqual(['first'], [port.node.name for port in predecessors])
+
+        # Changing the clone does not change the template.
+        hash_ = template.get_structural_hash()
+        clone.add_dependency('job3', '', 'job2', '')
+        clone.remove_child_node('job1')
+        clone.finalize()
+        self.assertEqual(hash_, template.get_structural_hash())
+
+        # Dependencies outside the cloned node are not copied.
+        parent = JobsCompoundJobNode('parent', 0)
+        parent.create_node()
+        parent.add_child_node(template)
+        parent.add_child_node(template.clone('compound'))
+        parent.add_dependency('compound', '', 'template', '')
+        parent.finalize()
+        clone = parent.get_child_node('compound').clone()
+        self.assertEqual(0, len(clone.get_input_port('all').predecessors))
+        self.assertEqual(0, len(clone.get_output_port('all').successors))
+
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_compact(self):
+        """
+        Test nodes and ports have no __dict__, empty collections are created on first use, and subclasses work.
+        """
+        node = JobsCompoundJobNode('compound', 20)
+        node.create_node()
+        node.add_dependencies(('job%d' % i, '', 'job%d' % (i - 1), '') for i in range(1, 20))
+        node.finalize()
+        node.get_structural_hash()
+
+        job = node.get_child_node('job1')
+        for obj in (job, job.input_ports[0], CountingConsumption('cpu', 1)):
+            self.assertFalse(hasattr(obj, '__dict__'))
+        self.assertEqual(20, node.size)
+        self.assertIsNone(job._child_nodes)
+        self.assertIsNone(job._consumptions)
+        self.assertEqual([], job.consumptions)
+        self.assertIs('job1', job.name)
+
+        # Large lists have an index on the names, small lists are searched linearly.
+        self.assertIsNotNone(node.child_nodes._index)
+        self.assertIsNone(job.input_ports._index)
+        node.remove_child_nodes(['job%d' % i for i in range(15)])
+        self.assertEqual(['job15', 'job16', 'job17', 'job18', 'job19'], [child.name for child in node.child_nodes])
+        self.assertIs(node.child_nodes[1], node.get_child_node('job16'))
+        self.assertIsNone(node.search_child_node('job1'))
+        with self.assertRaises(ValueError):
+            node.add_child_node(CommandJobNode('job19'))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
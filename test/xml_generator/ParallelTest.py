@@ -0,0 +1,123 @@
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from enarksh_lib.xml_generator.graph.PortGraph import PortGraph
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+from test.xml_generator import FinalizeTest, LazyTest
+
+
+class ParallelScheduleNode(ScheduleNode):
+    """
+    Schedule with compound nodes created by an executor.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, executor, lazy=False):
+        ScheduleNode.__init__(self, 'PARALLEL')
+
+        self.executor = executor
+        self.lazy = lazy
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        nodes = [LazyTest.LayerCompoundJobNode('compound%d' % i, 4 + i, self.lazy) for i in range(6)]
+        if self.executor is None:
+            for node in nodes:
+                node.create_node(self.lazy)
+                self.add_child_node(node)
+        else:
+            self.add_child_nodes_parallel(nodes, self.executor, self.lazy)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('compound1', '', 'compound0', '')
+        self.add_dependency('compound2', 'extra', 'compound0', '')
+        self.add_dependency('compound3', '', 'compound1', '')
+        self.add_dependency('compound5', '', 'compound2', '')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_schedule(executor, lazy=False):
+        schedule = ParallelScheduleNode(executor, lazy)
+        schedule.create_node()
+        schedule.finalize()
+
+        return schedule
+
+
+class ParallelTest(unittest.TestCase):
+    """
+    Test cases for creating and finalizing nodes in parallel.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_add_child_nodes_parallel(self):
+        """
+        Test creating child nodes with thread and process pools gives the same node tree as a sequential build.
+        """
+        schedule = ParallelScheduleNode.create_schedule(None)
+        for executor_class in (ThreadPoolExecutor, ProcessPoolExecutor):
+            with executor_class(max_workers=2) as executor:
+                for lazy in (False, True):
+                    parallel = ParallelScheduleNode.create_schedule(executor, lazy)
+                    self.assertEqual(schedule.get_xml(), parallel.get_xml(), executor_class.__name__)
+                    self.assertEqual(schedule.fingerprint(), parallel.fingerprint(), executor_class.__name__)
+
+                    for node in parallel.child_nodes:
+                        self.assertIs(parallel, node.parent)
+                        for child_node in node.child_nodes:
+                            self.assertIs(node, child_node.parent)
+                            for port in child_node.input_ports + child_node.output_ports:
+                                self.assertIs(child_node, port.node)
+                                for predecessor in port.predecessors:
+                                    self.assertIn(port, predecessor.successors)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_finalize_parallel(self):
+        """
+        Test finalizing with a process pool gives the same dependencies as finalizing sequentially.
+        """
+        batch_size = PortGraph.BATCH_SIZE
+        try:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                for size in (1, batch_size):
+                    PortGraph.BATCH_SIZE = size
+                    for seed in range(20):
+                        expected = FinalizeTest.FinalizeTest.create_schedule(seed)
+                        expected.finalize()
+
+                        actual = FinalizeTest.FinalizeTest.create_schedule(seed)
+                        actual.ensure_dependencies()
+                        actual.purge(executor=executor)
+                        self.assertEqual(expected.get_xml(), actual.get_xml(), 'seed %d' % seed)
+
+                        actual = FinalizeTest.FinalizeTest.create_schedule(seed)
+                        actual.finalize(executor=executor)
+                        self.assertEqual(expected.get_xml(), actual.get_xml(), 'seed %d' % seed)
+
+                        for node in (expected, actual):
+                            FinalizeTest.FinalizeTest.modify_schedule(node, random.Random(seed))
+                        expected.finalize()
+                        actual.finalize(executor=executor)
+                        self.assertEqual(expected.get_xml(), actual.get_xml(), 'seed %d' % seed)
+        finally:
+            PortGraph.BATCH_SIZE = batch_size
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_errors(self):
+        """
+        Test nodes with a parent or duplicate names are refused.
+        """
+        schedule = ParallelScheduleNode.create_schedule(None)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with self.assertRaises(ValueError):
+                schedule.add_child_nodes_parallel([LazyTest.LayerCompoundJobNode('compound0', 3, False)], executor)
+            with self.assertRaises(ValueError):
+                schedule.add_child_nodes_parallel([schedule.child_nodes[0]], executor)
+
+            nodes = [LazyTest.LayerCompoundJobNode('new', 3, False), LazyTest.LayerCompoundJobNode('new', 3, False)]
+            with self.assertRaises(ValueError):
+                schedule.add_child_nodes_parallel(nodes, executor)
+
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,87 @@
+import unittest
+
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from test.xml_generator.NodeTest import JobsCompoundJobNode
+
+
+class PortTest(unittest.TestCase):
+    """
+    Test cases for the dependencies of ports.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_ports(size):
+        """
+        Returns the input port of a job and the output ports of other jobs of a compound node.
+
+        :param int size: The number of output ports.
+
+        :rtype: (enarksh_lib.xml_generator.port.Port.Port,list[enarksh_lib.xml_generator.port.Port.Port])
+        """
+        node = JobsCompoundJobNode('compound', size + 1)
+        node.create_node()
+        jobs = node.child_nodes
+
+        return jobs[0].get_input_port(CommandJobNode.ALL_PORT_NAME), \
+            [job.get_output_port(CommandJobNode.ALL_PORT_NAME) for job in jobs[1:]]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_duplicate_dependency(self):
+        """
+        Test adding a dependency twice adds the dependency once.
+        """
+        port, predecessors = self.create_ports(2)
+
+        port.add_dependency(predecessors[0])
+        port.add_dependency(predecessors[1])
+        port.add_dependency(predecessors[0])
+
+        self.assertEqual(predecessors, list(port.predecessors))
+        self.assertEqual([port], list(predecessors[0].successors))
+        self.assertEqual([port], list(predecessors[1].successors))
+        self.assertTrue(port.has_dependency(predecessors[0]))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_remove_dependency(self):
+        """
+        Test removing a dependency updates the predecessors and the successors.
+        """
+        port, predecessors = self.create_ports(3)
+        for predecessor in predecessors:
+            port.add_dependency(predecessor)
+
+        port.remove_dependency(predecessors[1])
+        self.assertEqual([predecessors[0], predecessors[2]], list(port.predecessors))
+        self.assertFalse(port.has_dependency(predecessors[1]))
+        self.assertEqual([], list(predecessors[1].successors))
+        self.assertEqual([port], list(predecessors[0].successors))
+
+        # Removing a port that is not a dependency does nothing.
+        port.remove_dependency(predecessors[1])
+        self.assertEqual([predecessors[0], predecessors[2]], list(port.predecessors))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_order(self):
+        """
+        Test the predecessors and successors keep the order in which the dependencies have been added.
+        """
+        port, predecessors = self.create_ports(20)
+        order = predecessors[10:] + predecessors[:10]
+        for predecessor in order:
+            port.add_dependency(predecessor)
+        self.assertEqual(order, list(port.predecessors))
+
+        for predecessor in order[::3]:
+            port.remove_dependency(predecessor)
+        port.add_dependency(order[0])
+        expected = [predecessor for predecessor in order if predecessor not in order[::3]] + [order[0]]
+        self.assertEqual(expected, list(port.predecessors))
+        self.assertEqual([name for name, _ in port.get_dependency_names()],
+                         [predecessor.node.name for predecessor in expected])
+
+        other, _ = self.create_ports(0)
+        other.add_dependency(order[1])
+        self.assertEqual([port, other], list(order[1].successors))
+
+# ----------------------------------------------------------------------------------------------------------------------
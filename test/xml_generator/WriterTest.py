@@ -0,0 +1,282 @@
+import gc
+import io
+import random
+import threading
+import unittest
+import weakref
+
+from enarksh_lib.xml_generator.consumption.CountingConsumption import CountingConsumption
+from enarksh_lib.xml_generator.consumption.ReadWriteLockConsumption import ReadWriteLockConsumption
+from enarksh_lib.xml_generator.node.CommandJobNode import CommandJobNode
+from enarksh_lib.xml_generator.node.CompoundJobNode import CompoundJobNode
+from enarksh_lib.xml_generator.node.ScheduleNode import ScheduleNode
+from enarksh_lib.xml_generator.resource.CountingResource import CountingResource
+from enarksh_lib.xml_generator.resource.ReadWriteLockResource import ReadWriteLockResource
+from enarksh_lib.xml_generator.writer.Compression import Compression
+from enarksh_lib.xml_generator.writer.FragmentCache import FragmentCache
+from test.xml_generator import LazyTest
+from test.xml_generator.FinalizeTest import RandomScheduleNode
+
+
+class HookCommandJobNode(CommandJobNode):
+    """
+    Command job of which the path is set by pre_generate_xml().
+    """
+
+    prefix = '/bin/'
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def pre_generate_xml(self):
+        self.path = HookCommandJobNode.prefix + self.parent.name
+
+
+class HookCompoundJobNode(CompoundJobNode):
+    """
+    Compound node with command jobs of which the path is set by pre_generate_xml().
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(3):
+            self.add_child_node(HookCommandJobNode('job%d' % i))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('job1', '', 'job0', '')
+        self.add_dependency('job2', '', 'job1', '')
+
+
+class HookScheduleNode(ScheduleNode):
+    """
+    Schedule with compound nodes that are identical until pre_generate_xml() of their child nodes is called.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_child_nodes(self):
+        for i in range(2):
+            node = HookCompoundJobNode('compound%d' % i)
+            node.create_node()
+            self.add_child_node(node)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_dependencies(self):
+        self.add_dependency('compound1', '', 'compound0', '')
+
+
+class WriterTest(unittest.TestCase):
+    """
+    Test cases for writing the XML of schedules.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def create_schedule(seed):
+        """
+        Returns a finalized random schedule with resources, consumptions, and texts that must be escaped.
+
+        :param int seed: The seed of the random generator.
+
+        :rtype: RandomScheduleNode
+        """
+        schedule = RandomScheduleNode('RANDOM%d' % seed, seed)
+        schedule.create_node()
+        schedule.finalize()
+
+        generator = random.Random(seed)
+        characters = ['a', ' ', '&', '<', '>', '"', "'", ']]>', '\r\n', '\r', '\n', '\t', 'é', '€']
+
+        def text():
+            return ''.join(generator.choice(characters) for _ in range(generator.randint(0, 5)))
+
+        stack = [schedule]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.child_nodes)
+            if generator.random() < 0.3:
+                node.username = text()
+            if hasattr(node, 'args'):
+                node.args = [text() for _ in range(generator.randint(0, 2))]
+            if generator.random() < 0.3:
+                node.resources.append(CountingResource(text(), generator.randint(0, 9)))
+                node.resources.append(ReadWriteLockResource(text()))
+            if generator.random() < 0.3:
+                node.consumptions.append(CountingConsumption(text(), generator.randint(0, 9)))
+                node.consumptions.append(ReadWriteLockConsumption(text(), text()))
+
+        return schedule
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_xml_backends(self):
+        """
+        Test the string backend gives the same XML as the ElementTree backend.
+        """
+        for seed in range(50):
+            schedule = self.create_schedule(seed)
+            for encoding in ('utf-8', 'ascii', 'utf-16'):
+                for pretty in (True, False):
+                    self.assertEqual(schedule.get_xml(encoding, pretty, schedule.BACKEND_ELEMENT_TREE),
+                                     schedule.get_xml(encoding, pretty, schedule.BACKEND_STRING),
+                                     'seed %d' % seed)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_write_xml(self):
+        """
+        Test write_xml() writes the same XML as get_xml().
+        """
+        for seed in range(50):
+            schedule = self.create_schedule(seed)
+            for encoding in ('utf-8', 'ascii', 'utf-16'):
+                stream = io.BytesIO()
+                schedule.write_xml(stream, encoding)
+
+                self.assertEqual(schedule.get_xml(encoding), stream.getvalue(), 'seed %d' % seed)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_iter_xml_chunks(self):
+        """
+        Test iter_xml_chunks() yields the same XML as get_xml() in chunks of the requested size.
+        """
+        for seed in range(10):
+            schedule = self.create_schedule(seed)
+            chunks = list(schedule.iter_xml_chunks(100))
+
+            self.assertEqual(schedule.get_xml(), b''.join(chunks), 'seed %d' % seed)
+            self.assertEqual([100] * (len(chunks) - 1), [len(chunk) for chunk in chunks[:-1]])
+            self.assertTrue(0 < len(chunks[-1]) <= 100)
+
+        # The XML is generated while iterating, without threads, and an abandoned iterator holds no resources.
+        count = threading.active_count()
+        chunks = schedule.iter_xml_chunks(10)
+        next(chunks)
+        self.assertEqual(count, threading.active_count())
+        reference = weakref.ref(schedule)
+        del schedule
+        del chunks
+        gc.collect()
+        self.assertIsNone(reference())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_iter_xml_chunks_lazy(self):
+        """
+        Test iter_xml_chunks() holds the child nodes of one deferred compound node at a time and releases the child
+        nodes when the iterator is closed early.
+        """
+        schedule = LazyTest.LayerScheduleNode.create_schedule(True)
+        compounds = schedule.child_nodes
+
+        chunks = []
+        for chunk in schedule.iter_xml_chunks(100):
+            chunks.append(chunk)
+            self.assertLessEqual(len([compound for compound in compounds if not compound.is_deferred()]), 1)
+        self.assertEqual(LazyTest.LayerScheduleNode.create_schedule(False).get_xml(), b''.join(chunks))
+
+        chunks = schedule.iter_xml_chunks(100)
+        while compounds[0].is_deferred():
+            next(chunks)
+        chunks.close()
+        self.assertTrue(all(compound.is_deferred() for compound in compounds))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_write_xml_compressed(self):
+        """
+        Test writing compact and compressed XML and reading it back.
+        """
+        schedule = self.create_schedule(1)
+        for compression in (None, Compression.GZIP, Compression.LZMA):
+            for pretty in (True, False):
+                stream = io.BytesIO()
+                schedule.write_xml(stream, pretty=pretty, compression=compression)
+                stream.seek(0)
+
+                self.assertEqual(compression, Compression.detect(stream.getvalue()))
+                self.assertEqual(schedule.get_xml(pretty=pretty), Compression.open_reader(stream).read())
+
+                chunks = schedule.iter_xml_chunks(100, pretty=pretty, compression=compression)
+                self.assertEqual(stream.getvalue(), b''.join(chunks))
+
+        stream.seek(0)
+        self.assertEqual('Schedule', Compression.parse(stream).getroot().tag)
+        self.assertGreater(len(schedule.get_xml()), len(schedule.get_xml(pretty=False)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_fragment_cache(self):
+        """
+        Test writing XML with a fragment cache gives the same XML as without a cache.
+        """
+        cache = FragmentCache()
+        for seed in range(10):
+            schedule = self.create_schedule(seed)
+            for pretty in (True, False):
+                expected = schedule.get_xml(pretty=pretty)
+                actual = schedule.get_xml(pretty=pretty, backend=schedule.BACKEND_STRING, cache=cache)
+                self.assertEqual(expected, actual)
+
+                stream = io.BytesIO()
+                schedule.write_xml(stream, pretty=pretty, buffer_size=10, cache=cache)
+                self.assertEqual(expected, stream.getvalue())
+
+        statistics = cache.get_statistics()
+        self.assertGreater(statistics['hits'], 0)
+        self.assertGreater(statistics['misses'], 0)
+        self.assertEqual(0, statistics['evictions'])
+
+        # A small cache evicts the least recently used fragments.
+        cache = FragmentCache(5000)
+        for seed in range(10):
+            schedule = self.create_schedule(seed)
+            stream = io.BytesIO()
+            schedule.write_xml(stream, cache=cache)
+            self.assertEqual(schedule.get_xml(), stream.getvalue())
+        self.assertLessEqual(cache.size, 5000)
+        self.assertGreater(cache.get_statistics()['evictions'], 0)
+
+        with self.assertRaises(ValueError):
+            schedule.get_xml(cache=cache)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_fragment_cache_pre_generate_xml(self):
+        """
+        Test the fragment cache takes changes made by pre_generate_xml() into account.
+        """
+        cache = FragmentCache()
+        for prefix in ('/bin/', '/usr/bin/'):
+            HookCommandJobNode.prefix = prefix
+            schedule = HookScheduleNode('HOOKS')
+            schedule.create_node()
+            schedule.finalize()
+
+            actual = schedule.get_xml(backend=schedule.BACKEND_STRING, cache=cache)
+            self.assertIn((prefix + 'compound1').encode(), actual)
+            self.assertEqual(schedule.get_xml(), actual)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_fragment_cache_lazy(self):
+        """
+        Test the fragment cache does not create the child nodes of deferred compound nodes for computing hashes.
+        """
+        expected = LazyTest.LayerScheduleNode.create_schedule(False).get_xml()
+        cache = FragmentCache()
+
+        schedule = LazyTest.LayerScheduleNode.create_schedule(True)
+        compound = schedule.child_nodes[0]
+        # Using the child nodes creates the child nodes for good, however the nested compound nodes are deferred.
+        subs = [node for node in compound.child_nodes if isinstance(node, CompoundJobNode)]
+        self.assertTrue(subs)
+        self.assertTrue(all(sub.is_deferred() for sub in subs))
+
+        self.assertEqual(expected, schedule.get_xml(backend=schedule.BACKEND_STRING, cache=cache))
+        self.assertTrue(all(sub.is_deferred() for sub in subs))
+
+        stream = io.BytesIO()
+        schedule.write_xml(stream, cache=cache)
+        self.assertEqual(expected, stream.getvalue())
+        self.assertTrue(all(sub.is_deferred() for sub in subs))
+
+        chunks = []
+        for chunk in schedule.iter_xml_chunks(100, cache=cache):
+            chunks.append(chunk)
+            self.assertLessEqual(len([node for node in schedule.child_nodes if not node.is_deferred()]), 2)
+        self.assertEqual(expected, b''.join(chunks))
+        self.assertTrue(all(sub.is_deferred() for sub in subs))
+
+# ----------------------------------------------------------------------------------------------------------------------